@@ -1,12 +1,51 @@
+import functools
+import weakref
+
+
+@functools.total_ordering
 class CellID:
+    __slots__ = ('value', '__weakref__')
+
+    # Interned cell identifiers, by value. They are kept while they are referenced elsewhere.
+    interned = weakref.WeakValueDictionary()
+
     def __init__(self, value):
         """
         :param value: string representing the cell identifier
         """
         self.value = value
 
+    @classmethod
+    def intern(cls, value):
+        """
+        :param value: string representing the cell identifier
+        :return: the CellID with that value shared by all the callers, so that repeated identifiers
+        (for instance, the cells loaded from a store) do not create a new object each
+        """
+        cell = cls.interned.get(value)
+        if cell is None:
+            cell = cls(value)
+            cls.interned[value] = cell
+        return cell
+
     def __eq__(self, other):
-        return (other is not None) and (self.value == other.value)
+        if not isinstance(other, CellID):
+            return NotImplemented
+        return self.value == other.value
+
+    def __lt__(self, other):
+        """
+        Cells are ordered by their identifiers, so that a cell is followed by its descendants
+        """
+        if not isinstance(other, CellID):
+            return NotImplemented
+        return self.value < other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return 'CellID(' + repr(self.value) + ')'
 
     def get_refinement(self):
         """
@@ -0,0 +1,115 @@
+import numpy as np
+
+from dggs.cell_ID import CellID
+from dggs.rHealPix import get_rHEALPix
+
+
+class CellIDArray:
+    """
+    Sorted set of cell identifiers stored as a NumPy array of packed 64-bit cell keys (see rHEALPix.get_cell_keys).
+    Keys sort like the cell identifiers, so the descendants of a cell are a contiguous range of the array.
+    """
+
+    def __init__(self, cells=None, keys=None, dggs=None, is_sorted=False):
+        """
+        :param cells: sequence of cell identifiers, of type CellID (or their string values)
+        :param keys: array of packed 64-bit keys of the cells, instead of cells
+        :param dggs: Discrete Global Grid System, rHEALPix by default
+        :param is_sorted: True if the keys are already sorted and unique, so they are used without a copy
+        """
+        if dggs is None:
+            dggs = get_rHEALPix()
+        self.dggs = dggs
+
+        if keys is None:
+            keys = dggs.get_cell_keys(cells if cells is not None else [])
+            is_sorted = False
+        keys = np.asarray(keys, dtype=np.int64)
+        if not is_sorted:
+            keys = np.unique(keys)
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        """
+        :return: generator of the cells (CellID), in order
+        """
+        for value in self.get_values():
+            yield CellID(str(value))
+
+    def __getitem__(self, index):
+        """
+        :param index: integer or slice
+        :return: CellID in that position, or CellIDArray that shares the keys of this one for a slice
+        """
+        if isinstance(index, slice):
+            return CellIDArray(keys=self.keys[index], dggs=self.dggs, is_sorted=index.step is None or index.step > 0)
+        return self.dggs.get_cell_from_key(self.keys[index])
+
+    def __contains__(self, cell):
+        """
+        :param cell: cell identifier, of type CellID (or its string value)
+        :return: True if the cell is in the array
+        """
+        return bool(self.contains([cell])[0])
+
+    def __eq__(self, other):
+        if not isinstance(other, CellIDArray):
+            return NotImplemented
+        return np.array_equal(self.keys, other.keys)
+
+    def contains(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellID (or their string values)
+        :return: boolean array, True for the cells that are in the array
+        """
+        return self.contains_keys(self.dggs.get_cell_keys(cells))
+
+    def contains_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: boolean array, True for the keys that are in the array
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[positions] == keys
+
+    def get_refinements(self):
+        """
+        :return: integer array with the refinement of each cell
+        """
+        return self.dggs.get_key_refinements(self.keys)
+
+    def with_refinement(self, refinement):
+        """
+        :param refinement: refinement of the cells
+        :return: CellIDArray with the cells of the array at that refinement
+        """
+        return CellIDArray(keys=self.keys[self.get_refinements() == refinement], dggs=self.dggs, is_sorted=True)
+
+    def with_prefix(self, cell):
+        """
+        :param cell: cell identifier, of type CellID (or its string value)
+        :return: CellIDArray with the cells of the array that are the cell or its descendants.
+        It shares the keys of this one (no copy).
+        """
+        key = self.dggs.get_cell_keys([cell])
+        start = np.searchsorted(self.keys, key[0], side='left')
+        end = np.searchsorted(self.keys, self.dggs.get_key_range_end(key)[0], side='right')
+        return CellIDArray(keys=self.keys[start:end], dggs=self.dggs, is_sorted=True)
+
+    def get_values(self):
+        """
+        :return: NumPy array with the identifiers (CellID values) of the cells, in order
+        """
+        return self.dggs.get_cells_from_keys(self.keys)
+
+    def get_cells(self):
+        """
+        :return: list of the cells (CellID), in order
+        """
+        return [CellID(str(value)) for value in self.get_values()]
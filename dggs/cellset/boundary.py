@@ -1,73 +1,108 @@
-import networkx as nx
+import collections
+import threading
+
+import numpy as np
 
 from dggs.boundary_ID import BoundaryID, AUID
 from dggs.cell_ID import CellID
-from dggs.dggs_auids.dggs_auids import cuids_to_bp_auid, bp_auid_to_cuids
+from dggs.cell_ID_array import CellIDArray
+from dggs.dggs_auids.dggs_auids import encode_bp_auid, iter_bp_auid_cuids, generate_BP_segment, hash_id
 from dggs.cellset.cellset import GridStack
-from dggs.rHealPix import rHEALPix
+from dggs.cellset.dense_grid_stack import DenseGridStack
+from dggs.rHealPix import get_rHEALPix
+
+# Bounding boxes of the latest boundaries, by DGGS and hash of the boundary identifier, from the least to the most
+# recently used. The lock is held while the cache is read or updated, so it can be shared by several threads.
+bbox_cache = collections.OrderedDict()
+bbox_cache_size = 4096
+bbox_cache_lock = threading.Lock()
 
 
 class Boundary:
-    def __init__(self, boundary_ID=None, cells=None, dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, boundary_ID=None, cells=None, dggs=None):
         """
         :param boundary_ID: boundary identifier, of type BoundaryID
-        :param cells: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ]
+        :param cells: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ],
+        or CellIDArray
         :param dggs: Discrete Global Grid System, rHEALPix by default
         """
         self.boundary_ID = boundary_ID
         self.cells = cells
         self.optimal = False
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
 
         assert boundary_ID is not None or cells is not None
 
-        if cells is None:
-            cells = []
-            cell_ID = ''
-            first = True
-            for char in boundary_ID.value:
-                if char in self.dggs.cells_R0:
-                    if not first:
-                        cells.append(CellID(cell_ID))
-                    else:
-                        first = False
-                    cell_ID = char
-                else:
-                    cell_ID = cell_ID + char
-            cells.append(CellID(cell_ID))
-            cell_ids = sorted([cell.value for cell in cells])
-            self.cells = [CellID(id) for id in cell_ids]
-
-        if boundary_ID is None:
-            cell_ids = sorted([cell.value for cell in cells])
-            self.cells = [CellID(id) for id in cell_ids]
-            boundary_ID = ''
-            for cell_ID in self.cells:
-                boundary_ID = boundary_ID + cell_ID.value
-            self.boundary_ID = BoundaryID(boundary_ID)
+        if isinstance(cells, CellIDArray):
+            # The packed keys are kept and the cells are decoded the first time they are used
+            self.cells = None
+            self.cell_array = cells
+            if boundary_ID is None:
+                self.boundary_ID = BoundaryID(''.join(cells.get_values().tolist()))
+        elif cells is None:
+            self.cells = [CellID(cell_ID) for cell_ID in self.dggs.split_boundary_ID(boundary_ID.value)]
+        elif boundary_ID is None:
+            self.cells = sorted(cells)
+            self.boundary_ID = BoundaryID(''.join(cell_ID.value for cell_ID in self.cells))
+        self.cell_ranges = None
+
+    @property
+    def cells(self):
+        """
+        :return: sorted list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ]
+        """
+        if self._cells is None and self.cell_array is not None:
+            self._cells = self.cell_array.get_cells()
+        return self._cells
 
+    @cells.setter
+    def cells(self, cells):
+        self._cells = cells
+        self.cell_array = None
 
 
     def get_as_tree(self):
         """
         :return: prefix tree / trie composed of the identifiers of the boundary cells
         """
+        import networkx as nx
+
         cell_ids = [cell.value for cell in self.cells]
         sorted_cell_ids = sorted(cell_ids)
         t, r = nx.prefix_tree(sorted_cell_ids)  # A Prefix_Tree is essentially another name for a trie
         return t
 
+    def get_cell_array(self):
+        """
+        :return: CellIDArray with the cells of the boundary, the one given to the constructor if there was one
+        """
+        if self.cell_array is not None:
+            return self.cell_array
+        return CellIDArray(cells=self.cells, dggs=self.dggs)
+
     def get_as_grid_stack(self):
         """
         :return: GridStack,a series of Grids ordered by their level of refinement
         """
         return GridStack(self.boundary_ID)
 
+    def get_as_dense_grid_stack(self, refinement=None):
+        """
+        :param refinement: largest refinement of the rasters, by default the largest refinement of the boundary
+        :return: DenseGridStack with the compacted cells of the boundary, which must be inside the same cell of
+        refinement 0
+        """
+        return DenseGridStack.from_boundary(self, refinement=refinement)
+
     def get_min_refinement(self):
         """
         :return: integer that represents minimum refinement of the boundary, that is,
         of the cells that compose it, the refinement of the cell with the lowest refinement.
         """
+        if self.cell_array is not None:
+            return int(self.cell_array.get_refinements().min())
         min_refinement = self.cells[0].get_refinement()
         for cell in self.cells:
             if cell.get_refinement() < min_refinement:
@@ -79,6 +114,8 @@ class Boundary:
         :return: integer that represents maximum refinement of the boundary, that is,
         of the cells that compose it, the refinement of the cell with the highest refinement.
         """
+        if self.cell_array is not None:
+            return int(self.cell_array.get_refinements().max())
         max_refinement = self.cells[0].get_refinement()
         for cell in self.cells:
             if cell.get_refinement() > max_refinement:
@@ -102,23 +139,187 @@ class Boundary:
         """
         :return: OptimalBoundary, that is, a boundary that is the smallest one that delimits exactly its area.
         """
-        maxrefinement = self.get_max_refinement()
-        new_cells = self.cells
-        for actual_refinement in range(maxrefinement, 0, -1):
-            for cell_act_res in [cell for cell in new_cells if cell.get_refinement() == actual_refinement]:
-                father_value = cell_act_res.value[actual_refinement - 1]
-                cells_with_same_father = [cell for cell in new_cells
-                                          if (cell.get_refinement() == actual_refinement
-                                              and cell.value[actual_refinement - 1] == father_value)]
-                if len(cells_with_same_father) == (self.dggs.N_side ** 2):
-                    new_cells = [cell for cell in new_cells if cell not in cells_with_same_father]
-                    copy_cell_value = cell_act_res.value
-                    new_cells.append(CellID(copy_cell_value[:actual_refinement]))
-
-        cell_ids = sorted([cell.value for cell in new_cells])
-        new_cells = [CellID(ciud) for ciud in cell_ids]
-        auid_bp, _, _, _, _ = cuids_to_bp_auid(cell_ids, pars="()", with_opening_par=False)
-        return OptimalBoundary(boundary_ID=AUID(auid_bp), cells=new_cells)
+        # The cells of a CellIDArray are only decoded to compact them, they are not kept
+        new_cells = self.dggs.compact(self.cells if self.cell_array is None else self.cell_array)
+        cell_ids = [cell.value for cell in new_cells]
+        # The compacted cells are sorted and unique
+        auid_bp, _, _ = encode_bp_auid(cell_ids, pars="()", with_opening_par=False, is_sorted=True)
+        return OptimalBoundary(boundary_ID=AUID(auid_bp), cells=new_cells, dggs=self.dggs)
+
+    def get_cell_ranges(self):
+        """
+        :return: tuple with two sorted arrays: the packed 64-bit keys of the compacted cells of the boundary and the
+        largest key of their descendants. They are computed the first time they are used.
+        """
+        if self.cell_ranges is None:
+            if self.optimal and self.cell_array is not None:
+                keys = self.cell_array.keys
+            elif self.optimal and self._cells is None:
+                # The identifiers are decoded from the AUID without creating the cells
+                keys = self.dggs.get_cell_keys(list(iter_bp_auid_cuids(self.boundary_ID.value, pars="()",
+                                                                        with_opening_par=False)))
+            else:
+                # The cells of a CellIDArray are only decoded to compact them, they are not kept
+                cells = self.cells if self.cell_array is None else self.cell_array
+                keys = self.dggs.get_cell_keys(cells if self.optimal else self.dggs.compact(cells))
+            self.cell_ranges = (keys, self.dggs.get_key_range_end(keys))
+        return self.cell_ranges
+
+    def contains_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: boolean array, True for the cells that are inside the area of the boundary
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        starts, ends = self.get_cell_ranges()
+        if len(starts) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        # The compacted cells do not overlap, so only the last one that starts before each key can contain it
+        positions = np.searchsorted(starts, keys, side='right') - 1
+        return (positions >= 0) & (keys <= ends[np.maximum(positions, 0)])
+
+    def contains_cells(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellID, or CellIDArray
+        :return: boolean array, True for the cells that are inside the area of the boundary
+        """
+        if isinstance(cells, CellIDArray):
+            return self.contains_keys(cells.keys)
+        return self.contains_keys(self.dggs.get_cell_keys(cells))
+
+    def contains_cell(self, cell):
+        """
+        :param cell: cell identifier, of type CellID
+        :return: True if the cell is inside the area of the boundary
+        """
+        return bool(self.contains_cells([cell])[0])
+
+    def contains_points(self, lons, lats):
+        """
+        :param lons: array of longitudes of points (geodetic coordinates)
+        :param lats: array of latitudes of points (geodetic coordinates)
+        :return: boolean array, True for the points that are inside the area of the boundary
+        """
+        starts, _ = self.get_cell_ranges()
+        if len(starts) == 0:
+            return np.zeros(len(lons), dtype=bool)
+        # The cells of the points at the largest refinement of the boundary are inside or outside of it
+        refinement = int(self.dggs.get_key_refinements(starts).max())
+        return self.contains_keys(self.dggs.get_cell_keys_from_points(refinement, lons, lats))
+
+    def contains_point(self, lon, lat):
+        """
+        :param lon: longitude of the point (geodetic coordinates)
+        :param lat: latitude of the point (geodetic coordinates)
+        :return: True if the point is inside the area of the boundary
+        """
+        return bool(self.contains_points([lon], [lat])[0])
+
+    def cell_count(self, refinement=None):
+        """
+        :param refinement: refinement of the cells, or None
+        :return: number of cells of that refinement that are inside the area of the boundary, or the number of
+        compacted cells of the boundary if the refinement is None. Compacted cells finer than the refinement
+        do not fill any cell of that refinement, so they are not counted.
+        """
+        starts, _ = self.get_cell_ranges()
+        if refinement is None:
+            return len(starts)
+        counts = np.bincount(self.dggs.get_key_refinements(starts), minlength=refinement + 1)
+        return sum(count * self.dggs.N_side ** (2 * (refinement - cell_refinement))
+                   for cell_refinement, count in enumerate(counts[:refinement + 1].tolist()))
+
+    def area(self):
+        """
+        :return: area of the boundary in square meters, computed from the number of compacted cells of each
+        refinement (the cells of a refinement have the same area)
+        """
+        starts, _ = self.get_cell_ranges()
+        counts = np.bincount(self.dggs.get_key_refinements(starts))
+        return float(sum(count * self.dggs.cell_area(refinement) for refinement, count in enumerate(counts.tolist())))
+
+    def perimeter_cells(self):
+        """
+        :return: sorted list of the compacted cells of the boundary (CellID) that share an edge with a cell outside
+        of its area
+        """
+        starts, _ = self.get_cell_ranges()
+        n = self.dggs.N_side
+        # Digits of the children of a cell on each side: up, right, down and left
+        children = np.arange(n ** 2).reshape(n, n)
+        sides_children = np.array([children[0], children[:, -1], children[-1], children[:, 0]])
+
+        # Each pending test is a cell (a compacted cell or one of its descendants on the side), the index of its
+        # compacted cell and the side whose neighbour is tested
+        keys = np.repeat(starts, 4)
+        owners = np.repeat(np.arange(len(starts)), 4)
+        sides = np.tile(np.arange(4), len(starts))
+        on_perimeter = np.zeros(len(starts), dtype=bool)
+        while len(keys) > 0:
+            neighbours = self.dggs.get_neighbour_keys(keys, diagonals=False)[np.arange(len(keys)), sides]
+            inside = self.contains_keys(neighbours)
+            # A neighbour that is not inside, but has compacted cells, is partially inside: the children of the
+            # cell on that side are tested instead
+            has_cells = np.searchsorted(starts, neighbours, side='left') < \
+                np.searchsorted(starts, self.dggs.get_key_range_end(neighbours), side='right')
+            on_perimeter[owners[~inside & ~has_cells]] = True
+            partial = ~inside & has_cells & ~on_perimeter[owners]
+            keys, owners, sides = keys[partial], owners[partial], sides[partial]
+            keys = self.dggs.get_children_keys(keys)[np.arange(len(keys))[:, None], sides_children[sides]].ravel()
+            owners = np.repeat(owners, n)
+            sides = np.repeat(sides, n)
+        return [self.dggs.get_cell_from_key(key) for key in starts[on_perimeter]]
+
+    def uncompact_keys(self, refinement, chunk_size=2 ** 20):
+        """
+        :param refinement: refinement of the cells, at least the maximum refinement of the boundary
+        :param chunk_size: maximum number of keys of each array
+        :return: generator of arrays with the packed 64-bit keys of the cells of that refinement that are inside the
+        area of the boundary, in order. Only one array is in memory at a time.
+        """
+        starts, _ = self.get_cell_ranges()
+        if len(starts) > 0 and self.dggs.get_key_refinements(starts).max() > refinement:
+            raise ValueError('The boundary has cells of a larger refinement than ' + str(refinement))
+        return self.dggs.iter_descendant_keys(starts, refinement, chunk_size=chunk_size)
+
+    def uncompact(self, refinement, chunk_size=2 ** 20):
+        """
+        :param refinement: refinement of the cells, at least the maximum refinement of the boundary
+        :param chunk_size: maximum number of cells that are decoded at a time
+        :return: generator of the cells (CellID) of that refinement that are inside the area of the boundary, in order
+        """
+        for keys in self.uncompact_keys(refinement, chunk_size=chunk_size):
+            for value in self.dggs.get_cells_from_keys(keys):
+                yield CellID(str(value))
+
+    def union(self, boundary):
+        """
+        :param boundary: Boundary or OptimalBoundary
+        :return: OptimalBoundary with the area of both boundaries
+        """
+        return OptimalBoundary(cells=self.dggs.cells_union(self.cells, boundary.cells), dggs=self.dggs)
+
+    def intersection(self, boundary):
+        """
+        :param boundary: Boundary or OptimalBoundary
+        :return: OptimalBoundary with the area common to both boundaries
+        """
+        return OptimalBoundary(cells=self.dggs.cells_intersection(self.cells, boundary.cells), dggs=self.dggs)
+
+    def difference(self, boundary):
+        """
+        :param boundary: Boundary or OptimalBoundary
+        :return: OptimalBoundary with the area of this boundary that is not in the other one
+        """
+        return OptimalBoundary(cells=self.dggs.cells_difference(self.cells, boundary.cells), dggs=self.dggs)
+
+    def symmetric_difference(self, boundary):
+        """
+        :param boundary: Boundary or OptimalBoundary
+        :return: OptimalBoundary with the area that is only in one of the boundaries
+        """
+        return OptimalBoundary(cells=self.dggs.cells_symmetric_difference(self.cells, boundary.cells),
+                               dggs=self.dggs)
 
     def get_projected_coordinates(self):
         """
@@ -135,32 +336,14 @@ class Boundary:
         :return: list of geodetic coordinates of the vertices of each cell of the boundary
         (upper left, upper right, lower left, lower right, nucleus)
         """
-        gC = []
-        for cell in self.cells:
-            gC.append(self.dggs.get_cell_geodetic_coordinates(cell))
-        return gC
+        gC = self.dggs.get_cells_geodetic_coordinates(self.cells)
+        return [[tuple(coord) for coord in cell_coords] for cell_coords in gC.tolist()]
 
     def get_limit_cells(self):
         """
         :return: Top cell, bottom cell, leftmost cell, and rightmost cell
         """
-        top_cell = self.cells[0]
-        bottom_cell = self.cells[0]
-        for cell in self.cells:
-            if self.dggs.up(cell, top_cell):
-                top_cell = cell
-            if self.dggs.down(cell, bottom_cell):
-                bottom_cell = cell
-
-        left_cell = self.cells[0]
-        right_cell = self.cells[0]
-        for cell in self.cells:
-            if self.dggs.left(cell, left_cell):
-                left_cell = cell
-            if self.dggs.right(cell, right_cell):
-                right_cell = cell
-
-        return top_cell, bottom_cell, left_cell, right_cell
+        return self.dggs.get_limit_cells(self.cells)
 
     def get_bbox(self):
         """
@@ -173,86 +356,78 @@ class Boundary:
         If the boundary is made up of more than one cell, it calculates the upper left
         and lower right vertex of the bbox from the upper left and lower right cells
         respectively.
-        """
-        if len(self.cells) == 1:
-            ul = self.dggs.get_cell_projected_coordinates(self.cells[0])[0]
-            dr = self.dggs.get_cell_projected_coordinates(self.cells[0])[3]
-            bounds = [ul, dr]
-            bbox_bounds = self.dggs.get_geodetic_coordinates_from_bbox(
-                [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                 [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]])
-        else:
-            top_cell, below_cell, left_cell, right_cell = self.get_limit_cells()
-
-            if top_cell == left_cell:
-                ul = self.dggs.get_cell_projected_coordinates(top_cell)[0]
-            else:
-                ul = (self.dggs.get_cell_projected_coordinates(left_cell)[0][0],
-                      self.dggs.get_cell_projected_coordinates(top_cell)[0][1])
-
-            if below_cell == right_cell:
-                dr = self.dggs.get_cell_projected_coordinates(below_cell)[3]
-            else:
-                dr = (self.dggs.get_cell_projected_coordinates(right_cell)[3][0],
-                      self.dggs.get_cell_projected_coordinates(below_cell)[3][1])
 
-            bounds = [ul, dr]
-            bbox_bounds = [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                           [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]]
-
-            if self.dggs.check_bounds(bbox_bounds):
-                bbox_bounds = self.dggs.get_geodetic_coordinates_from_bbox(bbox_bounds)
-            else:
-                up = -90
-                left = 180
-                down = 90
-                right = -180
-                for cell in [top_cell, left_cell, below_cell, right_cell]:
-                    cell_coords = self.dggs.get_cell_geodetic_coordinates(cell)
-                    for coord in cell_coords:
-                        if coord[1] > up:
-                            up = coord[1]
-                        if coord[0] < left:
-                            left = coord[0]
-                        if coord[1] < down:
-                            down = coord[1]
-                        if coord[0] > right:
-                            right = coord[0]
-
-                ul = (left, up)
-                dr = (right, down)
-                bounds = [ul, dr]
-                bbox_bounds = [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                               [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]]
-
-        return [[bbox_bounds[2], bbox_bounds[3],
-                 bbox_bounds[1], bbox_bounds[0],
-                 bbox_bounds[2]]]
+        The bboxes of the latest boundaries are kept by the hash of their identifier, so the same boundary is not
+        computed twice.
+        """
+        key = (self.dggs, hash_id(self.boundary_ID.value))
+        with bbox_cache_lock:
+            bbox = bbox_cache.get(key)
+            if bbox is not None:
+                bbox_cache.move_to_end(key)
+        if bbox is None:
+            # The bbox is computed without the lock, another thread may store the same one meanwhile
+            bbox = self.dggs.get_cells_bbox(self.cells)
+            with bbox_cache_lock:
+                bbox_cache[key] = bbox
+                if len(bbox_cache) > bbox_cache_size:
+                    bbox_cache.popitem(last=False)
+        # A copy, so that the cached bbox cannot be modified
+        return [[list(vertex) for vertex in ring] for ring in bbox]
 
 
 class OptimalBoundary(Boundary):
-    def __init__(self, boundary_ID=None, cells=None, dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, boundary_ID=None, cells=None, dggs=None):
         """
         :param boundary_ID: boundary identifier, as defined in the AGILE19 paper, of type AUID
-        :param cells: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ]
+        :param cells: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ],
+        or CellIDArray
         :param dggs: Discrete Global Grid System, rHEALPix by default
         """
         self.boundary_ID = boundary_ID
+        # The cells are decoded from the AUID, or from the CellIDArray, the first time they are used
         self.cells = cells
         self.optimal = True
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
 
         assert boundary_ID is not None or cells is not None
 
-        if cells is None:
-            cells = bp_auid_to_cuids(boundary_ID.value, pars="()", with_opening_par=False)
-            self.cells = []
-            for cell in cells:
-                self.cells.append(CellID(cell))
-        if boundary_ID is None:
+        if isinstance(cells, CellIDArray):
+            # The packed keys are already sorted and unique
+            self.cells = None
+            self.cell_array = cells
+            if boundary_ID is None:
+                auid_bp, _, _ = encode_bp_auid(cells.get_values().tolist(), pars="()", with_opening_par=False,
+                                               is_sorted=True)
+                self.boundary_ID = AUID(auid_bp)
+        elif boundary_ID is None:
+            # The cells are kept in the order of the AUID
+            self.cells = sorted(set(self.cells))
             cuids = [cell.value for cell in self.cells]
-            auid_bp, _, _, _, _ = cuids_to_bp_auid(cuids, pars="()", with_opening_par=False)
+            auid_bp, _, _ = encode_bp_auid(cuids, pars="()", with_opening_par=False, is_sorted=True)
             self.boundary_ID = AUID(auid_bp)
+        self.AUID_positions = None
+        self.cell_ranges = None
+
+    @property
+    def cells(self):
+        """
+        :return: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ], in order
+        """
+        if self._cells is None:
+            if self.cell_array is not None:
+                self._cells = self.cell_array.get_cells()
+            else:
+                cells = iter_bp_auid_cuids(self.boundary_ID.value, pars="()", with_opening_par=False)
+                self._cells = [CellID(cell) for cell in cells]
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells):
+        self._cells = cells
+        self.cell_array = None
 
     def optimize(self):
         """
@@ -260,8 +435,181 @@ class OptimalBoundary(Boundary):
         """
         return self
 
+    def get_AUID_positions(self):
+        """
+        :return: NumPy array with the position in the AUID of the NIL terminator of each cell, in order.
+        The part of the AUID of a cell goes from the terminator of the previous cell to its own terminator.
+        """
+        if self.AUID_positions is None:
+            auid = np.frombuffer(self.boundary_ID.value.encode('ascii'), dtype=np.uint8)
+            self.AUID_positions = np.flatnonzero(auid == ord('$'))
+        return self.AUID_positions
+
+    def get_cells_range(self, cell):
+        """
+        :param cell: cell identifier, of type CellID
+        :return: tuple with the first and last (exclusive) indices of the cells of the boundary that are the cell
+        or its descendants, found by binary search on the keys of the cells
+        """
+        keys, _ = self.get_cell_ranges()
+        key = self.dggs.get_cell_keys([cell])
+        start = np.searchsorted(keys, key[0], side='left')
+        end = np.searchsorted(keys, self.dggs.get_key_range_end(key)[0], side='right')
+        return int(start), int(end)
+
+    def replace_cells(self, start, end, cells):
+        """
+        :param start: index of the first cell of the boundary that is replaced
+        :param end: index of the last cell of the boundary that is replaced (exclusive)
+        :param cells: sorted list of cells (CellID) that replace them, all of them between the cells before start
+        and after end
+        :return: OptimalBoundary where the cells have been replaced. Only the part of the AUID between the cell before
+        start and the cell at end is encoded again, the rest is copied.
+        """
+        return self.replace_cell_ranges([(start, end, cells)])
+
+    def replace_cell_ranges(self, replacements):
+        """
+        :param replacements: list of tuples (start, end, cells), sorted by start and without overlapping: the cells
+        of the boundary from index start to index end (exclusive) are replaced by the sorted list of cells (CellID),
+        all of them between the cells before start and after end
+        :return: OptimalBoundary where the cells have been replaced. Only the parts of the AUID around each range are
+        encoded again. The rest of the AUID, the positions of its terminators and the keys of the cells are copied
+        once for the whole list, and the cells of the new boundary are decoded from the keys when they are used.
+        """
+        # Adjacent ranges are joined, so that the cells around each range are not replaced
+        ranges = []
+        for start, end, cells in replacements:
+            if len(ranges) > 0 and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end, ranges[-1][2] + list(cells))
+            elif start < end or len(cells) > 0:
+                ranges.append((start, end, list(cells)))
+        if len(ranges) == 0:
+            return self
+
+        auid = self.boundary_ID.value
+        positions = self.get_AUID_positions()
+        keys, ends = self.get_cell_ranges()
+        auid_parts, positions_parts, keys_parts, ends_parts = [], [], [], []
+        # Parts of the AUID, positions and keys that are copied next, and the length added to the AUID so far
+        copied, copied_positions, copied_keys, shift = 0, 0, 0, 0
+        for start, end, cells in ranges:
+            values = [cell.value for cell in cells]
+            previous = self.dggs.get_cell_from_key(keys[start - 1]).value if start > 0 else ''
+            following = self.dggs.get_cell_from_key(keys[end]).value if end < len(keys) else None
+            # The segment goes from the terminator of the cell before start to the terminator of the cell at end
+            first = int(positions[start - 1]) + 2 if start > 0 else 1
+            last = int(positions[end]) + 2 if end < len(keys) else len(auid)
+            segment = generate_BP_segment(values, previous, following, pars="()", nil_name="$",
+                                          with_opening_par=False)
+            segment_positions = np.flatnonzero(np.frombuffer(segment.encode('ascii'), dtype=np.uint8) == ord('$'))
+            new_keys = self.dggs.get_cell_keys(values)
+
+            auid_parts += [auid[copied:first], segment]
+            positions_parts += [positions[copied_positions:start] + shift, segment_positions + first + shift]
+            keys_parts += [keys[copied_keys:start], new_keys]
+            ends_parts += [ends[copied_keys:start], self.dggs.get_key_range_end(new_keys)]
+            shift += len(segment) - (last - first)
+            copied, copied_positions, copied_keys = last, end + 1, end
+        auid_parts.append(auid[copied:])
+        positions_parts.append(positions[copied_positions:] + shift)
+        keys_parts.append(keys[copied_keys:])
+        ends_parts.append(ends[copied_keys:])
+
+        keys = np.concatenate(keys_parts)
+        new_boundary = OptimalBoundary(boundary_ID=AUID(''.join(auid_parts)),
+                                       cells=CellIDArray(keys=keys, dggs=self.dggs, is_sorted=True), dggs=self.dggs)
+        new_boundary.AUID_positions = np.concatenate(positions_parts)
+        new_boundary.cell_ranges = (keys, np.concatenate(ends_parts))
+        return new_boundary
+
+    def add_cells(self, cells):
+        """
+        :param cells: list of identifiers of the cells that are added to the area of the boundary, [ CellID ... ]
+        :return: OptimalBoundary with the cells added. The descendants of the added cells in the boundary are removed
+        and the complete groups of sibling cells are replaced by their parent. Each added cell is located by binary
+        search on the keys of the boundary, and all the changes are applied with one call to replace_cell_ranges.
+        The AUID, its positions and the keys are copied once, whatever the number of added cells.
+        """
+        siblings = self.dggs.N_side ** 2
+        max_refinement = self.dggs.key_max_refinement
+        keys, ends = self.get_cell_ranges()
+        added = self.dggs.get_cell_keys(self.dggs.compact(cells))
+        added = added[~self.contains_keys(added)]
+        if len(added) == 0:
+            return self
+
+        # Areas in cells of the largest refinement: cumulative area of the cells of the boundary, and of the added
+        # cells minus the cells of the boundary inside them, which are replaced
+        areas = np.concatenate([[0], np.cumsum(siblings ** (max_refinement - self.dggs.get_key_refinements(keys)))])
+        added_ends = self.dggs.get_key_range_end(added)
+        added_areas = siblings ** (max_refinement - self.dggs.get_key_refinements(added)) - \
+            (areas[np.searchsorted(keys, added_ends, side='right')] - areas[np.searchsorted(keys, added, side='left')])
+        added_areas = np.concatenate([[0], np.cumsum(added_areas)])
+
+        # Merge upwards while the parent is covered by the boundary and the added cells
+        tops = []
+        for key, refinement in zip(added.tolist(), self.dggs.get_key_refinements(added).tolist()):
+            if len(tops) > 0 and key <= self.dggs.get_key_range_end([tops[-1]])[0]:
+                continue
+            top = key
+            while refinement > 0:
+                parent = self.dggs.get_parent_keys([top], refinement - 1)
+                parent_end = self.dggs.get_key_range_end(parent)
+                area = areas[np.searchsorted(keys, parent_end, side='right')] - \
+                    areas[np.searchsorted(keys, parent, side='left')] + \
+                    added_areas[np.searchsorted(added, parent_end, side='right')] - \
+                    added_areas[np.searchsorted(added, parent, side='left')]
+                if area[0] != siblings ** (max_refinement - refinement + 1):
+                    break
+                top, refinement = int(parent[0]), refinement - 1
+            tops.append(top)
+
+        tops = np.array(tops, dtype=np.int64)
+        starts = np.searchsorted(keys, tops, side='left').tolist()
+        stops = np.searchsorted(keys, self.dggs.get_key_range_end(tops), side='right').tolist()
+        return self.replace_cell_ranges([(start, end, [self.dggs.get_cell_from_key(top)])
+                                         for start, end, top in zip(starts, stops, tops)])
+
+    def remove_cells(self, cells):
+        """
+        :param cells: list of identifiers of the cells that are removed from the area of the boundary, [ CellID ... ]
+        :return: OptimalBoundary with the cells removed. The descendants of the removed cells in the boundary are
+        removed and each larger cell of the boundary that contains removed cells is replaced by the smallest set of
+        cells that covers the rest of its area. Each removed cell is located by binary search on the keys of the
+        boundary, and all the changes are applied with one call to replace_cell_ranges.
+        """
+        keys, ends = self.get_cell_ranges()
+        removed = self.dggs.compact(cells)
+        if len(keys) == 0 or len(removed) == 0:
+            return self
+        removed_keys = self.dggs.get_cell_keys(removed)
+        # Index of the cell of the boundary that contains each removed cell, if any
+        owners = np.searchsorted(keys, removed_keys, side='right') - 1
+        contained = (owners >= 0) & (removed_keys <= ends[np.maximum(owners, 0)])
+        starts = np.searchsorted(keys, removed_keys, side='left').tolist()
+        stops = np.searchsorted(keys, self.dggs.get_key_range_end(removed_keys), side='right').tolist()
+
+        replacements = []
+        owned = collections.OrderedDict()
+        for cell, owner, is_contained, start, end in zip(removed, owners.tolist(), contained.tolist(), starts, stops):
+            if is_contained:
+                owned.setdefault(owner, []).append(cell)
+            elif start < end:
+                replacements.append((start, end, []))
+        for owner, owner_cells in owned.items():
+            cell = self.dggs.get_cell_from_key(keys[owner])
+            replacements.append((owner, owner + 1, self.dggs.cells_difference([cell], owner_cells)))
+        replacements.sort(key=lambda replacement: replacement[0])
+        return self.replace_cell_ranges(replacements)
+
     def AUID_to_CUIDs(self):
-        boundary_ID = ''
-        for cell_ID in self.cells:
-            boundary_ID = boundary_ID + cell_ID.value
-        return boundary_ID
+        """
+        :return: string with the concatenated identifiers of the cells, decoded directly from the packed keys or the
+        AUID if the cells have not been used yet
+        """
+        if self._cells is not None:
+            return ''.join(cell_ID.value for cell_ID in self._cells)
+        if self.cell_array is not None:
+            return ''.join(self.cell_array.get_values().tolist())
+        return ''.join(iter_bp_auid_cuids(self.boundary_ID.value, pars="()", with_opening_par=False))
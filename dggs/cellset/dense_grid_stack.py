@@ -0,0 +1,395 @@
+import numpy as np
+
+from dggs.cell_ID import CellID
+from dggs.rHealPix import get_rHEALPix
+
+
+def grow_raster(raster, axis):
+    """
+    :param raster: boolean NumPy array
+    :param axis: 0 to grow along the columns (up and down) or 1 to grow along the rows (left and right)
+    :return: boolean array, True for the cells of the raster and their two neighbours along the axis
+    """
+    grown = raster.copy()
+    if axis == 0:
+        grown[1:, :] |= raster[:-1, :]
+        grown[:-1, :] |= raster[1:, :]
+    else:
+        grown[:, 1:] |= raster[:, :-1]
+        grown[:, :-1] |= raster[:, 1:]
+    return grown
+
+
+def shrink_raster(raster, axis):
+    """
+    :param raster: boolean NumPy array
+    :param axis: 0 to shrink along the columns (up and down) or 1 to shrink along the rows (left and right)
+    :return: boolean array, True for the cells of the raster whose two neighbours along the axis are in the raster.
+    The cells outside of the raster are False.
+    """
+    shrunk = raster.copy()
+    if axis == 0:
+        shrunk[1:, :] &= raster[:-1, :]
+        shrunk[:-1, :] &= raster[1:, :]
+        shrunk[[0, -1], :] = False
+    else:
+        shrunk[:, 1:] &= raster[:, :-1]
+        shrunk[:, :-1] &= raster[:, 1:]
+        shrunk[:, [0, -1]] = False
+    return shrunk
+
+
+def crop_raster(raster, offset):
+    """
+    :param raster: boolean NumPy array
+    :param offset: tuple with the absolute row and column of the first cell of the raster
+    :return: tuple with the smallest part of the raster that has all its True cells, and its offset. An empty raster
+    has shape (0, 0) and offset (0, 0).
+    """
+    rows = np.flatnonzero(raster.any(axis=1))
+    if len(rows) == 0:
+        return np.zeros((0, 0), dtype=bool), (0, 0)
+    cols = np.flatnonzero(raster.any(axis=0))
+    return raster[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], (offset[0] + int(rows[0]), offset[1] + int(cols[0]))
+
+
+class DenseGridStack:
+    """
+    Set of cells inside one cell of refinement 0, stored as one dense boolean raster per refinement. The raster of
+    refinement r is a window of the N_side ** r rows and columns of the cells of that refinement inside the cell of
+    refinement 0: it covers the bbox of the cells of that refinement in the set, starting at an absolute row and
+    column (its offset), and it is True for the cells of that refinement that are in the set.
+    Set algebra and morphological operations are array operations on rasters of the largest refinement, over a
+    window that covers both sets.
+    """
+
+    def __init__(self, cell_R0, grids, dggs=None, offsets=None):
+        """
+        :param cell_R0: cell of refinement 0 that contains the cells, of type CellID
+        :param grids: list of boolean NumPy arrays, one per refinement from 0 to the largest refinement of the cells
+        :param dggs: Discrete Global Grid System, rHEALPix by default
+        :param offsets: list of tuples with the absolute row and column of the first cell of each grid, by default
+        (0, 0) for every grid, that is, grids of all the cells of their refinement
+        """
+        if dggs is None:
+            dggs = get_rHEALPix()
+        self.dggs = dggs
+        self.cell_R0 = cell_R0
+        self.c0 = dggs.cells_R0.index(cell_R0.value)
+        if offsets is None:
+            offsets = [(0, 0)] * len(grids)
+
+        for refinement, (grid, (row, col)) in enumerate(zip(grids, offsets)):
+            assert 0 <= row and row + grid.shape[0] <= dggs.N_side ** refinement
+            assert 0 <= col and col + grid.shape[1] <= dggs.N_side ** refinement
+        self.grids = grids
+        self.offsets = offsets
+
+    @classmethod
+    def from_keys(cls, keys, refinement=None, dggs=None):
+        """
+        :param keys: array of packed 64-bit keys of cells of the same cell of refinement 0
+        :param refinement: largest refinement of the rasters, by default the largest refinement of the cells
+        :param dggs: Discrete Global Grid System, rHEALPix by default
+        :return: DenseGridStack with the cells. The grid of each refinement covers the bbox of the cells of that
+        refinement.
+        """
+        if dggs is None:
+            dggs = get_rHEALPix()
+        c0, refinements, rows, cols = dggs.get_rowcol_from_keys(keys)
+        if len(c0) == 0:
+            raise ValueError('A DenseGridStack needs at least one cell')
+        if np.any(c0 != c0[0]):
+            raise ValueError('The cells of a DenseGridStack must be inside the same cell of refinement 0')
+        if refinement is None:
+            refinement = int(refinements.max())
+        elif refinement < refinements.max():
+            raise ValueError('The cells have a larger refinement than ' + str(refinement))
+
+        grids, offsets = [], []
+        for grid_refinement in range(refinement + 1):
+            in_grid = refinements == grid_refinement
+            if not np.any(in_grid):
+                grids.append(np.zeros((0, 0), dtype=bool))
+                offsets.append((0, 0))
+                continue
+            grid_rows, grid_cols = rows[in_grid], cols[in_grid]
+            row, col = int(grid_rows.min()), int(grid_cols.min())
+            grid = np.zeros((int(grid_rows.max()) - row + 1, int(grid_cols.max()) - col + 1), dtype=bool)
+            grid[grid_rows - row, grid_cols - col] = True
+            grids.append(grid)
+            offsets.append((row, col))
+        return cls(CellID(dggs.cells_R0[int(c0[0])]), grids, dggs=dggs, offsets=offsets)
+
+    @classmethod
+    def from_cells(cls, cells, refinement=None, dggs=None):
+        """
+        :param cells: list of identifiers of cells of the same cell of refinement 0, [ CellID, CellID ... ]
+        :param refinement: largest refinement of the rasters, by default the largest refinement of the cells
+        :param dggs: Discrete Global Grid System, rHEALPix by default
+        :return: DenseGridStack with the cells
+        """
+        if dggs is None:
+            dggs = get_rHEALPix()
+        return cls.from_keys(dggs.get_cell_keys(cells), refinement=refinement, dggs=dggs)
+
+    @classmethod
+    def from_boundary(cls, boundary, refinement=None):
+        """
+        :param boundary: Boundary or OptimalBoundary inside one cell of refinement 0
+        :param refinement: largest refinement of the rasters, by default the largest refinement of the boundary
+        :return: DenseGridStack with the compacted cells of the boundary
+        """
+        keys, _ = boundary.get_cell_ranges()
+        return cls.from_keys(keys, refinement=refinement, dggs=boundary.dggs)
+
+    @classmethod
+    def from_raster(cls, cell_R0, raster, dggs=None, refinement=None, offset=(0, 0)):
+        """
+        :param cell_R0: cell of refinement 0 that contains the cells, of type CellID
+        :param raster: boolean NumPy array, True for the cells of refinement r in the set
+        :param dggs: Discrete Global Grid System, rHEALPix by default
+        :param refinement: refinement r of the cells of the raster, by default the one of a raster of all the cells of
+        the cell of refinement 0 (N_side ** r rows)
+        :param offset: tuple with the absolute row and column of the first cell of the raster
+        :return: DenseGridStack with the compacted cells of the raster: complete groups of sibling cells are stored as
+        their parent, recursively
+        """
+        if dggs is None:
+            dggs = get_rHEALPix()
+        n = dggs.N_side
+        if refinement is None:
+            refinement = int(round(np.log(max(raster.shape[0], 1)) / np.log(n)))
+        # Rasters of the cells that are completely inside the set, from the largest refinement to refinement 0. Each
+        # raster is padded with False up to whole groups of sibling cells before finding their parents.
+        full = [crop_raster(np.asarray(raster, dtype=bool), offset)]
+        for _ in range(refinement):
+            children, (row, col) = full[-1]
+            top, left = row % n, col % n
+            children = np.pad(children, ((top, -(row + children.shape[0]) % n), (left, -(col + children.shape[1]) % n)))
+            rows, cols = children.shape[0] // n, children.shape[1] // n
+            children = children.reshape(rows, n, cols, n)
+            parents = np.ones((rows, cols), dtype=bool)
+            # A strided view per child is faster than reducing over the axes of the children
+            for child_row in range(n):
+                for child_col in range(n):
+                    parents &= children[:, child_row, :, child_col]
+            full.append(crop_raster(parents, ((row - top) // n, (col - left) // n)))
+        full.reverse()
+
+        grids, offsets = [full[0][0]], [full[0][1]]
+        for grid_refinement in range(1, len(full)):
+            grid, (row, col) = full[grid_refinement]
+            parents, (parent_row, parent_col) = full[grid_refinement - 1]
+            # The children of complete parents are already stored as their parent
+            rows = np.arange(row, row + grid.shape[0]) // n - parent_row
+            cols = np.arange(col, col + grid.shape[1]) // n - parent_col
+            in_rows = (rows >= 0) & (rows < parents.shape[0])
+            in_cols = (cols >= 0) & (cols < parents.shape[1])
+            covered = np.zeros(grid.shape, dtype=bool)
+            covered[np.ix_(in_rows, in_cols)] = parents[np.ix_(rows[in_rows], cols[in_cols])]
+            grid, (row, col) = crop_raster(grid & ~covered, (row, col))
+            grids.append(grid)
+            offsets.append((row, col))
+        return cls(cell_R0, grids, dggs=dggs, offsets=offsets)
+
+    def get_max_refinement(self):
+        """
+        :return: integer that represents the largest refinement of the rasters
+        """
+        return len(self.grids) - 1
+
+    def get_window(self, refinement=None):
+        """
+        :param refinement: refinement of the cells, at least the largest refinement of the rasters (by default)
+        :return: tuple with the absolute row and column of the first cell and the number of rows and columns of the
+        bbox of the set in cells of that refinement, (0, 0, 0, 0) for an empty set
+        """
+        if refinement is None:
+            refinement = self.get_max_refinement()
+        first_row = first_col = self.dggs.N_side ** refinement
+        last_row = last_col = 0
+        for grid_refinement, (grid, (row, col)) in enumerate(zip(self.grids, self.offsets)):
+            if grid.size == 0:
+                continue
+            scale = self.dggs.N_side ** (refinement - grid_refinement)
+            first_row, first_col = min(first_row, row * scale), min(first_col, col * scale)
+            last_row = max(last_row, (row + grid.shape[0]) * scale)
+            last_col = max(last_col, (col + grid.shape[1]) * scale)
+        if last_row == 0:
+            return 0, 0, 0, 0
+        return first_row, first_col, last_row - first_row, last_col - first_col
+
+    def get_raster(self, refinement=None, window=None):
+        """
+        :param refinement: refinement of the raster, at least the largest refinement of the rasters (by default)
+        :param window: tuple with the absolute row and column of the first cell and the number of rows and columns of
+        the raster, by default the bbox of the set (see get_window)
+        :return: boolean NumPy array, True for the cells of that refinement in the window that are inside the area of
+        the set
+        """
+        if refinement is None:
+            refinement = self.get_max_refinement()
+        if refinement < self.get_max_refinement():
+            raise ValueError('The rasters have a larger refinement than ' + str(refinement))
+        if window is None:
+            window = self.get_window(refinement)
+        first_row, first_col, rows, cols = window
+        raster = np.zeros((rows, cols), dtype=bool)
+        for grid_refinement, (grid, (row, col)) in enumerate(zip(self.grids, self.offsets)):
+            scale = self.dggs.N_side ** (refinement - grid_refinement)
+            # Part of the window covered by the grid, and the cell of the grid of each of its rows and columns
+            start_row, end_row = max(row * scale, first_row), min((row + grid.shape[0]) * scale, first_row + rows)
+            start_col, end_col = max(col * scale, first_col), min((col + grid.shape[1]) * scale, first_col + cols)
+            if start_row >= end_row or start_col >= end_col:
+                continue
+            grid_rows = np.arange(start_row, end_row) // scale - row
+            grid_cols = np.arange(start_col, end_col) // scale - col
+            raster[start_row - first_row:end_row - first_row, start_col - first_col:end_col - first_col] |= \
+                grid[np.ix_(grid_rows, grid_cols)]
+        return raster
+
+    def get_keys(self):
+        """
+        :return: sorted array with the packed 64-bit keys of the cells of the set
+        """
+        keys = []
+        for refinement, (grid, (row, col)) in enumerate(zip(self.grids, self.offsets)):
+            rows, cols = np.nonzero(grid)
+            keys.append(self.dggs.get_keys_from_rowcol(np.full(len(rows), self.c0), np.full(len(rows), refinement),
+                                                       rows + row, cols + col))
+        return np.sort(np.concatenate(keys))
+
+    def get_cells(self):
+        """
+        :return: sorted list of the cells (CellID) of the set
+        """
+        return [CellID(str(value)) for value in self.dggs.get_cells_from_keys(self.get_keys())]
+
+    def cell_count(self, refinement=None):
+        """
+        :param refinement: refinement of the cells, at least the largest refinement of the rasters, or None
+        :return: number of cells of that refinement that are inside the area of the set, or the number of cells of
+        the set if the refinement is None
+        """
+        if refinement is None:
+            return sum(int(np.count_nonzero(grid)) for grid in self.grids)
+        if refinement < self.get_max_refinement():
+            raise ValueError('The rasters have a larger refinement than ' + str(refinement))
+        scale = self.dggs.N_side ** (2 * (refinement - self.get_max_refinement()))
+        return int(np.count_nonzero(self.get_raster())) * scale
+
+    def to_boundary(self):
+        """
+        :return: OptimalBoundary with the compacted cells of the set
+        """
+        from dggs.cellset.boundary import OptimalBoundary
+
+        return OptimalBoundary(cells=self.create_from_raster(self.get_raster(), self.get_window()).get_cells(),
+                               dggs=self.dggs)
+
+    def create_from_raster(self, raster, window, refinement=None):
+        """
+        :param raster: boolean NumPy array, True for the cells of the window that are in the set
+        :param window: tuple with the absolute row and column of the first cell and the number of rows and columns of
+        the raster
+        :param refinement: refinement of the cells of the raster, by default the largest refinement of the rasters
+        :return: DenseGridStack of the same cell of refinement 0 with the compacted cells of the raster
+        """
+        if refinement is None:
+            refinement = self.get_max_refinement()
+        return DenseGridStack.from_raster(self.cell_R0, raster, dggs=self.dggs, refinement=refinement,
+                                          offset=window[:2])
+
+    def get_rasters(self, other):
+        """
+        :param other: DenseGridStack of the same cell of refinement 0
+        :return: tuple with the rasters of both sets at the largest refinement of the two, aligned over a window that
+        covers both sets, the refinement and the window
+        """
+        if self.cell_R0 != other.cell_R0:
+            raise ValueError('The sets are in different cells of refinement 0')
+        refinement = max(self.get_max_refinement(), other.get_max_refinement())
+        windows = [window for window in (self.get_window(refinement), other.get_window(refinement))
+                   if window[2] > 0]
+        if len(windows) == 0:
+            window = (0, 0, 0, 0)
+        else:
+            first_row = min(window[0] for window in windows)
+            first_col = min(window[1] for window in windows)
+            window = (first_row, first_col, max(window[0] + window[2] for window in windows) - first_row,
+                      max(window[1] + window[3] for window in windows) - first_col)
+        return self.get_raster(refinement, window), other.get_raster(refinement, window), refinement, window
+
+    def union(self, other):
+        """
+        :param other: DenseGridStack of the same cell of refinement 0
+        :return: DenseGridStack with the area of both sets
+        """
+        raster, other_raster, refinement, window = self.get_rasters(other)
+        return self.create_from_raster(raster | other_raster, window, refinement)
+
+    def intersection(self, other):
+        """
+        :param other: DenseGridStack of the same cell of refinement 0
+        :return: DenseGridStack with the area that the two sets have in common
+        """
+        raster, other_raster, refinement, window = self.get_rasters(other)
+        return self.create_from_raster(raster & other_raster, window, refinement)
+
+    def difference(self, other):
+        """
+        :param other: DenseGridStack of the same cell of refinement 0
+        :return: DenseGridStack with the area of this set that is not in the other
+        """
+        raster, other_raster, refinement, window = self.get_rasters(other)
+        return self.create_from_raster(raster & ~other_raster, window, refinement)
+
+    def symmetric_difference(self, other):
+        """
+        :param other: DenseGridStack of the same cell of refinement 0
+        :return: DenseGridStack with the area that is in only one of the two sets
+        """
+        raster, other_raster, refinement, window = self.get_rasters(other)
+        return self.create_from_raster(raster ^ other_raster, window, refinement)
+
+    def dilate(self, iterations=1, diagonals=True):
+        """
+        :param iterations: number of times that the set grows by one cell of the largest refinement
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: DenseGridStack with the cells of the set and their neighbours. The set does not grow into other
+        cells of refinement 0.
+        """
+        # The window grows by one cell on each side per iteration, up to the sides of the cell of refinement 0
+        size = self.dggs.N_side ** self.get_max_refinement()
+        row, col, rows, cols = self.get_window()
+        first_row, first_col = max(row - iterations, 0), max(col - iterations, 0)
+        window = (first_row, first_col, min(row + rows + iterations, size) - first_row,
+                  min(col + cols + iterations, size) - first_col)
+        raster = self.get_raster(window=window)
+        for _ in range(iterations):
+            if diagonals:
+                # The neighbourhood of 3 x 3 cells is the neighbourhood of the rows of the neighbourhood of the columns
+                raster = grow_raster(grow_raster(raster, 0), 1)
+            else:
+                raster = grow_raster(raster, 0) | grow_raster(raster, 1)
+        return self.create_from_raster(raster, window)
+
+    def erode(self, iterations=1, diagonals=True):
+        """
+        :param iterations: number of times that the set shrinks by one cell of the largest refinement
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: DenseGridStack with the cells of the set whose neighbours are all in the set. The cells of other
+        cells of refinement 0 are considered outside of the set.
+        """
+        # The cells around the window are outside of the set
+        window = self.get_window()
+        raster = self.get_raster(window=window)
+        for _ in range(iterations):
+            if raster.size == 0:
+                break
+            if diagonals:
+                raster = shrink_raster(shrink_raster(raster, 0), 1)
+            else:
+                raster = shrink_raster(raster, 0) & shrink_raster(raster, 1)
+        return self.create_from_raster(raster, window)
@@ -1,13 +1,10 @@
-import networkx as nx
-
 from dggs.boundary_ID import BoundaryID
 from dggs.cell_ID import CellID
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class Grid:
-    def __init__(self, refinement_level, boundary_ID=None, cells=None,
-                 dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, refinement_level, boundary_ID=None, cells=None, dggs=None):
         """
         :param refinement_level
         :param boundary_ID: boundary identifier, of type BoundaryID
@@ -16,35 +13,19 @@ class Grid:
         """
         self.boundary_ID = boundary_ID
         self.cells = cells
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
         self.refinement_level = refinement_level
 
         assert boundary_ID is not None or cells is not None
 
         if cells is None:
-            cells = []
-            cell_ID = ''
-            first = True
-            for char in boundary_ID.value:
-                if char in self.dggs.cells_R0:
-                    if not first:
-                        cells.append(CellID(cell_ID))
-                    else:
-                        first = False
-                    cell_ID = char
-                else:
-                    cell_ID = cell_ID + char
-            cells.append(CellID(cell_ID))
-            cell_ids = sorted([cell.value for cell in cells])
-            self.cells = [CellID(id) for id in cell_ids]
+            self.cells = [CellID(cell_ID) for cell_ID in self.dggs.split_boundary_ID(boundary_ID.value)]
 
         if boundary_ID is None:
-            cell_ids = sorted([cell.value for cell in cells])
-            self.cells = [CellID(id) for id in cell_ids]
-            boundary_ID = ''
-            for cell_ID in self.cells:
-                boundary_ID = boundary_ID + cell_ID.value
-            self.boundary_ID = BoundaryID(boundary_ID)
+            self.cells = sorted(cells)
+            self.boundary_ID = BoundaryID(''.join(cell_ID.value for cell_ID in self.cells))
 
     def get_refinement_level(self):
         return self.refinement_level
@@ -53,6 +34,8 @@ class Grid:
         """
         :return: prefix tree / trie composed of the identifiers of the boundary cells
         """
+        import networkx as nx
+
         cell_ids = [cell.value for cell in self.cells]
         sorted_cell_ids = sorted(cell_ids)
         t, r = nx.prefix_tree(sorted_cell_ids)  # A Prefix_Tree is essentially another name for a trie
@@ -3,12 +3,12 @@ import json
 from dggs.cellset.boundary import OptimalBoundary
 from dggs.boundary_ID import AUID
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class BoundaryDataSet:
 
-    def __init__(self, id,  boundary_data_set=None, dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, id,  boundary_data_set=None, dggs=None):
         """
         :param id: boundary dataset identifier
         :param boundary_data_set: dictionary with optimal boundary identifier as key
@@ -24,6 +24,8 @@ class BoundaryDataSet:
         if boundary_data_set is None:
             boundary_data_set = {}
         self.boundary_data_set = boundary_data_set
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
 
     def add(self, boundary, data):
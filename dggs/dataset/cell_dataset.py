@@ -2,13 +2,14 @@ import json
 
 from dggs.boundary_ID import BoundaryID
 from dggs.cell_ID import CellID
+from dggs.cell_ID_array import CellIDArray
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class CellDataSet:
 
-    def __init__(self, id, dggs=rHEALPix(N_side=3, north_square=0, south_square=0), cell_data_set=None):
+    def __init__(self, id, dggs=None, cell_data_set=None):
         """
         :param boundary_ID: boundary identifier, of type BoundaryID
         :param cells: list of identifiers of the cells that make up the boundary, [ CellID, CellID ... ]
@@ -20,28 +21,43 @@ class CellDataSet:
         """
         assert id is not None
         self.id = id
-        self.boundary_ID = ''
-        self.cells = []
+        # Sorted cells, boundary identifier and CellIDArray, built the first time they are used after adding cells
+        self._cells = []
+        self._boundary_ID = None
+        self._cell_array = None
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
 
         if cell_data_set is None:
             cell_data_set = {}
         else:
-            cells = []
+            cells = set()
             for id, (cell_id, data) in cell_data_set.items():
-                if cell_id not in self.cells:
-                    cells.append(cell_id)
+                if cell_id not in cells:
+                    cells.add(cell_id)
                 else:
                     print('Cell already exists in this dataset')
-            cell_ids = sorted([cell.value for cell in cells])
-            self.cells = [CellID(id) for id in cell_ids]
-
-            boundary_ID = ''
-            for cell_ID in self.cells:
-                boundary_ID = boundary_ID + cell_ID.value
-            self.boundary_ID = BoundaryID(boundary_ID)
+            self._cells = sorted(cells)
         self.cell_data_set = cell_data_set
 
+    @property
+    def cells(self):
+        """
+        :return: sorted list with all the cells of the set. It is sorted once after adding cells, when it is used.
+        """
+        if self._cells is None:
+            self._cells = sorted(cell_id for cell_id, data in self.cell_data_set.values())
+        return self._cells
+
+    @property
+    def boundary_ID(self):
+        """
+        :return: BoundaryID with the identifiers of all the cells of the set, in order
+        """
+        if self._boundary_ID is None:
+            self._boundary_ID = BoundaryID(''.join(cell_ID.value for cell_ID in self.cells))
+        return self._boundary_ID
 
     def add(self, cell_id, data):
         """
@@ -49,41 +65,42 @@ class CellDataSet:
         :param cell_id: object of type CellID.
         :param data: object of type Data.
         """
-        if cell_id not in self.cells:
-            self.cells.append(cell_id)
-            cell_ids = sorted([cell.value for cell in self.cells])
-            self.cells = [CellID(id) for id in cell_ids]
-
-            boundary_ID = ''
-            for cell_ID in self.cells:
-                boundary_ID = boundary_ID + cell_ID.value
-            self.boundary_ID = BoundaryID(boundary_ID)
-
+        if cell_id.value not in self.cell_data_set:
             self.cell_data_set[cell_id.value] = (cell_id, data)
+            self._cells = None
+            self._boundary_ID = None
+            self._cell_array = None
         else:
             print('Cell already exists in this dataset')
             return -1
 
-    def add_list(self, cell_data_list):
+    def add_list(self, cell_data_list, skip_duplicates=False):
         """
-        Add all pairs (CellID, Data) in a list
+        Add all pairs (CellID, Data) in a list. If a cell is already in the set (or twice in the list), no pair
+        is added, unless skip_duplicates is True.
         :paramcell_data_list: list of cells and associated data tuples
+        :param skip_duplicates: if True, only the pairs of the cells that are already in the set (or earlier in the
+        list) are skipped, and the rest are added, as adding the pairs one by one does
         """
-        for (cell_id, data) in cell_data_list:
-            if cell_id not in self.cells:
-                self.cells.append(cell_id)
-                self.cell_data_set[cell_id.value] = (cell_id, data)
-            else:
-                print('Cell already exists in this dataset')
-                return -1
-
-        cell_ids = sorted([cell.value for cell in self.cells])
-        self.cells = [CellID(id) for id in cell_ids]
+        if skip_duplicates:
+            for (cell_id, data) in cell_data_list:
+                if cell_id.value not in self.cell_data_set:
+                    self.cell_data_set[cell_id.value] = (cell_id, data)
+                else:
+                    print('Cell already exists in this dataset')
+        else:
+            values = set()
+            for (cell_id, data) in cell_data_list:
+                if cell_id.value in self.cell_data_set or cell_id.value in values:
+                    print('Cell already exists in this dataset')
+                    return -1
+                values.add(cell_id.value)
 
-        boundary_ID = ''
-        for cell_ID in self.cells:
-            boundary_ID = boundary_ID + cell_ID.value
-        self.boundary_ID = BoundaryID(boundary_ID)
+            for (cell_id, data) in cell_data_list:
+                self.cell_data_set[cell_id.value] = (cell_id, data)
+        self._cells = None
+        self._boundary_ID = None
+        self._cell_array = None
 
     def get_cells(self):
         """
@@ -91,6 +108,15 @@ class CellDataSet:
         """
         return self.cells
 
+    def get_cell_array(self):
+        """
+        :return: CellIDArray with all the cells of the set. The keys are computed from the identifiers of the set,
+        without sorting the cells.
+        """
+        if self._cell_array is None:
+            self._cell_array = CellIDArray(cells=list(self.cell_data_set), dggs=self.dggs)
+        return self._cell_array
+
     def get_cells_and_data(self):
         """
         :return: list of tuples (CellID, Data) with all the cells and data of the set
@@ -131,7 +157,7 @@ class CellDataSet:
 
     def get_cell_data_list(self, cell_id_list):
         """
-        :param cell_id_list: list of cell identifiers, of type CellID
+        :param cell_id_list: list of cell identifiers, of type CellID, or CellIDArray
         :return: list of data associated with the cells with identifier cell_id
         """
         data_list = []
@@ -151,32 +177,14 @@ class CellDataSet:
         :return: list of geodetic coordinates of the vertices of each cell of the celldataset
         (upper left, upper right, lower left, lower right, nucleus)
         """
-        gC = []
-        for cell in self.cells:
-            gC.append(self.dggs.get_cell_geodetic_coordinates(cell))
-        return gC
+        gC = self.dggs.get_cells_geodetic_coordinates(self.cells)
+        return [[tuple(coord) for coord in cell_coords] for cell_coords in gC.tolist()]
 
     def get_limit_cells(self):
         """
         :return: Top cell, bottom cell, leftmost cell, and rightmost cell
         """
-        top_cell = self.cells[0]
-        bottom_cell = self.cells[0]
-        for cell in self.cells:
-            if self.dggs.up(cell, top_cell):
-                top_cell = cell
-            if self.dggs.down(cell, bottom_cell):
-                bottom_cell = cell
-
-        left_cell = self.cells[0]
-        right_cell = self.cells[0]
-        for cell in self.cells:
-            if self.dggs.left(cell, left_cell):
-                left_cell = cell
-            if self.dggs.right(cell, right_cell):
-                right_cell = cell
-
-        return top_cell, bottom_cell, left_cell, right_cell
+        return self.dggs.get_limit_cells(self.cells)
 
     def get_bbox(self, projected=False):
         """
@@ -184,60 +192,7 @@ class CellDataSet:
         [lower left, lower right, upper right, upper left, lower left]
 
         """
-        if len(self.cells) == 1:
-            ul = self.dggs.get_cell_projected_coordinates(self.cells[0])[0]
-            dr = self.dggs.get_cell_projected_coordinates(self.cells[0])[3]
-            bounds = [ul, dr]
-            bbox_bounds = self.dggs.get_geodetic_coordinates_from_bbox(
-                [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                 [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]])
-        else:
-            top_cell, below_cell, left_cell, right_cell = self.get_limit_cells()
-
-            if top_cell == left_cell:
-                ul = self.dggs.get_cell_projected_coordinates(top_cell)[0]
-            else:
-                ul = (self.dggs.get_cell_projected_coordinates(left_cell)[0][0],
-                      self.dggs.get_cell_projected_coordinates(top_cell)[0][1])
-
-            if below_cell == right_cell:
-                dr = self.dggs.get_cell_projected_coordinates(below_cell)[3]
-            else:
-                dr = (self.dggs.get_cell_projected_coordinates(right_cell)[3][0],
-                      self.dggs.get_cell_projected_coordinates(below_cell)[3][1])
-
-            bounds = [ul, dr]
-            bbox_bounds = [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                           [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]]
-            if not projected:
-                if self.dggs.check_bounds(bbox_bounds):
-                    bbox_bounds = self.dggs.get_geodetic_coordinates_from_bbox(bbox_bounds)
-                else:
-                    up = -90
-                    left = 180
-                    down = 90
-                    right = -180
-                    for cell in [top_cell, left_cell, below_cell, right_cell]:
-                        cell_coords = self.dggs.get_cell_geodetic_coordinates(cell)
-                        for coord in cell_coords:
-                            if coord[1] > up:
-                                up = coord[1]
-                            if coord[0] < left:
-                                left = coord[0]
-                            if coord[1] < down:
-                                down = coord[1]
-                            if coord[0] > right:
-                                right = coord[0]
-
-                    ul = (left, up)
-                    dr = (right, down)
-                    bounds = [ul, dr]
-                    bbox_bounds = [[bounds[0][0], bounds[0][1]], [bounds[1][0], bounds[0][1]],
-                                   [bounds[0][0], bounds[1][1]], [bounds[1][0], bounds[1][1]]]
-
-        return [[bbox_bounds[2], bbox_bounds[3],
-                 bbox_bounds[1], bbox_bounds[0],
-                 bbox_bounds[2]]]
+        return self.dggs.get_cells_bbox(self.cells, projected=projected)
 
     def toJSON(self):
         cell_list = []
@@ -261,7 +216,6 @@ class CellDataSet:
         self.id = cds['id']
         cell_list = cds['cell_data_set']
 
-        for cell in cell_list:
-            self.add(CellID(cell['cellID']), Data(cell['data']))
+        self.add_list([(CellID(cell['cellID']), Data(cell['data'])) for cell in cell_list], skip_duplicates=True)
 
         return self
\ No newline at end of file
@@ -3,10 +3,6 @@ import functools
 import hashlib
 import zlib
 
-import networkx as nx
-from networkx.generators.trees import NIL
-from networkx.utils import generate_unique_node
-
 
 def generate_BP(T, root, pars, root_name, nil_name, with_opening_par):
     """
@@ -18,6 +14,8 @@ def generate_BP(T, root, pars, root_name, nil_name, with_opening_par):
     :param with_opening_par: You can choose if the BP has the opening parentheses or not (boolean). If you choose False
     the source parameter of the nodes of the Tree will be used instead (must be possible).
     """
+    from networkx.generators.trees import NIL
+
     assert (len(pars) == 2)
     assert (len(root_name) == 1)
     assert (len(nil_name) == 1)
@@ -43,6 +41,59 @@ def generate_BP(T, root, pars, root_name, nil_name, with_opening_par):
     return s
 
 
+def generate_BP_from_sorted_cuids(sorted_cuids, pars, root_name, nil_name, with_opening_par):
+    """
+    It returns the same "balanced parenthesis" string as generate_BP for the trie of sorted_cuids, without building
+    the trie: each cuid closes the nodes that it does not share with the previous one (their longest common prefix)
+    and opens its remaining characters, followed by the NIL terminator. The pieces are joined once at the end.
+    :param sorted_cuids: sorted list of unique cell unique identifiers (cuids)
+    :param pars: The style of parentheses can be chosen (a string with two chars, e.g. "()")
+    :param root_name: The root node name can be chosen (string with one char).
+    :param nil_name: The name for the nodes that are the string terminators in the tree/trie (string with one char)
+    :param with_opening_par: You can choose if the BP has the opening parentheses or not (boolean).
+    """
+    assert (len(root_name) == 1)
+
+    pref = pars[0] if with_opening_par else ""
+    return pref + root_name + generate_BP_segment(sorted_cuids, "", None, pars, nil_name, with_opening_par)
+
+
+def generate_BP_segment(sorted_cuids, previous, following, pars, nil_name, with_opening_par):
+    """
+    It returns the part of a "balanced parenthesis" string that encodes sorted_cuids when they follow the cuid previous
+    in the trie, up to the NIL terminator of the cuid following (or up to the end of the string, if it is None).
+    Replacing the part of an AUID between the terminators of previous and following by this string gives the AUID
+    with sorted_cuids between them.
+    :param sorted_cuids: sorted list of unique cell unique identifiers (cuids)
+    :param previous: cuid before sorted_cuids, "" for the beginning of the string
+    :param following: cuid after sorted_cuids, None for the end of the string
+    :param pars: The style of parentheses can be chosen (a string with two chars, e.g. "()")
+    :param nil_name: The name for the nodes that are the string terminators in the tree/trie (string with one char)
+    :param with_opening_par: You can choose if the BP has the opening parentheses or not (boolean).
+    """
+    assert (len(pars) == 2)
+    assert (len(nil_name) == 1)
+
+    pref = pars[0] if with_opening_par else ""
+    nil = pref + nil_name + pars[1]
+    bp = []
+    for cuid in (sorted_cuids if following is None else list(sorted_cuids) + [following]):
+        common = 0
+        length = min(len(previous), len(cuid))
+        while common < length and previous[common] == cuid[common]:
+            common += 1
+        bp.append(pars[1] * (len(previous) - common))
+        if with_opening_par:
+            bp.extend(pref + source for source in cuid[common:])
+        else:
+            bp.append(cuid[common:])
+        bp.append(nil)
+        previous = cuid
+    if following is None:
+        bp.append(pars[1] * (len(previous) + 1))
+    return "".join(bp)
+
+
 def hash_id(id, digest_size=20):
     """
     Takes an id (a string) and returns a blake2b hash with digest_size, encoded as
@@ -71,6 +122,11 @@ def decompress_id_bytes(id_bytes):
 
 
 def bp_auid_to_preffix_tree(bp_auid, pars, nil_name, with_opening_par):
+    # networkx is only imported when a trie is built, as it is slow to import
+    import networkx as nx
+    from networkx.generators.trees import NIL
+    from networkx.utils import generate_unique_node
+
     # Init the tree with its root and the NIL "pseudo-leaf"
     t = nx.DiGraph()
     r = generate_unique_node()
@@ -83,6 +139,9 @@ def bp_auid_to_preffix_tree(bp_auid, pars, nil_name, with_opening_par):
 
 
 def populate_with_bp_auid(bp_auid, pars, nil_name, with_opening_par, t, current_node, going_down):
+    from networkx.generators.trees import NIL
+    from networkx.utils import generate_unique_node
+
     while len(bp_auid) > 0:
         if with_opening_par and bp_auid[0] == pars[0]:
             going_down = True
@@ -117,6 +176,8 @@ def process_node_source(bp_auid, pars, nil_name, node_source):
 
 
 def preffix_tree_to_ids(T, root):
+    from networkx.generators.trees import NIL
+
     ids = []
     for node in T.predecessors(NIL):
         id = ''
@@ -139,6 +200,8 @@ def cuids_to_bp_auid(cuids, pars="{}", root_name="R", nil_name="$", with_opening
     """
     # Sorting the ids is necessary to prevent that for instance ['N21', 'N22'] and ['N22', 'N21'] give
     # different results
+    import networkx as nx
+
     sorted_cuids = sorted(cuids)
     t, r = nx.prefix_tree(sorted_cuids)  # A Prefix_Tree is essentially another name for a trie
     auid = generate_BP(t, r, pars, root_name, nil_name, with_opening_par)
@@ -147,6 +210,22 @@ def cuids_to_bp_auid(cuids, pars="{}", root_name="R", nil_name="$", with_opening
     return (auid, hashed, auid_compressed, t, r)
 
 
+def encode_bp_auid(cuids, pars="{}", root_name="R", nil_name="$", with_opening_par=False, is_sorted=False,
+                   with_hash=False, with_compression=False):
+    """
+    Takes a list of cell unique identifiers (cuids) and returns a tuple with:
+    - The same balanced parenthesis AUID as cuids_to_bp_auid, built in a single pass without a trie
+    - A blake2b hash of that string, only if with_hash (None otherwise)
+    - A compressed version of that string (as a bytes object), only if with_compression (None otherwise)
+    If is_sorted, the cuids must be already sorted and unique (for instance, the cells of an optimal boundary)
+    """
+    sorted_cuids = cuids if is_sorted else sorted(set(cuids))
+    auid = generate_BP_from_sorted_cuids(sorted_cuids, pars, root_name, nil_name, with_opening_par)
+    hashed = hash_id(auid) if with_hash else None
+    auid_compressed = compress_id(auid) if with_compression else None
+    return (auid, hashed, auid_compressed)
+
+
 def cuids_to_concat_auid(cuids):
     """
     Takes a list of cell unique identifiers (cuids) and returns a tuple with:
@@ -161,13 +240,43 @@ def cuids_to_concat_auid(cuids):
     return (auid, hashed, auid_compressed)
 
 
+def iter_bp_auid_cuids(bp_auid, pars="{}", root_name='R', nil_name='$', with_opening_par=True):
+    """
+    Generator of the ids that are encoded in a bp string auid, in a single pass and without building the trie.
+    The sources of the nodes from the root to the current one are kept in a stack, and an id is generated
+    each time a leaf node is closed, so the ids come in the order of the trie (sorted, for the auids built
+    from sorted cuids).
+    """
+    # The part with the root name in the bp_auid is irrelevant: it will always be our
+    # root node in the tree, and it does not change at all the area encoded
+    pref_len = 1 if with_opening_par else 0
+    path = []
+    going_down = False
+    for index in range(len(root_name) + pref_len, len(bp_auid) - 1):
+        char = bp_auid[index]
+        if char == pars[1]:
+            if len(path) == 0:
+                raise ValueError("Parenthesis " + pars + " are not properly balanced in bp_auid")
+            if going_down:
+                # Each leaf of the trie is the end of an id
+                yield "".join(path)
+                going_down = False
+            path.pop()
+        elif with_opening_par and char == pars[0]:
+            going_down = True
+            path.append("")
+        elif with_opening_par:
+            path[-1] += "" if char == nil_name else char
+        else:
+            going_down = True
+            path.append("" if char == nil_name else char)
+    if len(path) > 0:
+        raise ValueError("Parenthesis " + pars + " are not properly balanced in bp_auid")
+
+
 def bp_auid_to_cuids(bp_auid, pars="{}", root_name='R', nil_name='$', with_opening_par=True):
     """
     Takes a string with a bp string auid and returns the list of ids that are encoded
     in that auid.
     """
-    # The part with the root name in the bp_auid is irrelevant: it will always be our
-    # root node (with source None) in the tree, and it does not change at all the area encoded
-    pref_len = 1 if with_opening_par else 0
-    t, r = bp_auid_to_preffix_tree(bp_auid[len(root_name) + pref_len:-1], pars, nil_name, with_opening_par)
-    return preffix_tree_to_ids(t, r)
+    return sorted(iter_bp_auid_cuids(bp_auid, pars, root_name, nil_name, with_opening_par))
@@ -0,0 +1,264 @@
+import struct
+
+import numpy as np
+
+
+class SuccinctAUID:
+    """
+    Binary representation of a balanced parenthesis AUID (see dggs_auids.cuids_to_bp_auid with pars="()" and
+    with_opening_par=False), such as "RN11$))2$)))O0$)))))".
+
+    Each node of the trie is an open parenthesis (bit 1) followed by its children and a close parenthesis (bit 0),
+    so the trie is stored as a bitvector in preorder. The source of each node (the character that opens it in the
+    AUID) is stored as a 4-bit symbol, in the same order as the open bits. The rank of an open bit is the index of
+    the symbol of its node. Ranks and excesses are precomputed by blocks of bits, so the nodes can be navigated
+    without decoding the whole trie.
+    """
+
+    # Symbols of the nodes of the rHEALPix AUIDs: the NIL terminator, the digits and the cells of refinement 0
+    # (the root name, R, is the same symbol as the cell R)
+    default_alphabet = '$012345678NOPQRS'
+
+    # Number of bits of each block of the rank and excess directories
+    block_size = 512
+
+    def __init__(self, bits, symbols, alphabet=default_alphabet, pars="()", nil_name="$"):
+        """
+        :param bits: NumPy array of 0 and 1 with the balanced parenthesis bitvector (1 opens a node and 0 closes it)
+        :param symbols: NumPy array with the index in the alphabet of the source of each node, in preorder
+        :param alphabet: string with the sources of the nodes, at most 16
+        :param pars: string with the two parentheses of the text AUID
+        :param nil_name: name of the nodes that are the string terminators in the trie
+        """
+        assert len(alphabet) <= 16
+        assert len(pars) == 2
+        self.alphabet = alphabet
+        self.pars = pars
+        self.nil_name = nil_name
+        self.nil_symbol = alphabet.index(nil_name)
+
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.symbols = np.asarray(symbols, dtype=np.uint8)
+        assert 2 * len(self.symbols) == len(self.bits)
+
+        # Rank directory: number of open bits before each block, and minimum excess inside each block
+        # (the excess of a position is the number of open minus close bits up to it, inclusive)
+        n_blocks = (len(self.bits) + self.block_size - 1) // self.block_size
+        padded = np.zeros(n_blocks * self.block_size, dtype=np.int64)
+        padded[:len(self.bits)] = 2 * self.bits.astype(np.int64) - 1
+        excess = np.cumsum(padded).reshape(n_blocks, self.block_size)
+        self.block_excess = np.concatenate([[0], excess[:, -1]])[:-1]
+        self.block_min_excess = excess.min(axis=1) if n_blocks > 0 else np.zeros(0, dtype=np.int64)
+        self.block_rank = (np.arange(n_blocks) * self.block_size + self.block_excess) // 2
+
+    @classmethod
+    def from_AUID(cls, auid, alphabet=default_alphabet, pars="()", nil_name="$"):
+        """
+        :param auid: string with a balanced parenthesis AUID, without opening parentheses
+        :param alphabet: string with the sources of the nodes, at most 16
+        :param pars: string with the two parentheses of the text AUID
+        :param nil_name: name of the nodes that are the string terminators in the trie
+        :return: SuccinctAUID with the same trie
+        """
+        chars = np.frombuffer(auid.encode('ascii'), dtype=np.uint8)
+        bits = (chars != ord(pars[1])).astype(np.uint8)
+
+        # Lookup table from the characters to their index in the alphabet
+        table = np.full(256, 255, dtype=np.uint8)
+        table[np.frombuffer(alphabet.encode('ascii'), dtype=np.uint8)] = np.arange(len(alphabet))
+        symbols = table[chars[bits == 1]]
+        if np.any(symbols == 255):
+            raise ValueError("The AUID has characters that are not in the alphabet " + alphabet)
+        if 2 * len(symbols) != len(bits) or (len(bits) > 0 and np.cumsum(2 * bits.astype(np.int64) - 1).min() < 0):
+            raise ValueError("Parenthesis " + pars + " are not properly balanced in the AUID")
+        return cls(bits, symbols, alphabet=alphabet, pars=pars, nil_name=nil_name)
+
+    def to_AUID(self):
+        """
+        :return: string with the balanced parenthesis AUID
+        """
+        chars = np.full(len(self.bits), ord(self.pars[1]), dtype=np.uint8)
+        alphabet = np.frombuffer(self.alphabet.encode('ascii'), dtype=np.uint8)
+        chars[self.bits == 1] = alphabet[self.symbols]
+        return chars.tobytes().decode('ascii')
+
+    @classmethod
+    def from_bytes(cls, data, alphabet=default_alphabet, pars="()", nil_name="$"):
+        """
+        :param data: bytes object created by to_bytes
+        :param alphabet: string with the sources of the nodes, at most 16
+        :param pars: string with the two parentheses of the text AUID
+        :param nil_name: name of the nodes that are the string terminators in the trie
+        :return: SuccinctAUID
+        """
+        n_nodes, = struct.unpack_from('<Q', data)
+        n_bit_bytes = (2 * n_nodes + 7) // 8
+        buffer = np.frombuffer(data, dtype=np.uint8, offset=8)
+        bits = np.unpackbits(buffer[:n_bit_bytes])[:2 * n_nodes]
+        packed_symbols = buffer[n_bit_bytes:]
+        symbols = np.empty(2 * len(packed_symbols), dtype=np.uint8)
+        symbols[0::2] = packed_symbols >> 4
+        symbols[1::2] = packed_symbols & 15
+        return cls(bits, symbols[:n_nodes], alphabet=alphabet, pars=pars, nil_name=nil_name)
+
+    def to_bytes(self):
+        """
+        :return: bytes object with the number of nodes (8 bytes), the bitvector (1 bit per parenthesis) and the
+        symbols of the nodes (4 bits per node)
+        """
+        symbols = self.symbols
+        if len(symbols) % 2 == 1:
+            symbols = np.append(symbols, 0).astype(np.uint8)
+        packed_symbols = (symbols[0::2] << 4) | symbols[1::2]
+        return struct.pack('<Q', len(self.symbols)) + np.packbits(self.bits).tobytes() + packed_symbols.tobytes()
+
+    def __len__(self):
+        """
+        :return: number of parentheses of the AUID
+        """
+        return len(self.bits)
+
+    def __eq__(self, other):
+        if not isinstance(other, SuccinctAUID):
+            return NotImplemented
+        return np.array_equal(self.bits, other.bits) and np.array_equal(self.symbols, other.symbols) and \
+            self.alphabet == other.alphabet
+
+    def rank(self, position):
+        """
+        :param position: position in the bitvector
+        :return: number of open parentheses before the position, that is, the index of the node that it opens
+        """
+        if position >= len(self.bits):
+            return len(self.symbols)
+        block = position // self.block_size
+        start = block * self.block_size
+        return int(self.block_rank[block]) + int(np.count_nonzero(self.bits[start:position]))
+
+    def select(self, index):
+        """
+        :param index: index of a node in preorder, starting at 0
+        :return: position of the open parenthesis of the node in the bitvector
+        """
+        if not 0 <= index < len(self.symbols):
+            raise IndexError("There is no node " + str(index))
+        block = int(np.searchsorted(self.block_rank, index, side='right')) - 1
+        start = block * self.block_size
+        opens = np.flatnonzero(self.bits[start:start + self.block_size])
+        return start + int(opens[index - self.block_rank[block]])
+
+    def excess(self, position):
+        """
+        :param position: position in the bitvector
+        :return: number of open minus close parentheses up to the position, inclusive
+        """
+        return 2 * self.rank(position + 1) - position - 1
+
+    def find_close(self, position):
+        """
+        :param position: position of an open parenthesis
+        :return: position of the parenthesis that closes it
+        """
+        target = self.excess(position) - 1
+        block = position // self.block_size
+        end = (block + 1) * self.block_size
+        excess = target + 1 + np.cumsum(2 * self.bits[position + 1:end].astype(np.int64) - 1)
+        found = np.flatnonzero(excess == target)
+        if len(found) > 0:
+            return position + 1 + int(found[0])
+        # The first block after this one that reaches the excess has the close parenthesis
+        block = block + 1 + int(np.argmax(self.block_min_excess[block + 1:] <= target))
+        start = block * self.block_size
+        excess = self.block_excess[block] + np.cumsum(2 * self.bits[start:start + self.block_size].astype(np.int64) - 1)
+        return start + int(np.flatnonzero(excess == target)[0])
+
+    def get_source(self, position):
+        """
+        :param position: position of an open parenthesis
+        :return: character that is the source of the node opened in that position
+        """
+        return self.alphabet[self.symbols[self.rank(position)]]
+
+    def find_node(self, prefix):
+        """
+        :param prefix: string with a cell identifier (or a prefix of it)
+        :return: tuple with the position of the node of the prefix in the bitvector (or None if the trie does not have
+        it) and a boolean that is True if the prefix or one of its ancestors is an identifier of the AUID
+        """
+        node = 0
+        covered = False
+        for char in prefix:
+            symbol = self.alphabet.find(char)
+            child = node + 1
+            # The NIL terminator, if any, is the first child of a node
+            while child < len(self.bits) and self.bits[child] == 1:
+                child_symbol = self.symbols[self.rank(child)]
+                if child_symbol == symbol:
+                    break
+                if child_symbol == self.nil_symbol:
+                    covered = True
+                child = self.find_close(child) + 1
+            else:
+                return None, covered
+            node = child
+        child = node + 1
+        if child < len(self.bits) and self.bits[child] == 1 and self.symbols[self.rank(child)] == self.nil_symbol:
+            covered = True
+        return node, covered
+
+    def contains(self, cell):
+        """
+        :param cell: cell identifier, of type CellID (or its string value)
+        :return: True if the area of the AUID contains the cell, that is, the cell or one of its ancestors is in
+        the AUID
+        """
+        value = cell if isinstance(cell, str) else cell.value
+        _, covered = self.find_node(value)
+        return covered
+
+    def cells_with_prefix(self, prefix):
+        """
+        :param prefix: string with a cell identifier (or a prefix of it)
+        :return: sorted list with the identifiers of the AUID that start with the prefix; only the nodes under
+        the prefix are decoded
+        """
+        node, _ = self.find_node(prefix)
+        if node is None:
+            return []
+        if node == 0:
+            prefix = ''
+            start, end = 1, len(self.bits) - 1
+        else:
+            start, end = node, self.find_close(node) + 1
+        bits = self.bits[start:end]
+        names = [name if name != self.nil_name else '' for name in self.alphabet]
+        sources = [names[symbol] for symbol in self.symbols[self.rank(start):self.rank(end)].tolist()]
+
+        cells = []
+        path = [prefix[:-1]] if node != 0 else []
+        opened = 0
+        going_down = False
+        for bit in bits.tolist():
+            if bit == 1:
+                path.append(sources[opened])
+                opened += 1
+                going_down = True
+            else:
+                if going_down:
+                    cells.append(''.join(path))
+                    going_down = False
+                path.pop()
+        return cells
+
+    def cell_count(self, prefix=None):
+        """
+        :param prefix: string with a cell identifier (or a prefix of it), None for the whole AUID
+        :return: number of identifiers of the AUID (that start with the prefix)
+        """
+        if prefix is None:
+            return int(np.count_nonzero(self.symbols == self.nil_symbol))
+        node, _ = self.find_node(prefix)
+        if node is None:
+            return 0
+        start, end = (0, len(self.bits)) if node == 0 else (node, self.find_close(node) + 1)
+        return int(np.count_nonzero(self.symbols[self.rank(start):self.rank(end)] == self.nil_symbol))
@@ -1,7 +1,11 @@
+import math
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from dggs.boundary_ID import BoundaryID, AUID
 from dggs.cell_ID import CellID
-from dggs.cellset.boundary import Boundary, OptimalBoundary
+from dggs.cellset import boundary as boundary_module
+from dggs.cellset.boundary import Boundary, OptimalBoundary, bbox_cache
+from dggs.dggs_auids.dggs_auids import hash_id
 
 
 class TestBoundary(unittest.TestCase):
@@ -58,6 +62,14 @@ class TestBoundary(unittest.TestCase):
                          [CellID('N11'), CellID('N12'), CellID('N13'), CellID('N88'), CellID('O0'),
                           CellID('P123'), CellID('S34567')])
 
+    def test_optimal_boundary_lazy_cells(self):
+        optimal_boundary = OptimalBoundary(boundary_ID=AUID('RN11$))2$))3$)))88$))))O0$)))P123$)))))S34567$))))))))'))
+        self.assertEqual(optimal_boundary.AUID_to_CUIDs(), 'N11N12N13N88O0P123S34567')
+        self.assertIsNone(optimal_boundary._cells)
+        self.assertEqual(optimal_boundary.get_max_refinement(), 5)
+        self.assertIs(optimal_boundary.cells, optimal_boundary.cells)
+        self.assertEqual(optimal_boundary.AUID_to_CUIDs(), 'N11N12N13N88O0P123S34567')
+
     def test_optimize_boundary(self):
         boundary = Boundary(boundary_ID=BoundaryID('N11N12N2N3'))
         optimal_boundary = boundary.optimize()
@@ -77,6 +89,141 @@ class TestBoundary(unittest.TestCase):
         self.assertEqual(optimal_boundary.boundary_ID.value, "RN0$))11$)))2$))7$))9878$)))))))")
         self.assertEqual(optimal_boundary.is_optimal(), True)
 
+    def test_optimal_boundary_edit(self):
+        optimal_boundary = Boundary(boundary_ID=BoundaryID('N11N12N2N3P12')).optimize()
+
+        # Siblings are merged into their parent, and the descendants of the added cells are removed
+        boundary = optimal_boundary.add_cells([CellID('N10'), CellID('N13'), CellID('N14'), CellID('N15'),
+                                               CellID('N16'), CellID('N17'), CellID('N18'), CellID('P1')])
+        self.assertEqual(boundary.cells, [CellID('N1'), CellID('N2'), CellID('N3'), CellID('P1')])
+        self.assertEqual(boundary.boundary_ID.value, "RN1$))2$))3$)))P1$))))")
+        self.assertEqual(optimal_boundary.add_cells([CellID('N201')]).boundary_ID.value,
+                         optimal_boundary.boundary_ID.value)
+
+        # Larger cells are split into the siblings of the path to the removed cell
+        boundary = boundary.remove_cells([CellID('N245'), CellID('N3'), CellID('P')])
+        cells = [CellID('N1'), CellID('N20'), CellID('N21'), CellID('N22'), CellID('N23'), CellID('N240'),
+                 CellID('N241'), CellID('N242'), CellID('N243'), CellID('N244'), CellID('N246'), CellID('N247'),
+                 CellID('N248'), CellID('N25'), CellID('N26'), CellID('N27'), CellID('N28')]
+        self.assertEqual(boundary.cells, cells)
+        self.assertEqual(boundary.boundary_ID.value, OptimalBoundary(cells=cells).boundary_ID.value)
+        self.assertEqual(list(boundary.get_AUID_positions()),
+                         list(OptimalBoundary(boundary_ID=boundary.boundary_ID).get_AUID_positions()))
+
+        boundary = boundary.add_cells([CellID('N245'), CellID('N3'), CellID('N4'), CellID('N5'), CellID('N6'),
+                                       CellID('N7'), CellID('N8'), CellID('N0')])
+        self.assertEqual(boundary.boundary_ID.value, "RN$)))")
+        self.assertEqual(boundary.remove_cells([CellID('N')]).boundary_ID.value, "R)")
+
+    def test_optimal_boundary_edit_batch(self):
+        cells = [CellID('N0'), CellID('N11'), CellID('N2'), CellID('O35'), CellID('P'), CellID('S7')]
+        optimal_boundary = OptimalBoundary(cells=cells)
+
+        # Several edits in different subtrees are applied at once, and the keys and positions follow the new AUID
+        added = [CellID('N10'), CellID('N12'), CellID('N13'), CellID('N14'), CellID('N15'), CellID('N16'),
+                 CellID('N17'), CellID('N18'), CellID('O3'), CellID('Q4'), CellID('S70')]
+        boundary = optimal_boundary.add_cells(added)
+        expected = OptimalBoundary(cells=[CellID('N0'), CellID('N1'), CellID('N2'), CellID('O3'), CellID('P'),
+                                          CellID('Q4'), CellID('S7')])
+        self.assertEqual(boundary.boundary_ID.value, expected.boundary_ID.value)
+        self.assertEqual(list(boundary.get_AUID_positions()), list(expected.get_AUID_positions()))
+        self.assertEqual(list(boundary.get_cell_ranges()[0]), list(expected.get_cell_ranges()[0]))
+        self.assertEqual(boundary.cells, expected.cells)
+
+        removed = [CellID('N1'), CellID('O38'), CellID('P44'), CellID('P45'), CellID('Q'), CellID('R')]
+        boundary = boundary.remove_cells(removed)
+        expected = OptimalBoundary(cells=optimal_boundary.dggs.cells_difference(expected.cells, removed))
+        self.assertEqual(boundary.boundary_ID.value, expected.boundary_ID.value)
+        self.assertEqual(list(boundary.get_AUID_positions()), list(expected.get_AUID_positions()))
+        self.assertEqual(boundary.cells, expected.cells)
+        self.assertEqual(boundary.get_cells_range(CellID('P4')), (14, 21))
+
+    def test_set_operations(self):
+        boundary_a = Boundary(boundary_ID=BoundaryID('N1N2O34P'))
+        boundary_b = OptimalBoundary(cells=[CellID('N'), CellID('O3'), CellID('P567')])
+
+        self.assertEqual(boundary_a.union(boundary_b).cells, [CellID('N'), CellID('O3'), CellID('P')])
+        self.assertEqual(boundary_a.intersection(boundary_b).cells,
+                         [CellID('N1'), CellID('N2'), CellID('O34'), CellID('P567')])
+        self.assertEqual(boundary_b.intersection(boundary_a).cells,
+                         [CellID('N1'), CellID('N2'), CellID('O34'), CellID('P567')])
+        self.assertEqual(boundary_a.difference(boundary_b).cells,
+                         [CellID('P0'), CellID('P1'), CellID('P2'), CellID('P3'), CellID('P4'), CellID('P50'),
+                          CellID('P51'), CellID('P52'), CellID('P53'), CellID('P54'), CellID('P55'), CellID('P560'),
+                          CellID('P561'), CellID('P562'), CellID('P563'), CellID('P564'), CellID('P565'),
+                          CellID('P566'), CellID('P568'), CellID('P57'), CellID('P58'), CellID('P6'), CellID('P7'),
+                          CellID('P8')])
+        self.assertEqual(boundary_b.difference(boundary_a).cells,
+                         [CellID('N0'), CellID('N3'), CellID('N4'), CellID('N5'), CellID('N6'), CellID('N7'),
+                          CellID('N8'), CellID('O30'), CellID('O31'), CellID('O32'), CellID('O33'), CellID('O35'),
+                          CellID('O36'), CellID('O37'), CellID('O38')])
+        symmetric_difference = boundary_a.symmetric_difference(boundary_b)
+        self.assertEqual(symmetric_difference.cells,
+                         boundary_a.difference(boundary_b).union(boundary_b.difference(boundary_a)).cells)
+        self.assertEqual(symmetric_difference.is_optimal(), True)
+        self.assertEqual(boundary_a.difference(boundary_a).boundary_ID.value, 'R)')
+
+    def test_contains(self):
+        for boundary in [Boundary(boundary_ID=BoundaryID('N1N12O34P')),
+                         OptimalBoundary(cells=[CellID('N1'), CellID('O34'), CellID('P')])]:
+            self.assertTrue(boundary.contains_cell(CellID('N1')))
+            self.assertTrue(boundary.contains_cell(CellID('N188')))
+            self.assertTrue(boundary.contains_cell(CellID('P0123')))
+            self.assertFalse(boundary.contains_cell(CellID('N')))
+            self.assertFalse(boundary.contains_cell(CellID('N2')))
+            self.assertFalse(boundary.contains_cell(CellID('O3')))
+            self.assertFalse(boundary.contains_cell(CellID('S')))
+            self.assertEqual(list(boundary.contains_cells([CellID('O345'), CellID('O35'), CellID('N0')])),
+                             [True, False, False])
+
+            # P is between longitudes -90 and 0, and O34 is the center of O3, at the west of O
+            self.assertTrue(boundary.contains_point(-45, 10))
+            self.assertTrue(boundary.contains_point(-165, 0))
+            self.assertFalse(boundary.contains_point(-135, 0))
+            self.assertFalse(boundary.contains_point(45, 10))
+            self.assertEqual(list(boundary.contains_points([-45, 45, -165], [-30, -30, 0])), [True, False, True])
+
+        self.assertEqual(list(Boundary(cells=[]).contains_points([0], [0])), [False])
+
+    def test_metrics(self):
+        for boundary in [Boundary(boundary_ID=BoundaryID('N1N12O34P')),
+                         OptimalBoundary(cells=[CellID('N1'), CellID('O34'), CellID('P')])]:
+            self.assertEqual(boundary.cell_count(), 3)
+            self.assertEqual(boundary.cell_count(0), 1)
+            self.assertEqual(boundary.cell_count(1), 1 + 9)
+            self.assertEqual(boundary.cell_count(3), 9 + 9 * 9 + 9 * 9 * 9)
+            self.assertAlmostEqual(boundary.area(), boundary.cell_count(2) * boundary.dggs.cell_area(2))
+        self.assertEqual(Boundary(cells=[]).area(), 0)
+
+        # The whole sphere
+        boundary = Boundary(cells=[CellID(cell) for cell in 'NOPQRS'])
+        self.assertAlmostEqual(boundary.area() / (4 * math.pi * boundary.dggs.R_q ** 2), 1)
+        self.assertEqual(boundary.perimeter_cells(), [])
+
+        # The whole sphere without O44: the cells around O4 are not on the perimeter
+        cells = [CellID(cell) for cell in 'NPQRS'] + [CellID('O' + str(digit)) for digit in '01235678'] + \
+                [CellID('O4' + str(digit)) for digit in '01235678']
+        boundary = Boundary(cells=cells)
+        self.assertEqual(boundary.perimeter_cells(), [CellID('O41'), CellID('O43'), CellID('O45'), CellID('O47')])
+        self.assertEqual(boundary.cell_count(2), 6 * 81 - 1)
+
+        boundary = OptimalBoundary(cells=[CellID('N1'), CellID('O34'), CellID('P')])
+        self.assertEqual(boundary.perimeter_cells(), [CellID('N1'), CellID('O34'), CellID('P')])
+
+    def test_uncompact(self):
+        for boundary in [Boundary(boundary_ID=BoundaryID('N1N12O34P8')),
+                         OptimalBoundary(cells=[CellID('N1'), CellID('O34'), CellID('P8')])]:
+            cells = list(boundary.uncompact(2))
+            self.assertEqual(cells, [CellID('N1' + str(digit)) for digit in range(9)] + [CellID('O34')] +
+                             [CellID('P8' + str(digit)) for digit in range(9)])
+            self.assertEqual(list(boundary.uncompact(3, chunk_size=7)), list(boundary.uncompact(3)))
+
+            chunks = list(boundary.uncompact_keys(3, chunk_size=50))
+            self.assertEqual([len(chunk) for chunk in chunks], [50, 50, 50, 21])
+            self.assertEqual(sum(len(chunk) for chunk in chunks), boundary.cell_count(3))
+            self.assertRaises(ValueError, boundary.uncompact_keys, 1)
+        self.assertEqual(list(Boundary(cells=[]).uncompact(5)), [])
+
     def test_boundary_projected_coordinates(self):
         boundary = Boundary(cells=[CellID('N')])
         a = boundary.get_projected_coordinates()
@@ -237,6 +384,31 @@ class TestBoundary(unittest.TestCase):
                  [1.9224187603958446e-06, -74.4240062287476]]]
         self.assertEqual(boundary.get_bbox(), bbox)
 
+    def test_bbox_cache(self):
+        boundary = Boundary(boundary_ID=BoundaryID('N5P1P2')).optimize()
+        bbox = boundary.get_bbox()
+        self.assertIn((boundary.dggs, hash_id(boundary.boundary_ID.value)), bbox_cache)
+
+        # The bbox of a boundary with the same AUID comes from the cache, without decoding its cells
+        optimal_boundary = OptimalBoundary(boundary_ID=boundary.boundary_ID)
+        bbox[0][0][0] = 0
+        self.assertEqual(optimal_boundary.get_bbox(), Boundary(boundary_ID=BoundaryID('N5P1P2')).get_bbox())
+        self.assertIsNone(optimal_boundary._cells)
+
+        # Several threads share the cache while it is evicting bboxes
+        boundaries = [Boundary(boundary_ID=BoundaryID('N' + str(digit) + 'P' + str(digit))) for digit in range(9)]
+        expected = [boundary.get_bbox() for boundary in boundaries]
+        bbox_cache_size = boundary_module.bbox_cache_size
+        boundary_module.bbox_cache_size = 4
+        bbox_cache.clear()
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                bboxes = list(executor.map(lambda index: boundaries[index % 9].get_bbox(), range(900)))
+        finally:
+            boundary_module.bbox_cache_size = bbox_cache_size
+        self.assertEqual(bboxes, [expected[index % 9] for index in range(900)])
+        self.assertLessEqual(len(bbox_cache), 4)
+
     def test_limit_cells(self):
         boundary = Boundary(cells=[CellID('N1'), CellID('O0'), CellID('P123'), CellID('S34567')])
         top_cell, bottom_cell, left_cell, right_cell = boundary.get_limit_cells()
@@ -1,6 +1,7 @@
 import unittest
 from dggs.cellset.boundary import Boundary
 from dggs.boundary_ID import BoundaryID
+from dggs.cell_ID_array import CellIDArray
 from dggs.dataset.boundary_dataset import BoundaryDataSet
 from dggs.store.boundary_store import BoundaryStore
 from dggs.dataset.data import Data
@@ -45,6 +46,24 @@ class TestBoundaryStore(unittest.TestCase):
         store.dropAll()
 
 
+    def test_cell_array(self):
+        store.dropAll()
+        bds = BoundaryDataSet("id")
+        boundaries = ['O23P12P34S56', 'P10P11P2', 'N0']
+
+        for boundary in boundaries:
+            bds.add(Boundary(cells=CellIDArray(cells=Boundary(boundary_ID=BoundaryID(boundary)).cells)), Data(""))
+        store.insert(bds)
+
+        stored_boundaries = store.query_by_cell_array(CellIDArray(cells=['P2', 'P11', 'P10']))
+        self.assertEqual(len(stored_boundaries), 1)
+        self.assertIsInstance(stored_boundaries[0][0].get_cell_array(), CellIDArray)
+        self.assertEqual(stored_boundaries[0][0].AUID_to_CUIDs(), 'P10P11P2')
+        self.assertEqual(store.get_cell_array("id").get_values().tolist(),
+                         ['N0', 'O23', 'P10', 'P11', 'P12', 'P2', 'P34', 'S56'])
+        store.dropAll()
+
+
     def test_delete_boundary(self):
         store.dropAll()
         bds = BoundaryDataSet("id")
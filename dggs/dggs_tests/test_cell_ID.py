@@ -0,0 +1,34 @@
+import unittest
+from dggs.cell_ID import CellID
+
+
+class TestCellID(unittest.TestCase):
+    def test_equality_and_hash(self):
+        self.assertEqual(CellID('N01'), CellID('N01'))
+        self.assertNotEqual(CellID('N01'), CellID('N02'))
+        self.assertNotEqual(CellID('N01'), None)
+        self.assertNotEqual(CellID('N01'), 'N01')
+        self.assertEqual(len({CellID('N01'), CellID('N01'), CellID('N02')}), 2)
+        self.assertEqual({CellID('N01'): 1}[CellID('N01')], 1)
+
+    def test_ordering(self):
+        cells = [CellID('O'), CellID('N12'), CellID('N1'), CellID('N2'), CellID('S')]
+        self.assertEqual(sorted(cells), [CellID('N1'), CellID('N12'), CellID('N2'), CellID('O'), CellID('S')])
+        self.assertTrue(CellID('N1') < CellID('N12') <= CellID('N12') < CellID('N2'))
+        self.assertEqual(max(cells), CellID('S'))
+
+    def test_slots(self):
+        cell = CellID('N01')
+        self.assertFalse(hasattr(cell, '__dict__'))
+        with self.assertRaises(AttributeError):
+            cell.other = 1
+
+    def test_intern(self):
+        cell = CellID.intern('N01')
+        self.assertIs(CellID.intern('N01'), cell)
+        self.assertEqual(cell, CellID('N01'))
+        self.assertIsNot(CellID.intern('N02'), cell)
+
+
+if __name__ == '__main__':
+    unittest.main()
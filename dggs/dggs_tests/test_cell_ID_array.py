@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+
+from dggs.cell_ID import CellID
+from dggs.cell_ID_array import CellIDArray
+from dggs.cellset.boundary import Boundary, OptimalBoundary
+from dggs.dataset.cell_dataset import CellDataSet
+from dggs.dataset.data import Data
+
+
+class TestCellIDArray(unittest.TestCase):
+
+    def test_cell_array(self):
+        cells = CellIDArray(cells=[CellID('P123'), CellID('N11'), 'O0', CellID('N1'), CellID('N11')])
+        self.assertEqual(len(cells), 4)
+        self.assertEqual(list(cells), [CellID('N1'), CellID('N11'), CellID('O0'), CellID('P123')])
+        self.assertEqual(cells[2], CellID('O0'))
+        self.assertEqual(cells.get_values().tolist(), ['N1', 'N11', 'O0', 'P123'])
+        self.assertEqual(CellIDArray(keys=cells.keys), cells)
+        self.assertEqual(len(CellIDArray()), 0)
+
+    def test_membership(self):
+        cells = CellIDArray(cells=['N1', 'N11', 'O0', 'P123'])
+        self.assertIn(CellID('N11'), cells)
+        self.assertIn('P123', cells)
+        self.assertNotIn(CellID('N12'), cells)
+        self.assertNotIn(CellID('S'), cells)
+        self.assertEqual(cells.contains(['N', 'N1', 'O0', 'P12', 'P123']).tolist(), [False, True, True, False, True])
+        self.assertNotIn(CellID('N'), CellIDArray())
+
+    def test_selection(self):
+        cells = CellIDArray(cells=['N1', 'N11', 'N12', 'N2', 'O0', 'P123'])
+        self.assertEqual(cells.with_refinement(2).get_values().tolist(), ['N11', 'N12'])
+        self.assertEqual(cells.with_prefix(CellID('N1')).get_values().tolist(), ['N1', 'N11', 'N12'])
+        self.assertEqual(cells.with_prefix('N').get_values().tolist(), ['N1', 'N11', 'N12', 'N2'])
+        self.assertEqual(len(cells.with_prefix('Q')), 0)
+
+        view = cells.with_prefix('N1')
+        self.assertTrue(np.shares_memory(view.keys, cells.keys))
+        self.assertTrue(np.shares_memory(cells[1:3].keys, cells.keys))
+        self.assertEqual(cells[1:3].get_values().tolist(), ['N11', 'N12'])
+
+    def test_boundary(self):
+        cells = CellIDArray(cells=['N11', 'N12', 'O0', 'P123'])
+        boundary = Boundary(cells=cells)
+        self.assertEqual(boundary.boundary_ID.value, 'N11N12O0P123')
+        self.assertIs(boundary.get_cell_array(), cells)
+
+        # The keys are the storage of the boundary and the cells are decoded only when they are used
+        self.assertIsNone(boundary._cells)
+        self.assertEqual(boundary.get_max_refinement(), 3)
+        self.assertTrue(boundary.contains_cell(CellID('N111')))
+        self.assertIsNone(boundary._cells)
+        self.assertEqual(boundary.cells, [CellID('N11'), CellID('N12'), CellID('O0'), CellID('P123')])
+
+        optimal_boundary = OptimalBoundary(cells=cells)
+        self.assertEqual(optimal_boundary.boundary_ID.value, OptimalBoundary(cells=list(cells)).boundary_ID.value)
+        self.assertEqual(optimal_boundary.AUID_to_CUIDs(), 'N11N12O0P123')
+        self.assertIs(optimal_boundary.get_cell_ranges()[0], cells.keys)
+        self.assertIsNone(optimal_boundary._cells)
+        self.assertEqual(optimal_boundary.cells, list(cells))
+
+        c_dataset = CellDataSet('id')
+        c_dataset.add_list([(cell, Data(cell.value)) for cell in cells])
+        self.assertEqual(c_dataset.get_cell_array(), cells)
+        self.assertIs(c_dataset.get_cell_array(), c_dataset.get_cell_array())
+        c_dataset.add(CellID('N0'), Data('N0'))
+        self.assertEqual(c_dataset.get_cell_array().get_values().tolist(), ['N0', 'N11', 'N12', 'O0', 'P123'])
+        self.assertEqual([data.content for data in c_dataset.get_cell_data_list(cells.with_prefix('N1'))],
+                         ['N11', 'N12'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -45,6 +45,31 @@ class TestCellDataSet(unittest.TestCase):
 
         self.assertEqual(c_dataset.cells, cells)
 
+        # Nothing is added if one of the cells is already in the set
+        self.assertEqual(c_dataset.add_list([(CellID('N00'), data), (cells[1], data)]), -1)
+        self.assertEqual(c_dataset.add_list([(CellID('N00'), data), (CellID('N00'), data)]), -1)
+        self.assertEqual(c_dataset.cells, cells)
+
+        # The cells are kept sorted and the boundary identifier follows them
+        c_dataset.add(CellID('N00'), data)
+        c_dataset.add_list([(CellID('N10'), data)])
+        self.assertEqual(c_dataset.cells, [CellID('N00')] + cells + [CellID('N10')])
+        self.assertEqual(c_dataset.boundary_ID.value, 'N00N01N02N03N04N05N10')
+
+    def test_cell_dataset_load_with_duplicates(self):
+        data = Data('test')
+        cells = [CellID('N01'), CellID('N02'), CellID('N01'), CellID('N03')]
+
+        # Only the repeated cell is skipped, the rest of the cells are added
+        c_dataset = CellDataSet('id')
+        c_dataset.add_list([(cell, data) for cell in cells], skip_duplicates=True)
+        self.assertEqual(c_dataset.cells, [CellID('N01'), CellID('N02'), CellID('N03')])
+        self.assertEqual(c_dataset.boundary_ID.value, 'N01N02N03')
+
+        c_dataset = CellDataSet('id').fromJSON({'id': 'id', 'cell_data_set': [{'cellID': cell.value, 'data': 'test'}
+                                                                             for cell in cells]})
+        self.assertEqual(c_dataset.cells, [CellID('N01'), CellID('N02'), CellID('N03')])
+
     def test_get_cells(self):
         cells = [CellID('N01'), CellID('N02'), CellID('N03')]
         data = Data('test')
@@ -0,0 +1,97 @@
+import unittest
+from dggs.boundary_ID import BoundaryID
+from dggs.cell_ID import CellID
+from dggs.cellset.boundary import Boundary
+from dggs.cellset.dense_grid_stack import DenseGridStack
+from dggs.cellset.grid_stack import GridStack
+
+
+class TestDenseGridStack(unittest.TestCase):
+
+    def test_dense_grid_stack_from_cells(self):
+        dense_grid_stack = DenseGridStack.from_cells([CellID('P1'), CellID('P22'), CellID('P10')])
+        self.assertEqual(dense_grid_stack.cell_R0, CellID('P'))
+        self.assertEqual(dense_grid_stack.get_max_refinement(), 2)
+        self.assertEqual([grid.sum() for grid in dense_grid_stack.grids], [0, 1, 2])
+        self.assertEqual(dense_grid_stack.get_cells(), [CellID('P1'), CellID('P10'), CellID('P22')])
+        self.assertEqual(dense_grid_stack.cell_count(), 3)
+        self.assertEqual(dense_grid_stack.cell_count(3), 9 * 9 + 9)
+
+        # P1 is in the first row and the second column of P, and P22 in the first row and the last column of P, so
+        # the raster covers the first three rows and the last six columns of the cells of refinement 2 of P
+        self.assertEqual(dense_grid_stack.get_window(), (0, 3, 3, 6))
+        raster = dense_grid_stack.get_raster()
+        self.assertEqual(raster.shape, (3, 6))
+        self.assertTrue(raster[0:3, 0:3].all())
+        self.assertTrue(raster[0, 5])
+        self.assertEqual(raster.sum(), 10)
+        self.assertEqual(dense_grid_stack.get_raster(window=(0, 0, 9, 9))[0:3, 3:6].sum(), 9)
+
+        self.assertRaises(ValueError, DenseGridStack.from_cells, [CellID('P1'), CellID('Q1')])
+        self.assertRaises(ValueError, DenseGridStack.from_cells, [CellID('P12')], refinement=1)
+        self.assertEqual(GridStack(cells=[CellID('P1'), CellID('P22')]).to_dense(refinement=3).get_cells(),
+                         [CellID('P1'), CellID('P22')])
+
+    def test_dense_grid_stack_window(self):
+        # The rasters of a few fine cells are bounded by their extent, not by the size of the cell of refinement 0
+        cells = [CellID('P01234567'), CellID('P01234568'), CellID('P01234573')]
+        dense_grid_stack = DenseGridStack.from_cells(cells)
+        row, col, rows, cols = dense_grid_stack.get_window()
+        self.assertEqual((rows, cols), (2, 3))
+        self.assertEqual(dense_grid_stack.get_raster().shape, (2, 3))
+        self.assertTrue(all(grid.size <= rows * cols for grid in dense_grid_stack.grids))
+        self.assertEqual(dense_grid_stack.get_cells(), cells)
+
+        # The rasters of the set operations and of the morphology are aligned windows of both sets
+        other = DenseGridStack.from_cells([CellID('P01234576'), CellID('P01234577')])
+        self.assertEqual(dense_grid_stack.union(other).get_cells(), cells + [CellID('P01234576'), CellID('P01234577')])
+        self.assertEqual(dense_grid_stack.intersection(other).get_cells(), [])
+        self.assertEqual(dense_grid_stack.dilate(diagonals=False).get_raster().shape, (4, 5))
+        self.assertEqual(dense_grid_stack.dilate().erode().get_cells(), dense_grid_stack.get_cells())
+        self.assertEqual(DenseGridStack.from_cells([CellID('P01234')], refinement=7).get_raster().shape, (9, 9))
+
+    def test_dense_grid_stack_from_raster(self):
+        raster = DenseGridStack.from_cells([CellID('P' + str(digit)) for digit in range(8)] +
+                                           [CellID('P8' + str(digit)) for digit in range(9)]).get_raster()
+        dense_grid_stack = DenseGridStack.from_raster(CellID('P'), raster)
+        self.assertEqual(dense_grid_stack.get_cells(), [CellID('P')])
+
+    def test_boundary_conversion(self):
+        boundary = Boundary(boundary_ID=BoundaryID('N11N12N13N2N200N888'))
+        dense_grid_stack = boundary.get_as_dense_grid_stack()
+        self.assertEqual(dense_grid_stack.get_cells(), boundary.optimize().cells)
+        self.assertEqual(dense_grid_stack.to_boundary().boundary_ID.value, boundary.optimize().boundary_ID.value)
+
+    def test_set_operations(self):
+        boundary_a = Boundary(boundary_ID=BoundaryID('P1P2P34'))
+        boundary_b = Boundary(boundary_ID=BoundaryID('P0P2P3P567'))
+        dense_a = boundary_a.get_as_dense_grid_stack()
+        dense_b = boundary_b.get_as_dense_grid_stack()
+
+        self.assertEqual(dense_a.union(dense_b).get_cells(), boundary_a.union(boundary_b).cells)
+        self.assertEqual(dense_a.intersection(dense_b).get_cells(), boundary_a.intersection(boundary_b).cells)
+        self.assertEqual(dense_a.difference(dense_b).get_cells(), boundary_a.difference(boundary_b).cells)
+        self.assertEqual(dense_b.difference(dense_a).get_cells(), boundary_b.difference(boundary_a).cells)
+        self.assertEqual(dense_a.symmetric_difference(dense_b).get_cells(),
+                         boundary_a.symmetric_difference(boundary_b).cells)
+        self.assertRaises(ValueError, dense_a.union, DenseGridStack.from_cells([CellID('Q1')]))
+
+    def test_morphology(self):
+        dense_grid_stack = DenseGridStack.from_cells([CellID('P4')])
+        self.assertEqual(dense_grid_stack.dilate().get_cells(), [CellID('P')])
+        self.assertEqual(dense_grid_stack.dilate(diagonals=False).get_cells(),
+                         [CellID('P1'), CellID('P3'), CellID('P4'), CellID('P5'), CellID('P7')])
+        self.assertEqual(dense_grid_stack.erode().get_cells(), [])
+
+        # The cells of other cells of refinement 0 are outside of the set
+        dense_grid_stack = DenseGridStack.from_cells([CellID('P')], refinement=1)
+        self.assertEqual(dense_grid_stack.erode().get_cells(), [CellID('P4')])
+        self.assertEqual(dense_grid_stack.erode(diagonals=False).get_cells(), [CellID('P4')])
+        self.assertEqual(dense_grid_stack.dilate().get_cells(), [CellID('P')])
+
+        dense_grid_stack = DenseGridStack.from_cells([CellID('P4')], refinement=2)
+        self.assertEqual(dense_grid_stack.dilate(2).erode(2).get_cells(), [CellID('P4')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import unittest
+from dggs.dggs_auids.dggs_auids import cuids_to_bp_auid, encode_bp_auid, hash_id, decompress_id_bytes, \
+    bp_auid_to_cuids, iter_bp_auid_cuids
+
+
+class TestDGGSAUIDs(unittest.TestCase):
+    def test_encode_bp_auid(self):
+        cuids = ['N11', 'N12', 'N13', 'N88', 'O0', 'P123', 'S34567']
+        auid, hashed, auid_compressed = encode_bp_auid(cuids, pars="()", with_opening_par=False)
+        self.assertEqual(auid, 'RN11$))2$))3$)))88$))))O0$)))P123$)))))S34567$))))))))')
+        self.assertIsNone(hashed)
+        self.assertIsNone(auid_compressed)
+        self.assertEqual(encode_bp_auid(['N1', 'N12', 'N1'], pars="()")[0], 'RN1$)2$)))))')
+        self.assertEqual(encode_bp_auid([], pars="()")[0], 'R)')
+
+        auid, hashed, auid_compressed = encode_bp_auid(cuids, with_hash=True, with_compression=True)
+        self.assertEqual(hashed, hash_id(auid))
+        self.assertEqual(decompress_id_bytes(auid_compressed), auid)
+
+    def test_encode_bp_auid_as_trie(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            cuids = [rng.choice('NOPQRS') + ''.join(rng.choice('012345678') for _ in range(rng.randint(0, 4)))
+                     for _ in range(rng.randint(1, 30))]
+            for pars, with_opening_par in [("()", False), ("{}", True)]:
+                self.assertEqual(encode_bp_auid(cuids, pars=pars, with_opening_par=with_opening_par)[0],
+                                 cuids_to_bp_auid(cuids, pars=pars, with_opening_par=with_opening_par)[0])
+
+    def test_decode_bp_auid(self):
+        auid = 'RN11$))2$))3$)))88$))))O0$)))P123$)))))S34567$))))))))'
+        cuids = ['N11', 'N12', 'N13', 'N88', 'O0', 'P123', 'S34567']
+        self.assertEqual(list(iter_bp_auid_cuids(auid, pars="()", with_opening_par=False)), cuids)
+        self.assertEqual(bp_auid_to_cuids(auid, pars="()", with_opening_par=False), cuids)
+        self.assertEqual(bp_auid_to_cuids('RN1$)2$)))))', pars="()", with_opening_par=False), ['N1', 'N12'])
+        self.assertEqual(bp_auid_to_cuids('R)', pars="()", with_opening_par=False), [])
+        self.assertRaises(ValueError, bp_auid_to_cuids, 'RN1$)))))', pars="()", with_opening_par=False)
+        self.assertRaises(ValueError, bp_auid_to_cuids, 'RN1$))', pars="()", with_opening_par=False)
+
+        rng = random.Random(0)
+        for _ in range(100):
+            cuids = sorted({rng.choice('NOPQRS') + ''.join(rng.choice('012345678') for _ in range(rng.randint(0, 4)))
+                            for _ in range(rng.randint(1, 30))})
+            for pars, with_opening_par in [("()", False), ("{}", True)]:
+                auid = encode_bp_auid(cuids, pars=pars, with_opening_par=with_opening_par)[0]
+                self.assertEqual(bp_auid_to_cuids(auid, pars=pars, with_opening_par=with_opening_par), cuids)
+
+        # Deep tries do not reach the recursion limit
+        cuids = ['N' + '1' * 5000]
+        self.assertEqual(bp_auid_to_cuids(encode_bp_auid(cuids)[0], with_opening_par=False), cuids)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,20 @@
 import unittest
+import numpy as np
 from numpy import pi
 
 from dggs.cell_ID import CellID
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import rHEALPix, get_rHEALPix
 
 r = rHEALPix(N_side=3, north_square=0, south_square=0)
 
 
 class TestBoundaryDataSet(unittest.TestCase):
 
+    def test_get_rHEALPix(self):
+        self.assertIs(get_rHEALPix(), get_rHEALPix(N_side=3, north_square=0, south_square=0))
+        self.assertIsNot(get_rHEALPix(), get_rHEALPix(north_square=1))
+        self.assertEqual(get_rHEALPix(north_square=1).north_square, 1)
+
     def test_cell_width(self):
         self.assertEqual(r.cell_width(0), 0.998882147091 * (pi / 2) * 3 ** (-0))
         self.assertEqual(r.cell_width(10), 0.998882147091 * (pi / 2) * 3 ** (-10))
@@ -30,6 +36,24 @@ class TestBoundaryDataSet(unittest.TestCase):
         self.assertEqual(r.left(CellID('O80'), CellID('N00')), False)
         self.assertEqual(r.right(CellID('P3'), CellID('R5')), False)
 
+    def test_cells_rowcol(self):
+        rows, cols, spans = r.get_cells_rowcol([CellID('N'), CellID('O4'), CellID('S8'), CellID('R')])
+        self.assertEqual(list(rows), [0, 4, 8, 3])
+        self.assertEqual(list(cols), [0, 1, 2, 9])
+        self.assertEqual(list(spans), [3, 1, 1, 3])
+
+        rows, cols, spans = rHEALPix(north_square=2, south_square=3).get_cells_rowcol(['N12', 'S'], refinement=3)
+        self.assertEqual(list(rows), [0, 54])
+        self.assertEqual(list(cols), [69, 81])
+        self.assertEqual(list(spans), [3, 27])
+        self.assertRaises(ValueError, r.get_cells_rowcol, ['N12'], 1)
+
+    def test_limit_cells(self):
+        cells = [CellID('R80'), CellID('R'), CellID('O273'), CellID('R2')]
+        self.assertEqual(r.get_limit_cells(cells), (CellID('R'), CellID('R'), CellID('O273'), CellID('R')))
+        cells = [CellID('Q6'), CellID('Q7'), CellID('S7')]
+        self.assertEqual(r.get_limit_cells(cells), (CellID('Q7'), CellID('S7'), CellID('S7'), CellID('Q7')))
+
     def test_check_bounds(self):
         self.assertEqual(
             r.check_bounds([(-3 / 4 * pi, 1 / 8 * pi), (-1 / 2 * pi, 1 / 8 * pi), (-3 / 4 * pi, -1 / 8 * pi),
@@ -37,6 +61,13 @@ class TestBoundaryDataSet(unittest.TestCase):
         self.assertEqual(r.check_bounds([(-1 / 4 * pi, 1 / 2 * pi), (0, 1 / 2 * pi), (-1 / 4 * pi, 1 / 4 * pi),
                                          (0 * pi, 1 / 4 * pi)]), False)
 
+    def test_contains_points(self):
+        xs = np.array([-3 / 4 * pi, -3 / 4 * pi, -3 / 4 * pi, 3 / 4 * pi, -1 / 4 * pi, 3 / 4 * pi, 3.2, 0])
+        ys = np.array([1 / 2 * pi, 0, -1 / 2 * pi, 0, 1 / 2 * pi, -1 / 2 * pi, 0, -pi])
+        self.assertEqual(r.contains_points(xs, ys).tolist(), [True, True, True, True, False, False, False, False])
+        self.assertEqual(rHEALPix(north_square=1, south_square=3).contains_points(xs, ys).tolist(),
+                         [False, True, False, True, True, True, False, False])
+
     def test_cell_ul_vertex(self):
         self.assertEqual(r.get_cell_ul_vertex(CellID('N0')),
                          ((-pi + 0 * pi / 2) * 0.998882147091, (3 * pi / 4) * 0.998882147091))
@@ -135,6 +166,23 @@ class TestBoundaryDataSet(unittest.TestCase):
              (-89.99999911170322, 47.57255041493694)]
         self.assertEqual(a, b)
 
+    def test_round_coords(self):
+        values = np.array([0.1, -0.1, 0.123456789, -0.123456789, 1.5690404075515423, -2.3535606113273135, 0.0])
+        for up in [True, False]:
+            self.assertEqual(list(r.round_coords(values, 8, up)), [float(r.round_coord(v, 8, up)) for v in values])
+
+    def test_cells_coordinates(self):
+        cells = [CellID('N'), CellID('O'), CellID('S'), CellID('N88'), CellID('O123'), CellID('Q0123456')]
+        projected = r.get_cells_projected_coordinates(cells)
+        geodetic = r.get_cells_geodetic_coordinates(cells)
+        self.assertEqual(projected.shape, (6, 5, 2))
+        self.assertEqual(geodetic.shape, (6, 5, 2))
+        for i, cell in enumerate(cells):
+            self.assertEqual([tuple(coord) for coord in projected[i].tolist()],
+                             list(r.get_cell_projected_coordinates(cell)))
+            self.assertEqual([tuple(coord) for coord in geodetic[i].tolist()],
+                             r.get_cell_geodetic_coordinates(cell))
+
     def test_cell_from_point(self):
         p = (43.74999986695531, 47.57255097966877)
         cell = r.get_cell_from_point(4, p)
@@ -156,6 +204,147 @@ class TestBoundaryDataSet(unittest.TestCase):
         cell = r.get_cell_from_point(2, p5)
         self.assertEqual(cell, CellID('P22'))
 
+    def test_cells_from_points(self):
+        lons = np.array([43.74999986695531, 54.00000032594864, -133.74999985810513, -134.38356121039018,
+                         -1.1179698216735403])
+        lats = np.array([47.57255097966877, 54.91640765274602, -47.57255129550154, -46.9523050079352,
+                         41.82074068655])
+        cells = r.get_cells_from_points(4, lons, lats)
+        self.assertEqual(list(cells), ['N1145', 'N1324', 'S1145', 'S1145', 'P2221'])
+
+        rng = np.random.default_rng(0)
+        lons = rng.uniform(-179.9, 179.9, 1000)
+        lats = rng.uniform(-89.9, 89.9, 1000)
+        for refinement in [0, 1, 5, 10]:
+            cells = r.get_cells_from_points(refinement, lons, lats)
+            self.assertEqual(list(cells),
+                             [r.get_cell_from_point(refinement, p).value for p in zip(lons, lats)])
+
+        xs, ys = r.proj(lons, lats)
+        self.assertEqual(list(r.get_cells_from_projected_points(5, xs, ys)),
+                         [r.get_cell_from_projected_point(5, p).value for p in zip(xs, ys)])
+
+    def test_cell_keys(self):
+        self.assertEqual(r.key_max_refinement, 17)
+        cells = ['N', 'N0', 'N00', 'N1', 'N1145', 'O', 'P22', 'S', 'S1145000', 'S88888888888888888']
+        keys = r.get_cell_keys(cells)
+        self.assertEqual(keys.dtype, np.int64)
+        self.assertEqual(list(r.get_cells_from_keys(keys)), cells)
+        self.assertEqual(list(np.sort(keys)), list(keys))
+        self.assertEqual(r.get_cell_from_key(r.get_cell_key(CellID('N1145'))), CellID('N1145'))
+        self.assertRaises(ValueError, r.get_cell_keys, ['N888888888888888888'])
+
+        ends = r.get_key_range_end(keys)
+        for key, end, cell in zip(keys, ends, cells):
+            self.assertEqual([key <= other <= end for other in keys],
+                             [other.startswith(cell) for other in cells])
+
+        rng = np.random.default_rng(0)
+        lons = rng.uniform(-179.9, 179.9, 1000)
+        lats = rng.uniform(-89.9, 89.9, 1000)
+        for refinement in [0, 1, 10, 17]:
+            cells = r.get_cells_from_points(refinement, lons, lats)
+            keys = r.get_cell_keys_from_points(refinement, lons, lats)
+            self.assertEqual(list(keys), list(r.get_cell_keys(cells)))
+            self.assertEqual(list(r.get_cells_from_keys(keys)), list(cells))
+            self.assertEqual(list(np.argsort(keys, kind='stable')), list(np.argsort(cells, kind='stable')))
+
+    def test_neighbours(self):
+        self.assertEqual(r.neighbours(CellID('N')), [CellID('Q'), CellID('P'), CellID('O'), CellID('R')])
+        self.assertEqual(r.neighbours(CellID('O'), diagonals=False),
+                         [CellID('N'), CellID('P'), CellID('S'), CellID('R')])
+        self.assertEqual(sorted(c.value for c in r.neighbours(CellID('O4'))),
+                         ['O0', 'O1', 'O2', 'O3', 'O5', 'O6', 'O7', 'O8'])
+        self.assertEqual(sorted(c.value for c in r.neighbours(CellID('N1'))),
+                         ['N0', 'N2', 'N3', 'N4', 'N5', 'Q0', 'Q1', 'Q2'])
+        self.assertEqual(sorted(c.value for c in r.neighbours(CellID('O0'))),
+                         ['N6', 'N7', 'O1', 'O3', 'O4', 'R2', 'R5'])
+        self.assertEqual(sorted(c.value for c in r.neighbours(CellID('S2'))),
+                         ['O7', 'O8', 'P6', 'P7', 'S1', 'S4', 'S5'])
+
+        for north_square, south_square in [(0, 0), (1, 3), (2, 1)]:
+            dggs = rHEALPix(north_square=north_square, south_square=south_square)
+            cells = dggs.get_cells_from_points(2, np.linspace(-179, 179, 200), np.linspace(-89, 89, 200))
+            keys = np.unique(dggs.get_cell_keys(cells))
+            neighbours = dggs.get_neighbour_keys(keys)
+            valid = neighbours >= 0
+            back = dggs.get_neighbour_keys(neighbours[valid])
+            self.assertTrue(np.all(np.any(back == np.repeat(keys, valid.sum(axis=1))[:, None], axis=1)))
+
+    def test_k_ring(self):
+        self.assertEqual(r.k_ring(CellID('O44'), 0), [CellID('O44')])
+        self.assertEqual(len(r.k_ring(CellID('O44'), 1)), 9)
+        self.assertEqual(len(r.k_ring(CellID('O44'), 2)), 25)
+        self.assertEqual(len(r.k_ring(CellID('O44'), 1, diagonals=False)), 5)
+        self.assertEqual(len(r.k_ring(CellID('N'), 1)), 5)
+        self.assertEqual(len(r.k_ring(CellID('N'), 2)), 6)
+        ring = r.get_k_ring_keys(r.get_cell_keys(['O44', 'O45']), 1)
+        self.assertEqual(len(ring), 12)
+
+    def test_hierarchy(self):
+        self.assertEqual(r.parent(CellID('N123')), CellID('N12'))
+        self.assertEqual(r.parent(CellID('N123'), 0), CellID('N'))
+        self.assertEqual(list(r.children(CellID('O1'))), [CellID('O1' + str(digit)) for digit in range(9)])
+        descendants = r.descendants(CellID('P7'), 3)
+        self.assertEqual(next(descendants), CellID('P700'))
+        self.assertEqual(len(list(descendants)), 80)
+        self.assertEqual(list(r.descendants(CellID('P7'), 1)), [CellID('P7')])
+
+        keys = r.get_cell_keys(['N', 'P7', 'S888'])
+        self.assertEqual(list(r.get_cells_from_keys(r.get_parent_keys(keys[1:]))), ['P', 'S88'])
+        self.assertEqual(list(r.get_cells_from_keys(r.get_parent_keys(keys, 0))), ['N', 'P', 'S'])
+        self.assertEqual(list(r.get_cells_from_keys(r.get_parent_keys(r.get_cell_keys(['Q0013', 'R52'])))),
+                         ['Q001', 'R5'])
+        self.assertEqual(list(r.get_cells_from_keys(r.get_children_keys(keys)[1])),
+                         [cell.value for cell in r.children(CellID('P7'))])
+        self.assertEqual(list(r.get_cells_from_keys(r.get_descendant_keys(keys[:2], 3))),
+                         [cell.value for cell in r.descendants(CellID('N'), 3)] +
+                         [cell.value for cell in r.descendants(CellID('P7'), 3)])
+        chunks = list(r.iter_descendant_keys(keys[:1], 4, chunk_size=1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 1000, 1000, 1000, 1000, 561])
+        self.assertEqual(list(np.concatenate(chunks)), list(r.get_descendant_keys(keys[:1], 4)))
+        chunks = list(r.iter_descendant_keys(keys[1:], 4, chunk_size=50))
+        self.assertEqual([len(chunk) for chunk in chunks], [50] * 14 + [38])
+        self.assertEqual(list(np.concatenate(chunks)), list(r.get_descendant_keys(keys[1:], 4)))
+
+    def test_polyfill(self):
+        square = [[0, 0], [20, 0], [20, 20], [0, 20], [0, 0]]
+        hole = [[5, 5], [5, 10], [10, 10], [10, 5], [5, 5]]
+        triangle = [[-60, 45], [-40, 45], [-50, 70], [-60, 45]]
+        polygons = [{'type': 'Polygon', 'coordinates': [square]},
+                    {'type': 'Polygon', 'coordinates': [square, hole]},
+                    {'type': 'MultiPolygon', 'coordinates': [[hole], [triangle]]}]
+        all_cells = r.get_descendant_keys(r.get_cell_keys(r.cells_R0), 3)
+        for polygon in polygons:
+            keys = r.get_polyfill_keys(polygon, 3)
+            inside = all_cells[r.get_points_in_polygon(polygon, *r.get_nucleus_from_keys(all_cells))]
+            self.assertEqual(list(r.get_descendant_keys(keys, 3)), list(inside))
+
+        cells = r.polyfill(polygons[0], 3)
+        self.assertEqual(cells, sorted(cells, key=lambda cell: cell.value))
+        self.assertIn(CellID('Q30'), cells)
+        self.assertNotIn(CellID('Q300'), cells)
+        self.assertEqual(r.get_points_in_polygon(polygons[1], [15, 7], [15, 7]).tolist(), [True, False])
+
+    def test_compact(self):
+        cells = [CellID('N2' + str(digit)) for digit in range(9)] + [CellID('N11'), CellID('N1'), CellID('N112')]
+        self.assertEqual(r.compact(cells), [CellID('N1'), CellID('N2')])
+
+        cells = [CellID('O' + str(digit)) for digit in range(8)] + [CellID('O8' + str(digit)) for digit in range(9)]
+        self.assertEqual(r.compact(cells), [CellID('O')])
+        self.assertEqual(r.compact(cells[:-1]), cells[:8] + cells[8:-1])
+
+        cells = [CellID('P0' + str(digit)) for digit in range(9)] + [CellID('P10'), CellID('P2')]
+        self.assertEqual(r.compact(reversed(cells)), [CellID('P0'), CellID('P10'), CellID('P2')])
+        self.assertEqual(r.compact([CellID(face) for face in r.cells_R0]), [CellID(face) for face in r.cells_R0])
+        self.assertEqual(r.compact([]), [])
+
+    def test_split_boundary_ID(self):
+        self.assertEqual(r.split_boundary_ID('O0N12S34567N11P123N'), ['N', 'N11', 'N12', 'O0', 'P123', 'S34567'])
+        self.assertEqual(r.split_boundary_ID(''), [])
+        self.assertEqual(list(r.get_boundary_ID_keys('O0N12S34567N11P123N')),
+                         list(r.get_cell_keys(['N', 'N11', 'N12', 'O0', 'P123', 'S34567'])))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from pyproj import Proj
+
+from dggs.cell_ID import CellID
+from dggs.rHealPix import rHEALPix
+from dggs.rHealPix_projection import rHEALPixProjection
+
+rng = np.random.default_rng(0)
+# Fixed points: the antimeridian (both -180 and +180) and the exact poles
+fixed_lons = np.array([0, 45, -45, 90, -90, 135, -135, 179.9, -180, 180, 180, -180, 0, 0, 180, -180])
+fixed_lats = np.array([0, 41.9, -41.9, 60, -60, 89.9, -89.9, 0, 10, 0, 60, 0, 90, -90, 90, -90])
+lons = np.concatenate([rng.uniform(-180, 180, 20000), fixed_lons])
+lats = np.concatenate([rng.uniform(-90, 90, 20000), fixed_lats])
+# Near the poles, the latitude is the square root of the distance to the tip of the cap, so rounding errors of the
+# projected coordinates of the exact poles give errors of about 1e-6 degrees in the inverse, also in pyproj
+exact_pole = np.abs(lats) == 90
+
+
+class TestRHEALPixProjection(unittest.TestCase):
+
+    def test_forward(self):
+        for north_square in range(4):
+            for south_square in range(4):
+                proj = Proj(proj='rhealpix', a=1, ellps='WGS84', south_square=south_square,
+                            north_square=north_square, lon_0=0, preserve_units=False)
+                projection = rHEALPixProjection(north_square=north_square, south_square=south_square)
+                x, y = proj(lons, lats)
+                x2, y2 = projection(lons, lats)
+                np.testing.assert_allclose(x2, x, rtol=0, atol=1e-10)
+                np.testing.assert_allclose(y2, y, rtol=0, atol=1e-10)
+
+    def test_inverse(self):
+        for north_square in range(4):
+            for south_square in range(4):
+                proj = Proj(proj='rhealpix', a=1, ellps='WGS84', south_square=south_square,
+                            north_square=north_square, lon_0=0, preserve_units=False)
+                projection = rHEALPixProjection(north_square=north_square, south_square=south_square)
+                x, y = proj(lons, lats)
+                lon, lat = proj(x, y, inverse=True)
+                lon2, lat2 = projection(x, y, inverse=True)
+                np.testing.assert_allclose(lat2[~exact_pole], lat[~exact_pole], rtol=0, atol=1e-7)
+                np.testing.assert_allclose(lat2[exact_pole], lat[exact_pole], rtol=0, atol=1e-5)
+                # Longitudes are undefined at the poles
+                not_pole = np.abs(lat) < 89.99
+                np.testing.assert_allclose(((lon2 - lon + 180) % 360 - 180)[not_pole], 0, rtol=0, atol=1e-7)
+
+    def test_round_trip(self):
+        projection = rHEALPixProjection()
+        lon, lat = projection(*projection(lons, lats), inverse=True)
+        np.testing.assert_allclose(lat[~exact_pole], lats[~exact_pole], rtol=0, atol=1e-8)
+        np.testing.assert_allclose(lat[exact_pole], lats[exact_pole], rtol=0, atol=1e-5)
+        not_pole = np.abs(lats) < 89.99
+        np.testing.assert_allclose(((lon - lons + 180) % 360 - 180)[not_pole], 0, rtol=0, atol=1e-8)
+
+    def test_scalar(self):
+        projection = rHEALPixProjection()
+        proj = Proj(proj='rhealpix', a=1, ellps='WGS84', south_square=0, north_square=0, lon_0=0,
+                    preserve_units=False)
+        x, y = projection(43.74999986695531, 47.57255097966877)
+        self.assertIsInstance(x, float)
+        self.assertAlmostEqual(x, proj(43.74999986695531, 47.57255097966877)[0], places=10)
+        self.assertAlmostEqual(y, proj(43.74999986695531, 47.57255097966877)[1], places=10)
+
+    def test_engine(self):
+        r = rHEALPix(N_side=3, north_square=0, south_square=0)
+        r_numpy = rHEALPix(N_side=3, north_square=0, south_square=0, engine='numpy')
+        self.assertIsInstance(r_numpy.proj, rHEALPixProjection)
+        self.assertRaises(ValueError, rHEALPix, engine='gdal')
+
+        for refinement in [1, 5, 10]:
+            self.assertEqual(list(r_numpy.get_cells_from_points(refinement, lons[:2000], lats[:2000])),
+                             list(r.get_cells_from_points(refinement, lons[:2000], lats[:2000])))
+            # The same cells on the antimeridian and at the poles
+            self.assertEqual(list(r_numpy.get_cells_from_points(refinement, fixed_lons, fixed_lats)),
+                             list(r.get_cells_from_points(refinement, fixed_lons, fixed_lats)))
+
+        cells = [CellID('N'), CellID('O'), CellID('S'), CellID('N88'), CellID('Q0123456')]
+        coordinates = r.get_cells_geodetic_coordinates(cells)
+        coordinates_numpy = r_numpy.get_cells_geodetic_coordinates(cells)
+        np.testing.assert_allclose(coordinates_numpy[..., 1], coordinates[..., 1], rtol=0, atol=1e-7)
+        not_pole = np.abs(coordinates[..., 1]) < 89.99
+        np.testing.assert_allclose(coordinates_numpy[..., 0][not_pole], coordinates[..., 0][not_pole],
+                                   rtol=0, atol=1e-7)
+
+
+if __name__ == '__main__':
+    unittest.main()
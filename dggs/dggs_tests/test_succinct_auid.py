@@ -0,0 +1,66 @@
+import random
+import unittest
+from dggs.cell_ID import CellID
+from dggs.dggs_auids.dggs_auids import encode_bp_auid
+from dggs.dggs_auids.succinct_auid import SuccinctAUID
+
+auid = 'RN11$))2$))3$)))88$))))O0$)))P123$)))))S34567$))))))))'
+
+
+class SmallBlocksAUID(SuccinctAUID):
+    # Several blocks even for small AUIDs
+    block_size = 8
+
+
+class TestSuccinctAUID(unittest.TestCase):
+    def test_conversion(self):
+        succinct_auid = SuccinctAUID.from_AUID(auid)
+        self.assertEqual(succinct_auid.to_AUID(), auid)
+        self.assertEqual(len(succinct_auid), len(auid))
+        self.assertEqual(SuccinctAUID.from_bytes(succinct_auid.to_bytes()), succinct_auid)
+        self.assertLess(len(succinct_auid.to_bytes()), len(auid))
+        self.assertEqual(SuccinctAUID.from_AUID('R)').to_AUID(), 'R)')
+        self.assertRaises(ValueError, SuccinctAUID.from_AUID, 'RN1$)))))')
+        self.assertRaises(ValueError, SuccinctAUID.from_AUID, 'RN1X$))))')
+
+    def test_navigation(self):
+        for cls in [SuccinctAUID, SmallBlocksAUID]:
+            succinct_auid = cls.from_AUID(auid)
+            for index in range(len(succinct_auid.symbols)):
+                position = succinct_auid.select(index)
+                self.assertEqual(succinct_auid.rank(position), index)
+                self.assertEqual(succinct_auid.excess(succinct_auid.find_close(position)),
+                                 succinct_auid.excess(position) - 1)
+            self.assertEqual(succinct_auid.find_close(0), len(auid) - 1)
+            self.assertEqual(succinct_auid.get_source(succinct_auid.select(1)), 'N')
+
+    def test_queries(self):
+        for cls in [SuccinctAUID, SmallBlocksAUID]:
+            succinct_auid = cls.from_AUID(auid)
+            self.assertTrue(succinct_auid.contains(CellID('N11')))
+            self.assertTrue(succinct_auid.contains('N8801'))
+            self.assertTrue(succinct_auid.contains('S345678'))
+            self.assertFalse(succinct_auid.contains('N1'))
+            self.assertFalse(succinct_auid.contains('N14'))
+            self.assertFalse(succinct_auid.contains('Q'))
+            self.assertEqual(succinct_auid.cells_with_prefix('N1'), ['N11', 'N12', 'N13'])
+            self.assertEqual(succinct_auid.cells_with_prefix('P'), ['P123'])
+            self.assertEqual(succinct_auid.cells_with_prefix('N881'), [])
+            self.assertEqual(succinct_auid.cell_count(), 7)
+            self.assertEqual(succinct_auid.cell_count('N'), 4)
+            self.assertEqual(succinct_auid.cell_count('R'), 0)
+
+        rng = random.Random(0)
+        for _ in range(50):
+            cuids = sorted({rng.choice('NOPQRS') + ''.join(rng.choice('012345678') for _ in range(rng.randint(0, 4)))
+                            for _ in range(rng.randint(1, 40))})
+            succinct_auid = SmallBlocksAUID.from_AUID(encode_bp_auid(cuids, pars="()")[0])
+            self.assertEqual(succinct_auid.cells_with_prefix(''), cuids)
+            for _ in range(20):
+                cell = rng.choice('NOPQRS') + ''.join(rng.choice('012345678') for _ in range(rng.randint(0, 5)))
+                self.assertEqual(succinct_auid.contains(cell), any(cell.startswith(cuid) for cuid in cuids))
+                self.assertEqual(succinct_auid.cells_with_prefix(cell), [cuid for cuid in cuids if cuid.startswith(cell)])
+
+
+if __name__ == '__main__':
+    unittest.main()
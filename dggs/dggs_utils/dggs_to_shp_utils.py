@@ -5,14 +5,14 @@ from dggs.cellset.boundary import Boundary
 from dggs.boundary_ID import BoundaryID
 from dggs.dataset.boundary_dataset import BoundaryDataSet
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class DGGSShpUtils:
 
     def __init__(self, dggs=None):
         if dggs is None:
-            dggs = rHEALPix(N_side=3, north_square=0, south_square=0)
+            dggs = get_rHEALPix(N_side=3, north_square=0, south_square=0)
         self.dggs = dggs
 
     def create_polygon(self, coords):
@@ -25,6 +25,15 @@ class DGGSShpUtils:
         poly.AddGeometry(ring)
         return poly.ExportToWkt()
 
+    def get_cells_polygon_coords(self, cells):
+        """
+        :param cells: list of cell identifiers, of type CellID
+        :return: list with the closed ring of geodetic coordinates of each cell
+        [upper left, upper right, lower right, lower left, upper left]
+        """
+        cells_coords = self.dggs.get_cells_geodetic_coordinates(cells)
+        return cells_coords[:, [0, 1, 3, 2, 0]].tolist()
+
     def write_shapefile(self, cells, out_shp, data=False):
 
         driver = ogr.GetDriverByName('Esri Shapefile')
@@ -55,9 +64,7 @@ class DGGSShpUtils:
 
     def shp_file_from_cells(self, cells, out_shp, data=None):
         cell_list = []
-        for cell in cells:
-            cells_coords = self.dggs.get_cell_geodetic_coordinates(cell)
-            coords = [cells_coords[0], cells_coords[1], cells_coords[3], cells_coords[2], cells_coords[0]]
+        for cell, coords in zip(cells, self.get_cells_polygon_coords(cells)):
             cell_poly = self.create_polygon(coords)
             if data is not None:
                 cell = {
@@ -80,9 +87,7 @@ class DGGSShpUtils:
     def shp_file_from_boundary(self, boundary, out_shp, bbox, data=None):
         cell_list = []
         if not bbox:
-            for cell in boundary.cells:
-                cells_coords = self.dggs.get_cell_geodetic_coordinates(cell)
-                coords = [cells_coords[0], cells_coords[1], cells_coords[3], cells_coords[2], cells_coords[0]]
+            for cell, coords in zip(boundary.cells, self.get_cells_polygon_coords(boundary.cells)):
                 cell_poly = self.create_polygon(coords)
                 if data is not None:
                     cell = {
@@ -122,9 +127,7 @@ class DGGSShpUtils:
         for (boundary, data) in boundary_dataset.get_boundaries_and_data():
             cell_list = []
             if not bbox:
-                for cell in boundary.cells:
-                    cells_coords = self.dggs.get_cell_geodetic_coordinates(cell)
-                    coords = [cells_coords[0], cells_coords[1], cells_coords[3], cells_coords[2], cells_coords[0]]
+                for cell, coords in zip(boundary.cells, self.get_cells_polygon_coords(boundary.cells)):
                     cell_poly = self.create_polygon(coords)
                     cell = {
                         'id': cell.value,
@@ -1,6 +1,6 @@
 import gdal
 from dggs.dataset.cell_dataset import CellDataSet
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 from numpy import pi
 import numpy
 from osgeo import gdal
@@ -11,7 +11,7 @@ class DGGSTifUtils:
 
     def __init__(self, dggs=None):
         if dggs is None:
-            dggs = rHEALPix(N_side=3, north_square=0, south_square=0)
+            dggs = get_rHEALPix(N_side=3, north_square=0, south_square=0)
         self.dggs = dggs
 
     def get_row(self, row_list):
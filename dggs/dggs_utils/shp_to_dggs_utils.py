@@ -6,14 +6,14 @@ from dggs.boundary_ID import BoundaryID
 from dggs.dataset.boundary_dataset import BoundaryDataSet
 from dggs.cell_ID import CellID
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class ShpDGGSUtils:
 
     def __init__(self, dggs=None):
         if dggs is None:
-            dggs = rHEALPix(N_side=3, north_square=0, south_square=0)
+            dggs = get_rHEALPix(N_side=3, north_square=0, south_square=0)
         self.dggs = dggs
 
     def get_cell_ID(self, polygon, refinement):
@@ -25,21 +25,37 @@ class ShpDGGSUtils:
 
         return self.dggs.get_cell_from_point(refinement, g.centroid.coords[0])
 
+    def get_cell_IDs(self, polygon, refinement):
+        """
+        :param polygon: shapefile feature with a Polygon or MultiPolygon geometry
+        :param refinement: maximum refinement of the cells
+        :return: compact list of cells (CellId) covering the polygon. Other geometries, and polygons too small to
+        contain the nucleus of any cell, get the cell of their centroid.
+        """
+        cells = []
+        if polygon['geometry']['type'] in ('Polygon', 'MultiPolygon'):
+            cells = self.dggs.polyfill(polygon['geometry'], refinement)
+        if len(cells) == 0:
+            cells = [self.get_cell_ID(polygon, refinement)]
+        return cells
+
     def get_cells_from_shp_file(self, file, with_ids, refinement=None, unic_data=False):
         shapes = fiona.open(file)
         cells = []
         data = []
         for polygon in shapes:
             if with_ids:
-                cells.append(CellID(polygon['properties']['id']))
+                polygon_cells = [CellID(polygon['properties']['id'])]
             else:
                 assert refinement is not None
-                cells.append(self.get_cell_ID(polygon, refinement))
+                polygon_cells = self.get_cell_IDs(polygon, int(refinement))
+            cells.extend(polygon_cells)
 
+            # Each cell of the polygon has the data of the polygon
             if 'data' in polygon['properties']:
-                data.append(CellID(polygon['properties']['data']))
+                data.extend([CellID(polygon['properties']['data'])] * len(polygon_cells))
             else:
-                data.append(CellID(polygon['properties']))
+                data.extend([CellID(polygon['properties'])] * len(polygon_cells))
         return cells, data
 
     def get_boundary_from_shp_file(self, file, with_ids, refinement=None, unic_data=False):
@@ -52,7 +68,7 @@ class ShpDGGSUtils:
                 cells.append(CellID(polygon['properties']['id']))
             else:
                 assert refinement is not None
-                cells.append(self.get_cell_ID(polygon, int(refinement)))
+                cells.extend(self.get_cell_IDs(polygon, int(refinement)))
 
             if not unic_data:
                 if 'data' in polygon['properties']:
@@ -76,7 +92,7 @@ class ShpDGGSUtils:
                 cells.append(CellID(polygon['properties']['id']))
             else:
                 assert refinement is not None
-                cells.append(self.get_cell_ID(polygon, int(refinement)))
+                cells.extend(self.get_cell_IDs(polygon, int(refinement)))
 
             if not unic_data:
                 if 'data' in polygon['properties']:
@@ -88,7 +104,8 @@ class ShpDGGSUtils:
                     data = polygon['properties']['data']
                 else:
                     data = polygon['properties']
-        return OptimalBoundary(cells=cells), Data(data)
+        # The cells of different polygons can overlap
+        return OptimalBoundary(cells=self.dggs.compact(cells)), Data(data)
 
     def get_boundary_dataset_from_shp_file(self, dir, id, with_ids, refinement=None, unic_data=False):
         import os
@@ -108,8 +125,8 @@ class ShpDGGSUtils:
                     boundary_id = boundary_id + polygon['properties']['id']
                 else:
                     assert refinement is not None
-                    cell = self.get_cell_ID(polygon, int(refinement))
-                    boundary_id = boundary_id + cell.value
+                    cells = self.get_cell_IDs(polygon, int(refinement))
+                    boundary_id = boundary_id + ''.join(cell.value for cell in cells)
 
                 if not unic_data:
                     if 'data' in polygon['properties']:
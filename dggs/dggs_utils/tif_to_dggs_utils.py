@@ -3,9 +3,10 @@ import rasterio
 from numpy import pi
 from math import radians, cos, sin, asin, sqrt
 
+from dggs.cell_ID import CellID
 from dggs.dataset.cell_dataset import CellDataSet
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 import os
 
 
@@ -13,7 +14,7 @@ class TifDGGSUtils:
 
     def __init__(self, dggs=None):
         if dggs is None:
-            dggs = rHEALPix(N_side=3, north_square=0, south_square=0)
+            dggs = get_rHEALPix(N_side=3, north_square=0, south_square=0)
         self.dggs = dggs
 
     def tif_file_treatment(self, file):
@@ -64,13 +65,15 @@ class TifDGGSUtils:
     def get_cell_dataset_from_tif_file(self, file, id):
         cds = CellDataSet(id=id)
         dataset, band, refinement = self.tif_file_treatment(file)
+        cols = list(range(dataset.width))
         for j in range(dataset.height):
             print(str(j) + "/" + str((dataset.height)))
-            for i in range(dataset.width):
-                cell_rHealPix_coords = dataset.xy(j, i)
-                cell = self.dggs.get_cell_from_projected_point(refinement, cell_rHealPix_coords)
+            # The cells of a whole row of pixels are computed at once
+            xs, ys = dataset.xy([j] * dataset.width, cols)
+            cell_IDs = self.dggs.get_cells_from_projected_points(refinement, xs, ys)
+            for i, cell_ID in enumerate(cell_IDs):
                 data = Data(int(band[j, i]))
-                cds.add(cell, data)
+                cds.add(CellID(str(cell_ID)), data)
             if j == 10:
                 break
 
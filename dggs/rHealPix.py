@@ -1,17 +1,20 @@
+import bisect
 import decimal
 import math
+import re
 from itertools import product
 from numpy import pi, base_repr
-from pyproj import Proj
-import matplotlib.path as mplPath
 import numpy as np
 
 from dggs.cell_ID import CellID
+from dggs.rHealPix_projection import rHEALPixProjection
 
 
 class rHEALPix():
     # Refinement 0 cell identifiers (different from other levels)
     cells_R0 = ['N', 'O', 'P', 'Q', 'R', 'S']
+    # A cell identifier in a concatenation of identifiers: a Refinement 0 identifier followed by the rest of the digits
+    cell_ID_pattern = re.compile('[' + ''.join(cells_R0) + '][^' + ''.join(cells_R0) + ']*')
     # Row-column coordinates of Refinement 0 cells
     coords_R0 = {
         'N': (0, 0),
@@ -24,12 +27,16 @@ class rHEALPix():
     R_q = 6374581.4671
     Ratio = 0.998882147091
 
-    def __init__(self, N_side=3, north_square=0, south_square=0, max_area=1):
+    # Available implementations of the rHEALPix projection
+    engines = ['pyproj', 'numpy']
+
+    def __init__(self, N_side=3, north_square=0, south_square=0, max_area=1, engine='pyproj'):
         """
         :param N_side: integer, minimum 2, so that each cell has N_side x N_side child cells.
         :param north_square: integer between 0 and 3 that indicate the position of the north polar square
         :param south_square: integer between 0 and 3 that indicate the position of the south polar square
         :param max_area: area, in square meters, of the smallest ellipsoidal grid cells
+        :param engine: implementation of the projection, 'pyproj' (pyproj.Proj) or 'numpy' (rHEALPixProjection)
         """
         self.N_side = N_side
 
@@ -62,19 +69,36 @@ class rHEALPix():
             self.cells_R0[5]: ((-pi + self.south_square * pi / 2) * self.Ratio, (-pi / 4) * self.Ratio)
         }
 
-        # Unfolded cube polygon
-        self.polygon = mplPath.Path(np.array([(-pi * rHEALPix.Ratio, -3 / 4 * pi * rHEALPix.Ratio),
-                                              (-1 / 2 * pi * rHEALPix.Ratio, -3 / 4 * pi * rHEALPix.Ratio),
-                                              (-1 / 2 * pi * rHEALPix.Ratio, -1 / 4 * pi * rHEALPix.Ratio),
-                                              (pi * rHEALPix.Ratio, -1 / 4 * pi * rHEALPix.Ratio),
-                                              (pi * rHEALPix.Ratio, 1 / 4 * pi * rHEALPix.Ratio),
-                                              (-1 / 2 * pi * rHEALPix.Ratio, 1 / 4 * pi * rHEALPix.Ratio),
-                                              (-1 / 2 * pi * rHEALPix.Ratio, 3 / 4 * pi * rHEALPix.Ratio),
-                                              (-pi * rHEALPix.Ratio, 3 / 4 * pi * rHEALPix.Ratio),
-                                              (-pi * rHEALPix.Ratio, -3 / 4 * pi * rHEALPix.Ratio)]))
+        # Packed 64-bit cell keys: the index of the refinement 0 cell in the 3 high bits (after the sign bit),
+        # the digits as a base N_side ** 2 number left-aligned to key_max_refinement digits in the next
+        # 55 bits, and the refinement in the 5 low bits. Keys sort like the cell identifiers, so the
+        # descendants of a cell are the keys between its key and get_key_range_end of its key.
+        self.key_refinement_bits = 5
+        self.key_digits_bits = 55
+        self.key_max_refinement = min(int(self.key_digits_bits * math.log(2) / math.log(N_side ** 2)),
+                                      2 ** self.key_refinement_bits - 1)
+        while (N_side ** 2) ** self.key_max_refinement >= 2 ** self.key_digits_bits:
+            self.key_max_refinement = self.key_max_refinement - 1
+
+        if engine not in self.engines:
+            raise ValueError('Unknown projection engine: ' + str(engine))
+        self.engine = engine
+        # The projection is built the first time it is used
+        self._proj = None
 
-        self.proj = Proj(proj='rhealpix', a=1, ellps='WGS84', south_square=self.south_square,
-                         north_square=self.north_square, lon_0=0, preserve_units=False)
+    @property
+    def proj(self):
+        """
+        :return: rHEALPix projection of the engine, pyproj.Proj or rHEALPixProjection
+        """
+        if self._proj is None:
+            if self.engine == 'numpy':
+                self._proj = rHEALPixProjection(north_square=self.north_square, south_square=self.south_square)
+            else:
+                from pyproj import Proj
+                self._proj = Proj(proj='rhealpix', a=1, ellps='WGS84', south_square=self.south_square,
+                                  north_square=self.north_square, lon_0=0, preserve_units=False)
+        return self._proj
 
     def cell_width(self, refinement):
         """
@@ -84,6 +108,14 @@ class rHEALPix():
         assert refinement >= 0
         return self.Ratio * (pi / 2) * self.N_side ** (-refinement)
 
+    def cell_area(self, refinement):
+        """
+        :param refinement: the resolution, minimum 0, of a cell
+        :return: area of a cell of that refinement in square meters (all the cells of a refinement have the same area)
+        """
+        assert refinement >= 0
+        return rHEALPix.R_q ** 2 * (2 * pi / 3) * self.N_side ** (-2 * refinement)
+
     def refinement_for_area(self, area):
         return int(math.ceil(math.log(rHEALPix.R_q ** 2 * (2 * pi / 3) * area ** -1) / (2 * math.log(self.N_side))))
 
@@ -265,18 +297,30 @@ class rHEALPix():
         False if any of the vertices of the bounding box are outside the polygon, that is, it is not a correct
         projected point.
         """
-        round_up_x = True
-        round_up_y = False
-        i = 0
-        for point in bounds:
-            if not self.polygon.contains_point(
-                    (self.round_coord(point[0], 8, round_up_x), self.round_coord(point[1], 8, round_up_y))):
-                return False
-            round_up_x = not round_up_x
-            i = i + 1
-            if i == 2:
-                round_up_y = not round_up_y
-        return True
+        bounds = np.asarray(bounds, dtype=np.float64)
+        index = np.arange(len(bounds))
+        xs = self.round_coords(bounds[:, 0], 8, index % 2 == 0)
+        ys = self.round_coords(bounds[:, 1], 8, index >= 2)
+        return bool(np.all(self.contains_points(xs, ys)))
+
+    def contains_points(self, xs, ys):
+        """
+        :param xs: array of x coordinates of points (projected coordinates)
+        :param ys: array of y coordinates of points (projected coordinates)
+        :return: boolean array, True for the points inside the unfolded cube (the six refinement 0 cells,
+        edges included)
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        width = self.Ratio * (pi / 2)
+        left, top = self.R0_ul_vertex[self.cells_R0[1]]
+        north_left = self.R0_ul_vertex[self.cells_R0[0]][0]
+        south_left = self.R0_ul_vertex[self.cells_R0[5]][0]
+
+        equatorial = (ys <= top) & (ys >= top - width) & (xs >= left) & (xs <= left + 4 * width)
+        north = (ys >= top) & (ys <= top + width) & (xs >= north_left) & (xs <= north_left + width)
+        south = (ys <= top - width) & (ys >= top - 2 * width) & (xs >= south_left) & (xs <= south_left + width)
+        return equatorial | north | south
 
     def get_cell_ul_vertex(self, cell):
         """
@@ -323,20 +367,8 @@ class rHEALPix():
         :return: geodetic coordinates of the vertices of the cell with id cell_id
                 [upper left, upper right, lower left, lower right, nucleus]
         """
-        projected_coordinates = self.get_cell_projected_coordinates(cell)
-        geodetic_coordinate = []
-        round_up_x = True
-        round_up_y = False
-        i = 0
-        for coord in projected_coordinates:
-            geodetic_coordinate.append(
-                self.proj(self.round_coord(coord[0], 8, round_up_x), self.round_coord(coord[1], 8, round_up_y),
-                          inverse=True))
-            round_up_x = not round_up_x
-            i = i + 1
-            if i == 2:
-                round_up_y = not round_up_y
-        return geodetic_coordinate
+        coordinates = self.get_geodetic_coordinates_from_projected([self.get_cell_projected_coordinates(cell)])
+        return [tuple(coord) for coord in coordinates[0].tolist()]
 
     def get_geodetic_coordinates_from_bbox(self, bounds):
         """
@@ -344,19 +376,7 @@ class rHEALPix():
         :return: geodetic coordinates from the points, bounds, that define a bounding box.
                 (upper left, upper right, lower left, lower right, nucleus)
         """
-        geodetic_coordinate = []
-        round_up_x = True
-        round_up_y = False
-        i = 0
-        for coord in bounds:
-            geodetic_coordinate.append(
-                list(self.proj(self.round_coord(coord[0], 8, round_up_x), self.round_coord(coord[1], 8, round_up_y),
-                               inverse=True)))
-            round_up_x = not round_up_x
-            i = i + 1
-            if i == 2:
-                round_up_y = not round_up_y
-        return geodetic_coordinate
+        return self.get_geodetic_coordinates_from_projected([bounds])[0].tolist()
 
     def get_c0_contains_p(self, point):
         """
@@ -497,3 +517,971 @@ class rHEALPix():
         for i in range(refinement):
             cell = cell + str(self.rowcol_cells[(int(row_id[i]), int(col_id[i]))])
         return CellID(cell)
+
+    def get_c0_indices(self, xs, ys):
+        """
+        :param xs: array of x coordinates of points (projected coordinates)
+        :param ys: array of y coordinates of points (projected coordinates)
+        :return: array with the index in cells_R0 of the refinement 0 cell that each point lies in,
+        or -1 if the point lies outside the unfolded cube.
+
+        Points in the interior of a cell get the same cell as in get_c0_contains_p. Points that lie
+        exactly on the border between two cells, for which get_c0_contains_p returns None, are
+        assigned to the first cell, in the order N, S, O, P, Q, R, whose closed region contains them.
+        """
+        ns = self.north_square
+        ss = self.south_square
+        R = self.Ratio
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+
+        # Same limits, and same order of checks, as in get_c0_contains_p
+        limits = [
+            (0, (R * pi / 4, R * 3 * pi / 4), (R * (-pi + ns * (pi / 2)), R * (-pi / 2 + ns * (pi / 2)))),
+            (5, (-R * 3 * pi / 4, -R * pi / 4), (R * (-pi + ss * (pi / 2)), R * (-pi / 2 + ss * (pi / 2)))),
+            (1, (-R * pi / 4, R * pi / 4), (-R * pi, -R * pi / 2)),
+            (2, (-R * pi / 4, R * pi / 4), (-R * pi / 2, 0)),
+            (3, (-R * pi / 4, R * pi / 4), (0, R * pi / 2)),
+            (4, (-R * pi / 4, R * pi / 4), (R * pi / 2, R * pi)),
+        ]
+
+        indices = np.full(xs.shape, -1, dtype=np.int64)
+        for index, (y_min, y_max), (x_min, x_max) in limits:
+            inside = (indices == -1) & (y_min < ys) & (ys < y_max) & (x_min < xs) & (xs < x_max)
+            indices[inside] = index
+        for index, (y_min, y_max), (x_min, x_max) in limits:
+            inside = (indices == -1) & (y_min <= ys) & (ys <= y_max) & (x_min <= xs) & (xs <= x_max)
+            indices[inside] = index
+        return indices
+
+    def get_rowcol_from_projected_points(self, refinement, xs, ys):
+        """
+        :param refinement: the refinement, minimum 0, of the cells
+        :param xs: array of x coordinates of points (projected coordinates)
+        :param ys: array of y coordinates of points (projected coordinates)
+        :return: three integer arrays (c0, rows, cols): the index in cells_R0 of the refinement 0 cell
+        containing each point and the row and column, inside that refinement 0 cell, of the
+        refinement cell containing each point. Rows and columns range from 0 to N_side ** refinement - 1.
+        """
+        assert refinement >= 0
+
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+
+        c0 = self.get_c0_indices(xs, ys)
+        if np.any(c0 < 0):
+            raise ValueError('Some points lie outside the rHEALPix unfolded cube')
+
+        # Horizontal and vertical distances from (x, y) to ul(cell), as in get_cell_from_point
+        ul_x = np.array([self.R0_ul_vertex[c][0] for c in self.cells_R0])
+        ul_y = np.array([self.R0_ul_vertex[c][1] for c in self.cells_R0])
+        dx = np.abs(ul_x[c0] - xs)
+        dy = np.abs(ul_y[c0] - ys)
+
+        dx = np.where(dx == 1, dx - (0.5 * self.cell_width(self.max_refinement)), dx)
+        dy = np.where(dy == 1, dy - (0.5 * self.cell_width(self.max_refinement)), dy)
+
+        # Truncating the base N_side expansions of dx/w and dy/w at refinement digits gives
+        # the column and row of the cell, in integer form.
+        w = self.cell_width(0)
+        n_cells = self.N_side ** refinement
+        rows = np.clip(np.trunc(dy / w * n_cells), 0, n_cells - 1).astype(np.int64)
+        cols = np.clip(np.trunc(dx / w * n_cells), 0, n_cells - 1).astype(np.int64)
+
+        return c0, rows, cols
+
+    def get_digits_from_rowcol(self, refinement, rows, cols):
+        """
+        :param refinement: the refinement, minimum 0, of the cells
+        :param rows: integer array of rows of the cells inside their refinement 0 cell
+        :param cols: integer array of columns of the cells inside their refinement 0 cell
+        :return: integer array of shape (n, refinement) with the digits (0 to N_side ** 2 - 1)
+        of the identifier of each cell, from refinement 1 to refinement.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        digits = np.empty((rows.size, refinement), dtype=np.int64)
+        for i in range(refinement):
+            divisor = self.N_side ** (refinement - 1 - i)
+            digits[:, i] = (rows.ravel() // divisor % self.N_side) * self.N_side + cols.ravel() // divisor % self.N_side
+        return digits
+
+    def get_cell_values_from_digits(self, c0, digits):
+        """
+        :param c0: integer array with the index in cells_R0 of the refinement 0 cell of each cell
+        :param digits: integer array of shape (n, refinement) with the digits of each cell
+        :return: NumPy array with the identifiers (CellID values) of the cells
+        """
+        c0 = np.asarray(c0, dtype=np.int64).ravel()
+        n, refinement = digits.shape
+        if self.N_side ** 2 <= 10:
+            # Every digit is a single character, so the identifiers are built as a byte matrix
+            chars = np.empty((n, refinement + 1), dtype=np.uint8)
+            chars[:, 0] = np.frombuffer(''.join(self.cells_R0).encode('ascii'), dtype=np.uint8)[c0]
+            chars[:, 1:] = digits + ord('0')
+            return chars.view('S%d' % (refinement + 1)).ravel().astype('U%d' % (refinement + 1))
+        return np.array([self.cells_R0[c] + ''.join(str(d) for d in row) for c, row in zip(c0, digits.tolist())])
+
+    def get_cells_from_projected_points(self, refinement, xs, ys):
+        """
+        :param refinement: the refinement, minimum 0, of the cells
+        :param xs: array of x coordinates of points (projected coordinates)
+        :param ys: array of y coordinates of points (projected coordinates)
+        :return: NumPy string array with the identifiers (CellID values, not CellID objects) of the cells containing
+        each point, in the order of the points
+        """
+        c0, rows, cols = self.get_rowcol_from_projected_points(refinement, xs, ys)
+        return self.get_cell_values_from_digits(c0, self.get_digits_from_rowcol(refinement, rows, cols))
+
+    def get_cells_from_points(self, refinement, lons, lats):
+        """
+        :param refinement: the refinement, minimum 0, of the cells
+        :param lons: array of longitudes of points (geodetic coordinates)
+        :param lats: array of latitudes of points (geodetic coordinates)
+        :return: NumPy string array with the identifiers (CellID values, not CellID objects) of the cells containing
+        each point, in the order of the points: the values of the CellIDs returned, one by one, by
+        get_cell_from_point. Millions of points do not create one object each: wrap with CellID only the values
+        that need it, or use get_cell_keys_from_points for a packed array of cells (see CellIDArray).
+        """
+        lons = np.round(np.asarray(lons, dtype=np.float64), 8)
+        lats = np.round(np.asarray(lats, dtype=np.float64), 8)
+        xs, ys = self.proj(lons, lats)  # projected coordinates (rHEALPix), a single call for all points
+        return self.get_cells_from_projected_points(refinement, xs, ys)
+
+    def get_digits_from_cells(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId (or their string values)
+        :return: three integer arrays (c0, refinements, digits): the index in cells_R0 of the refinement 0
+        cell of each cell, the refinement of each cell and an array of shape (n, max refinement) with the
+        digits of each cell, padded with zeros after its refinement.
+        """
+        values = [cell.value if isinstance(cell, CellID) else cell for cell in cells]
+        if len(values) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros((0, 0), dtype=np.int64)
+
+        values = np.array(values)
+        length = values.dtype.itemsize // 4
+        codes = values.view(np.uint32).reshape(len(values), length).astype(np.int64)
+
+        lookup = np.full(128, -1, dtype=np.int64)
+        for index, c in enumerate(self.cells_R0):
+            lookup[ord(c)] = index
+        c0 = lookup[codes[:, 0]]
+        if np.any(c0 < 0):
+            raise ValueError('Some cell identifiers do not start with a refinement 0 cell')
+
+        refinements = np.count_nonzero(codes, axis=1) - 1
+        digits = np.where(codes[:, 1:] > 0, codes[:, 1:] - ord('0'), 0)
+        return c0, refinements, digits
+
+    def get_cells_rowcol(self, cells, refinement=None):
+        """
+        :param cells: sequence of cell identifiers, of type CellId (or their string values)
+        :param refinement: common refinement of the grid, by default the maximum refinement of the cells
+        :return: three integer arrays (rows, cols, spans): the absolute row and column, in the grid of the
+        unfolded cube at the common refinement, of the upper left subcell of each cell, and the number
+        of rows (and columns) that each cell covers in that grid.
+        """
+        c0, refinements, digits = self.get_digits_from_cells(cells)
+        if refinement is None:
+            refinement = digits.shape[1]
+        if refinement < digits.shape[1]:
+            raise ValueError('The common refinement must be at least the maximum refinement of the cells')
+
+        rows = np.zeros(len(c0), dtype=np.int64)
+        cols = np.zeros(len(c0), dtype=np.int64)
+        for i in range(digits.shape[1]):
+            rows = rows * self.N_side + digits[:, i] // self.N_side
+            cols = cols * self.N_side + digits[:, i] % self.N_side
+        n = self.N_side ** refinement
+        rows = rows * self.N_side ** (refinement - digits.shape[1])
+        cols = cols * self.N_side ** (refinement - digits.shape[1])
+
+        # Position of the refinement 0 cells in the unfolded cube, with the polar squares
+        # above and below the equatorial cells north_square and south_square
+        face_rows = np.array([self.coords_R0[c][0] for c in self.cells_R0])
+        face_cols = np.array([self.coords_R0[c][1] for c in self.cells_R0])
+        face_cols[0] = self.north_square
+        face_cols[-1] = self.south_square
+
+        spans = self.N_side ** (refinement - refinements)
+        return face_rows[c0] * n + rows, face_cols[c0] * n + cols, spans
+
+    def get_limit_cells(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId
+        :return: Top cell, bottom cell, leftmost cell, and rightmost cell
+        """
+        rows, cols, spans = self.get_cells_rowcol(cells)
+        # Ties are broken in favour of the largest cell and then of the last one, as up, down, left and right do
+        order = -np.arange(len(spans))
+        top = np.lexsort((order, -spans, rows))[0]
+        bottom = np.lexsort((order, -spans, -(rows + spans)))[0]
+        left = np.lexsort((order, -spans, cols))[0]
+        right = np.lexsort((order, -spans, -(cols + spans)))[0]
+        return cells[top], cells[bottom], cells[left], cells[right]
+
+    def get_cells_bbox(self, cells, projected=False):
+        """
+        :param cells: sequence of cell identifiers, of type CellId
+        :param projected: if True, the bbox of more than one cell is given in projected coordinates
+        :return: geodetic coordinates of the bbox of the cells
+        [lower left, lower right, upper right, upper left, lower left]
+
+        The upper left and lower right vertices of the bbox are taken from the limit cells. If the projected bbox
+        is not inside the unfolded cube, the geodetic bbox of the vertices of the limit cells is used instead.
+        """
+        if len(cells) == 1:
+            ul, _, _, dr, _ = self.get_cells_projected_coordinates(cells)[0].tolist()
+            bbox_bounds = self.get_geodetic_coordinates_from_bbox([[ul[0], ul[1]], [dr[0], ul[1]],
+                                                                   [ul[0], dr[1]], [dr[0], dr[1]]])
+        else:
+            limit_cells = list(self.get_limit_cells(cells))
+            top, bottom, left, right = self.get_cells_projected_coordinates(limit_cells).tolist()
+            ul = (left[0][0], top[0][1])
+            dr = (right[3][0], bottom[3][1])
+            bbox_bounds = [[ul[0], ul[1]], [dr[0], ul[1]], [ul[0], dr[1]], [dr[0], dr[1]]]
+
+            if not projected:
+                if self.check_bounds(bbox_bounds):
+                    bbox_bounds = self.get_geodetic_coordinates_from_bbox(bbox_bounds)
+                else:
+                    coordinates = self.get_cells_geodetic_coordinates(limit_cells)
+                    left, down = np.min(coordinates, axis=(0, 1), initial=180).tolist()
+                    right, up = np.max(coordinates, axis=(0, 1), initial=-180).tolist()
+                    bbox_bounds = [[left, up], [right, up], [left, down], [right, down]]
+
+        return [[bbox_bounds[2], bbox_bounds[3],
+                 bbox_bounds[1], bbox_bounds[0],
+                 bbox_bounds[2]]]
+
+    def round_coords(self, values, decimals, up):
+        """
+        :param values: array of real numbers that you want to round
+        :param decimals: number of decimals to round
+        :param up: boolean, or boolean array, if True rounds upward, if False rounds downward
+        :return: array of rounded real numbers, equal to the ones given by round_coord but computed with
+        float operations.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        scale = 10.0 ** decimals
+        product = values * scale
+
+        # Exact error of the product (Dekker's algorithm), so that values whose product rounds to an
+        # integer are still rounded in the right direction, as Decimal does.
+        split = 134217729.0
+        c = split * values
+        v_hi = c - (c - values)
+        v_lo = values - v_hi
+        c = split * scale
+        s_hi = c - (c - scale)
+        s_lo = scale - s_hi
+        error = ((v_hi * s_hi - product) + v_hi * s_lo + v_lo * s_hi) + v_lo * s_lo
+
+        ceil = np.ceil(product)
+        ceil = np.where((ceil == product) & (error > 0), ceil + 1, ceil)
+        floor = np.floor(product)
+        floor = np.where((floor == product) & (error < 0), floor - 1, floor)
+        return np.where(up, ceil, floor) / scale
+
+    def get_cells_projected_coordinates(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId
+        :return: array of shape (n, 5, 2) with the projected coordinates of the vertices of each cell
+        [upper left, upper right, lower left, lower right, nucleus]
+        """
+        c0, refinements, digits = self.get_digits_from_cells(cells)
+
+        # Same operations as get_cell_ul_vertex, so the results are identical
+        dx = np.zeros(len(c0))
+        dy = np.zeros(len(c0))
+        for i in range(1, digits.shape[1] + 1):
+            dx = dx + self.N_side ** (-i) * (digits[:, i - 1] % self.N_side)
+            dy = dy + self.N_side ** (-i) * (digits[:, i - 1] // self.N_side)
+
+        x0 = np.array([self.R0_ul_vertex[c][0] for c in self.cells_R0])[c0]
+        y0 = np.array([self.R0_ul_vertex[c][1] for c in self.cells_R0])[c0]
+        x = x0 + self.cell_width(0) * dx
+        y = y0 - self.cell_width(0) * dy
+
+        widths = np.array([self.cell_width(r) for r in range(digits.shape[1] + 1)])
+        w = widths[refinements]
+
+        coordinates = np.empty((len(c0), 5, 2))
+        coordinates[:, 0, 0] = x
+        coordinates[:, 0, 1] = y
+        coordinates[:, 1, 0] = x + w
+        coordinates[:, 1, 1] = y
+        coordinates[:, 2, 0] = x
+        coordinates[:, 2, 1] = y - w
+        coordinates[:, 3, 0] = x + w
+        coordinates[:, 3, 1] = y - w
+        coordinates[:, 4, 0] = x + w / 2
+        coordinates[:, 4, 1] = y - w / 2
+        return coordinates
+
+    def get_geodetic_coordinates_from_projected(self, coordinates):
+        """
+        :param coordinates: array of shape (..., k, 2) of projected coordinates (rHEALPix) of groups of
+        k vertices, in the order [upper left, upper right, lower left, lower right, nucleus]
+        :return: array with the same shape and the geodetic coordinates of the vertices
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        k = coordinates.shape[-2]
+
+        # Each vertex is rounded towards the inside of its bounding box, as in get_cell_geodetic_coordinates
+        round_up_x = np.array([True, False, True, False, True])[:k]
+        round_up_y = np.array([False, False, True, True, True])[:k]
+        xs = self.round_coords(coordinates[..., 0], 8, round_up_x)
+        ys = self.round_coords(coordinates[..., 1], 8, round_up_y)
+
+        lons, lats = self.proj(xs.ravel(), ys.ravel(), inverse=True)
+        return np.stack([np.reshape(lons, xs.shape), np.reshape(lats, ys.shape)], axis=-1)
+
+    def get_cells_geodetic_coordinates(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId
+        :return: array of shape (n, 5, 2) with the geodetic coordinates of the vertices of each cell
+        [upper left, upper right, lower left, lower right, nucleus]
+        """
+        return self.get_geodetic_coordinates_from_projected(self.get_cells_projected_coordinates(cells))
+
+    def get_keys_from_digits(self, c0, refinements, digits):
+        """
+        :param c0: integer array with the index in cells_R0 of the refinement 0 cell of each cell
+        :param refinements: integer array with the refinement of each cell
+        :param digits: integer array of shape (n, max refinement) with the digits of each cell,
+        padded with zeros after its refinement
+        :return: array of packed 64-bit keys (np.int64) of the cells
+        """
+        c0 = np.asarray(c0, dtype=np.int64)
+        refinements = np.asarray(refinements, dtype=np.int64)
+        if digits.shape[1] > self.key_max_refinement:
+            raise ValueError('Packed keys only support cells up to refinement ' + str(self.key_max_refinement))
+
+        base = self.N_side ** 2
+        value = np.zeros(len(c0), dtype=np.int64)
+        for i in range(digits.shape[1]):
+            value = value * base + digits[:, i]
+        value = value * base ** (self.key_max_refinement - digits.shape[1])
+
+        return (c0 << (self.key_digits_bits + self.key_refinement_bits)) | \
+               (value << self.key_refinement_bits) | refinements
+
+    def get_digits_from_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: three integer arrays (c0, refinements, digits), as returned by get_digits_from_cells
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        c0 = keys >> (self.key_digits_bits + self.key_refinement_bits)
+        refinements = keys & (2 ** self.key_refinement_bits - 1)
+        value = (keys >> self.key_refinement_bits) & (2 ** self.key_digits_bits - 1)
+
+        base = self.N_side ** 2
+        max_refinement = int(refinements.max()) if len(keys) > 0 else 0
+        digits = np.empty((len(keys), max_refinement), dtype=np.int64)
+        for i in range(max_refinement):
+            digits[:, i] = value // base ** (self.key_max_refinement - 1 - i) % base
+        digits[np.arange(max_refinement) >= refinements[:, None]] = 0
+        return c0, refinements, digits
+
+    def get_cell_keys(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId (or their string values)
+        :return: array of packed 64-bit keys (np.int64) of the cells
+        """
+        return self.get_keys_from_digits(*self.get_digits_from_cells(cells))
+
+    def get_cells_from_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: NumPy array with the identifiers (CellID values) of the cells
+        """
+        c0, refinements, digits = self.get_digits_from_keys(keys)
+        values = self.get_cell_values_from_digits(c0, digits)
+        if len(values) > 0 and np.any(refinements < digits.shape[1]):
+            values = np.array([value[:refinement + 1] for value, refinement in zip(values, refinements.tolist())])
+        return values
+
+    def split_boundary_ID(self, boundary_ID):
+        """
+        :param boundary_ID: string with the concatenated identifiers of cells, such as 'N11N12O0'
+        :return: sorted list with the identifiers (strings) of the cells
+        """
+        return sorted(self.cell_ID_pattern.findall(boundary_ID))
+
+    def get_boundary_ID_keys(self, boundary_ID):
+        """
+        :param boundary_ID: string with the concatenated identifiers of cells, such as 'N11N12O0'
+        :return: sorted array of packed 64-bit keys (np.int64) of the cells, without building their identifiers
+        """
+        return np.sort(self.get_cell_keys(self.cell_ID_pattern.findall(boundary_ID)))
+
+    def get_cell_key(self, cell):
+        """
+        :param cell: cell identifier, of type CellId
+        :return: packed 64-bit key of the cell, as an integer
+        """
+        return int(self.get_cell_keys([cell])[0])
+
+    def get_cell_from_key(self, key):
+        """
+        :param key: packed 64-bit key of a cell
+        :return: CellId with that key
+        """
+        return CellID(str(self.get_cells_from_keys([key])[0]))
+
+    def get_key_refinements(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: integer array with the refinement of each cell
+        """
+        return np.asarray(keys, dtype=np.int64) & (2 ** self.key_refinement_bits - 1)
+
+    def get_key_range_end(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: array with the largest key that a descendant of each cell can have. The keys of the cell
+        and all its descendants, and only those, lie between the key of the cell and this value.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        refinements = self.get_key_refinements(keys)
+        span = (self.N_side ** 2) ** (self.key_max_refinement - refinements) - 1
+        return ((keys >> self.key_refinement_bits) + span) << self.key_refinement_bits | self.key_max_refinement
+
+    def get_cell_keys_from_points(self, refinement, lons, lats):
+        """
+        :param refinement: the refinement, minimum 0, of the cells
+        :param lons: array of longitudes of points (geodetic coordinates)
+        :param lats: array of latitudes of points (geodetic coordinates)
+        :return: array of packed 64-bit keys of the cells containing each point
+        """
+        lons = np.round(np.asarray(lons, dtype=np.float64), 8)
+        lats = np.round(np.asarray(lats, dtype=np.float64), 8)
+        xs, ys = self.proj(lons, lats)
+        c0, rows, cols = self.get_rowcol_from_projected_points(refinement, xs, ys)
+        digits = self.get_digits_from_rowcol(refinement, rows, cols)
+        return self.get_keys_from_digits(c0, np.full(len(c0), refinement), digits)
+
+    def get_rowcol_from_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: four integer arrays (c0, refinements, rows, cols): the index in cells_R0 of the refinement 0
+        cell of each cell, its refinement and its row and column inside the refinement 0 cell
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        c0 = keys >> (self.key_digits_bits + self.key_refinement_bits)
+        refinements = self.get_key_refinements(keys)
+        base = self.N_side ** 2
+        value = ((keys >> self.key_refinement_bits) & (2 ** self.key_digits_bits - 1)) // \
+            base ** (self.key_max_refinement - refinements)
+
+        rows = np.zeros(len(keys), dtype=np.int64)
+        cols = np.zeros(len(keys), dtype=np.int64)
+        power = 1
+        for _ in range(int(refinements.max()) if len(keys) > 0 else 0):
+            digits = value % base
+            rows = rows + digits // self.N_side * power
+            cols = cols + digits % self.N_side * power
+            value = value // base
+            power = power * self.N_side
+        return c0, refinements, rows, cols
+
+    def get_keys_from_rowcol(self, c0, refinements, rows, cols):
+        """
+        :param c0: integer array with the index in cells_R0 of the refinement 0 cell of each cell
+        :param refinements: integer array with the refinement of each cell
+        :param rows: integer array with the row of each cell inside its refinement 0 cell
+        :param cols: integer array with the column of each cell inside its refinement 0 cell
+        :return: array of packed 64-bit keys (np.int64) of the cells
+        """
+        c0 = np.asarray(c0, dtype=np.int64)
+        refinements = np.asarray(refinements, dtype=np.int64)
+        if np.any(refinements > self.key_max_refinement):
+            raise ValueError('Packed keys only support cells up to refinement ' + str(self.key_max_refinement))
+        base = self.N_side ** 2
+
+        value = np.zeros(len(refinements), dtype=np.int64)
+        power = 1
+        for _ in range(int(refinements.max()) if len(refinements) > 0 else 0):
+            value = value + (rows % self.N_side * self.N_side + cols % self.N_side) * power
+            rows = rows // self.N_side
+            cols = cols // self.N_side
+            power = power * base
+        value = value * base ** (self.key_max_refinement - refinements)
+
+        return (c0 << (self.key_digits_bits + self.key_refinement_bits)) | \
+               (value << self.key_refinement_bits) | refinements
+
+    def get_neighbours_rowcol(self, c0, rows, cols, n, drow, dcol):
+        """
+        :param c0: integer array with the index in cells_R0 of the refinement 0 cell of each cell
+        :param rows: integer array with the row of each cell inside its refinement 0 cell
+        :param cols: integer array with the column of each cell inside its refinement 0 cell
+        :param n: integer array with the number of rows of a refinement 0 cell at the refinement of each cell
+        :param drow: row offset, -1, 0 or 1
+        :param dcol: column offset, -1, 0 or 1
+        :return: four arrays (c0, rows, cols, valid) with the neighbour of each cell in the given direction.
+        When the neighbour is outside the refinement 0 cell, it is found across the shared edge of the cube.
+        valid is False for diagonal neighbours across a corner of the cube, which do not exist.
+        """
+        rows = rows + drow
+        cols = cols + dcol
+        up = rows < 0
+        down = rows >= n
+        left = cols < 0
+        right = cols >= n
+        valid = ~((up | down) & (left | right))
+
+        last = n - 1
+        north = c0 == 0
+        south = c0 == 5
+        # Column of the equatorial cells in the unfolded cube, relative to the polar squares
+        k = c0 - 1
+        to_north = (k - self.north_square) % 4
+        to_south = (k - self.south_square) % 4
+
+        cases = [
+            north & down, north & right, north & left, north & up,
+            south & up, south & right, south & left, south & down,
+            ~north & ~south & up & (to_north == 0), ~north & ~south & up & (to_north == 1),
+            ~north & ~south & up & (to_north == 3), ~north & ~south & up & (to_north == 2),
+            ~north & ~south & down & (to_south == 0), ~north & ~south & down & (to_south == 1),
+            ~north & ~south & down & (to_south == 3), ~north & ~south & down & (to_south == 2),
+            ~north & ~south & right, ~north & ~south & left
+        ]
+        new_c0 = np.select(cases, [
+            1 + self.north_square, 1 + (self.north_square + 1) % 4,
+            1 + (self.north_square - 1) % 4, 1 + (self.north_square + 2) % 4,
+            1 + self.south_square, 1 + (self.south_square + 1) % 4,
+            1 + (self.south_square - 1) % 4, 1 + (self.south_square + 2) % 4,
+            0, 0, 0, 0, 5, 5, 5, 5, 1 + (k + 1) % 4, 1 + (k - 1) % 4
+        ], c0)
+        new_rows = np.select(cases, [
+            0, 0, 0, 0, last, last, last, last,
+            last, last - cols, cols, 0, 0, cols, last - cols, last,
+            rows, rows
+        ], rows)
+        new_cols = np.select(cases, [
+            cols, last - rows, rows, last - cols, cols, rows, last - rows, last - cols,
+            cols, last, 0, last - cols, cols, last, 0, last - cols,
+            0, last
+        ], cols)
+        return new_c0, new_rows, new_cols, valid
+
+    def get_neighbour_keys(self, keys, diagonals=True):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: array of shape (n, 8) (or (n, 4) without diagonals) with the keys of the neighbours of
+        each cell: up, right, down, left, upper left, upper right, lower right and lower left, following
+        the orientation of the refinement 0 cell of each cell. Missing neighbours (across a corner of
+        the cube) are -1.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        directions = [(-1, 0), (0, 1), (1, 0), (0, -1), (-1, -1), (-1, 1), (1, 1), (1, -1)]
+        if not diagonals:
+            directions = directions[:4]
+
+        c0, refinements, rows, cols = self.get_rowcol_from_keys(keys)
+        n = self.N_side ** refinements
+        neighbours = np.full((len(keys), len(directions)), -1, dtype=np.int64)
+        for index, (drow, dcol) in enumerate(directions):
+            new_c0, new_rows, new_cols, valid = self.get_neighbours_rowcol(c0, rows, cols, n, drow, dcol)
+            if np.any(valid):
+                neighbours[valid, index] = self.get_keys_from_rowcol(
+                    new_c0[valid], refinements[valid], new_rows[valid], new_cols[valid])
+        return neighbours
+
+    def get_k_ring_keys(self, keys, k, diagonals=True):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :param k: number of rings, minimum 0
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: sorted array with the keys of the cells at most k neighbour steps away from any of the cells,
+        including the cells themselves
+        """
+        assert k >= 0
+        ring = np.unique(np.asarray(keys, dtype=np.int64))
+        frontier = ring
+        for _ in range(k):
+            neighbours = self.get_neighbour_keys(frontier, diagonals)
+            neighbours = np.unique(neighbours[neighbours >= 0])
+            frontier = np.setdiff1d(neighbours, ring, assume_unique=True)
+            if len(frontier) == 0:
+                break
+            ring = np.union1d(ring, frontier)
+        return ring
+
+    def neighbours(self, cell, diagonals=True):
+        """
+        :param cell: cell identifier, of type CellId
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: list of CellId with the neighbours of the cell (8 neighbours, or 7 next to a corner of the cube,
+        and 4 neighbours without diagonals)
+        """
+        neighbours = self.get_neighbour_keys([self.get_cell_key(cell)], diagonals)[0]
+        return [CellID(value) for value in self.get_cells_from_keys(neighbours[neighbours >= 0])]
+
+    def k_ring(self, cell, k, diagonals=True):
+        """
+        :param cell: cell identifier, of type CellId
+        :param k: number of rings, minimum 0
+        :param diagonals: if True, the neighbours that only share a vertex are included
+        :return: sorted list of CellId with the cells at most k neighbour steps away from the cell, including it
+        """
+        ring = self.get_k_ring_keys([self.get_cell_key(cell)], k, diagonals)
+        return [CellID(value) for value in self.get_cells_from_keys(ring)]
+
+    def parent(self, cell, refinement=None):
+        """
+        :param cell: cell identifier, of type CellId
+        :param refinement: refinement of the ancestor, by default the refinement of the cell minus 1
+        :return: CellId of the ancestor of the cell at that refinement
+        """
+        if refinement is None:
+            refinement = cell.get_refinement() - 1
+        assert 0 <= refinement <= cell.get_refinement()
+        return CellID(cell.value[:refinement + 1])
+
+    def children(self, cell):
+        """
+        :param cell: cell identifier, of type CellId
+        :return: generator of the N_side x N_side child cells (CellId) of the cell, in order
+        """
+        for digit in range(self.N_side ** 2):
+            yield CellID(cell.value + str(digit))
+
+    def descendants(self, cell, refinement):
+        """
+        :param cell: cell identifier, of type CellId
+        :param refinement: refinement of the descendants, at least the refinement of the cell
+        :return: generator of the descendant cells (CellId) of the cell at that refinement, in order.
+        The cells are generated lazily, so no list of descendants is built.
+        """
+        assert refinement >= cell.get_refinement()
+        digits = [str(digit) for digit in range(self.N_side ** 2)]
+        for suffix in product(digits, repeat=refinement - cell.get_refinement()):
+            yield CellID(cell.value + ''.join(suffix))
+
+    def get_parent_keys(self, keys, refinement=None):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :param refinement: refinement of the ancestors, by default the refinement of each cell minus 1
+        :return: array with the keys of the ancestors of the cells at that refinement
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        refinements = self.get_key_refinements(keys)
+        if refinement is None:
+            refinement = refinements - 1
+        assert np.all((refinement >= 0) & (refinement <= refinements))
+        span = (self.N_side ** 2) ** (self.key_max_refinement - refinement)
+        value = (keys >> self.key_refinement_bits) & (2 ** self.key_digits_bits - 1)
+        face = keys >> (self.key_digits_bits + self.key_refinement_bits) << self.key_digits_bits
+        return ((face | value // span * span) << self.key_refinement_bits) | refinement
+
+    def get_children_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: array of shape (n, N_side ** 2) with the keys of the children of each cell, in order
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        refinements = self.get_key_refinements(keys)
+        if np.any(refinements >= self.key_max_refinement):
+            raise ValueError('Packed keys only support cells up to refinement ' + str(self.key_max_refinement))
+        span = (self.N_side ** 2) ** (self.key_max_refinement - refinements - 1)
+        digits = np.arange(self.N_side ** 2, dtype=np.int64)
+        return keys[:, None] + 1 + ((span[:, None] * digits) << self.key_refinement_bits)
+
+    def get_descendant_keys(self, keys, refinement):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :param refinement: refinement of the descendants, at least the refinement of every cell
+        :return: array with the keys of the descendants of the cells at that refinement, in the order of the cells
+        """
+        chunks = list(self.iter_descendant_keys(keys, refinement))
+        if len(chunks) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+    def iter_descendant_keys(self, keys, refinement, chunk_size=2 ** 20):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :param refinement: refinement of the descendants, at least the refinement of every cell
+        :param chunk_size: maximum number of keys of each array
+        :return: generator of arrays with the keys of the descendants of the cells at that refinement,
+        in the order of the cells, so that a large expansion never has to fit in memory at once. Every array
+        but the last one has chunk_size keys, which can belong to several cells.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        refinements = self.get_key_refinements(keys)
+        if refinement > self.key_max_refinement:
+            raise ValueError('Packed keys only support cells up to refinement ' + str(self.key_max_refinement))
+        assert np.all(refinements <= refinement)
+
+        step = (self.N_side ** 2) ** (self.key_max_refinement - refinement) << self.key_refinement_bits
+        firsts = keys - refinements + refinement
+        counts = (self.N_side ** 2) ** (refinement - refinements)
+        # Position of the first descendant of each cell in the whole expansion, and of the one after its last
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        total = int(ends[-1]) if len(keys) > 0 else 0
+        for start in range(0, total, chunk_size):
+            positions = np.arange(start, min(start + chunk_size, total), dtype=np.int64)
+            cells = np.searchsorted(ends, positions, side='right')
+            yield firsts[cells] + step * (positions - starts[cells])
+
+    def compact(self, cells):
+        """
+        :param cells: sequence of cell identifiers, of type CellId
+        :return: sorted list with the smallest set of cells (CellId) that covers the same area: cells covered by
+        another cell are removed and complete groups of sibling cells are replaced by their parent, recursively.
+        """
+        last_digit = str(self.N_side ** 2 - 1)
+        siblings = self.N_side ** 2
+        stack = []
+        # The cells are sorted once: a cell is followed by its descendants and its siblings follow each other
+        for value in sorted(set(cell.value for cell in cells)):
+            if len(stack) > 0 and value.startswith(stack[-1]):
+                continue
+            stack.append(value)
+            while len(stack) >= siblings and len(value) > 1 and value[-1] == last_digit:
+                parent = value[:-1]
+                group = stack[-siblings:]
+                if group[0] != parent + '0' or not all(len(sibling) == len(value) for sibling in group):
+                    break
+                del stack[-siblings:]
+                stack.append(parent)
+                value = parent
+        return [CellID(value) for value in stack]
+
+    def cells_union(self, cells_a, cells_b):
+        """
+        :param cells_a: sequence of cell identifiers, of type CellId
+        :param cells_b: sequence of cell identifiers, of type CellId
+        :return: sorted list with the smallest set of cells (CellId) that covers the area of both sequences
+        """
+        return self.compact(list(cells_a) + list(cells_b))
+
+    def cells_intersection(self, cells_a, cells_b):
+        """
+        :param cells_a: sequence of cell identifiers, of type CellId
+        :param cells_b: sequence of cell identifiers, of type CellId
+        :return: sorted list with the smallest set of cells (CellId) that covers the area common to both sequences
+        """
+        values_a = [cell.value for cell in self.compact(cells_a)]
+        values_b = [cell.value for cell in self.compact(cells_b)]
+        values = []
+        i = 0
+        j = 0
+        # Merge of the sorted cells: a cell is in the intersection if it is inside a cell of the other sequence
+        while i < len(values_a) and j < len(values_b):
+            if values_a[i].startswith(values_b[j]):
+                values.append(values_a[i])
+                i += 1
+            elif values_b[j].startswith(values_a[i]):
+                values.append(values_b[j])
+                j += 1
+            elif values_a[i] < values_b[j]:
+                i += 1
+            else:
+                j += 1
+        return self.compact([CellID(value) for value in values])
+
+    def cells_difference(self, cells_a, cells_b):
+        """
+        :param cells_a: sequence of cell identifiers, of type CellId
+        :param cells_b: sequence of cell identifiers, of type CellId
+        :return: sorted list with the smallest set of cells (CellId) that covers the area of cells_a that is not
+        in cells_b. A cell of cells_a that has cells of cells_b inside is split only along their paths.
+        """
+        values_a = [cell.value for cell in self.compact(cells_a)]
+        values_b = [cell.value for cell in self.compact(cells_b)]
+        digits = [str(digit) for digit in range(self.N_side ** 2)]
+        values = []
+        j = 0
+        for value in values_a:
+            j = bisect.bisect_left(values_b, value, j)
+            if j > 0 and value.startswith(values_b[j - 1]):
+                # The cell is inside a cell of cells_b
+                continue
+            # Cells of cells_b inside the cell, as a stack of (cell, first, last) ranges
+            end = bisect.bisect_left(values_b, value + '~', j)
+            stack = [(value, j, end)]
+            while len(stack) > 0:
+                cell, start, end = stack.pop()
+                if start == end:
+                    values.append(cell)
+                elif values_b[start] != cell:
+                    for digit in reversed(digits):
+                        child = cell + digit
+                        child_start = bisect.bisect_left(values_b, child, start, end)
+                        child_end = bisect.bisect_left(values_b, child + '~', child_start, end)
+                        stack.append((child, child_start, child_end))
+        return [CellID(value) for value in values]
+
+    def cells_symmetric_difference(self, cells_a, cells_b):
+        """
+        :param cells_a: sequence of cell identifiers, of type CellId
+        :param cells_b: sequence of cell identifiers, of type CellId
+        :return: sorted list with the smallest set of cells (CellId) that covers the area that is in only one of the
+        sequences
+        """
+        return self.cells_union(self.cells_difference(cells_a, cells_b), self.cells_difference(cells_b, cells_a))
+
+    def get_nucleus_from_keys(self, keys):
+        """
+        :param keys: array of packed 64-bit keys of cells
+        :return: two arrays with the longitude and latitude (geodetic coordinates) of the nucleus of each cell
+        """
+        c0, refinements, rows, cols = self.get_rowcol_from_keys(keys)
+        ul_x = np.array([self.R0_ul_vertex[c][0] for c in self.cells_R0])[c0]
+        ul_y = np.array([self.R0_ul_vertex[c][1] for c in self.cells_R0])[c0]
+        width = self.Ratio * (pi / 2) * float(self.N_side) ** -refinements
+        lons, lats = self.proj(ul_x + (cols + 0.5) * width, ul_y - (rows + 0.5) * width, inverse=True)
+        return np.asarray(lons), np.asarray(lats)
+
+    def get_polygon_rings(self, polygon):
+        """
+        :param polygon: GeoJSON-like Polygon or MultiPolygon geometry, with geodetic coordinates
+        :return: list of the rings of the polygon, as arrays of shape (n, 2)
+        """
+        if polygon['type'] == 'Polygon':
+            rings = polygon['coordinates']
+        elif polygon['type'] == 'MultiPolygon':
+            rings = [ring for part in polygon['coordinates'] for ring in part]
+        else:
+            raise ValueError('Unsupported geometry type: ' + str(polygon['type']))
+        return [np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings if len(ring) > 0]
+
+    def get_points_in_polygon(self, polygon, lons, lats):
+        """
+        :param polygon: GeoJSON-like Polygon or MultiPolygon geometry, with geodetic coordinates
+        :param lons: array of longitudes of points (geodetic coordinates)
+        :param lats: array of latitudes of points (geodetic coordinates)
+        :return: boolean array, True for the points inside the polygon (even-odd rule, holes excluded)
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        rings = self.get_polygon_rings(polygon)
+        x1 = np.concatenate([ring[:, 0] for ring in rings])
+        y1 = np.concatenate([ring[:, 1] for ring in rings])
+        x2 = np.concatenate([np.roll(ring[:, 0], -1) for ring in rings])
+        y2 = np.concatenate([np.roll(ring[:, 1], -1) for ring in rings])
+        sloped = y1 != y2
+        x1, y1, x2, y2 = x1[sloped], y1[sloped], x2[sloped], y2[sloped]
+        inside = np.zeros(len(lons), dtype=bool)
+        if len(x1) == 0:
+            return inside
+
+        # Edges are grouped in horizontal bands, so each point is only tested against the edges of its band
+        y_min = np.minimum(y1, y2)
+        y_max = np.maximum(y1, y2)
+        n_bands = max(1, 4 * int(math.sqrt(len(x1))))
+        bands = np.linspace(y_min.min(), y_max.max(), n_bands + 1)
+        candidates = np.nonzero((lats >= bands[0]) & (lats <= bands[-1]))[0]
+        point_bands = np.minimum(np.searchsorted(bands, lats[candidates], side='right') - 1, n_bands - 1)
+        order = np.argsort(point_bands, kind='stable')
+        candidates = candidates[order]
+        limits = np.searchsorted(point_bands[order], np.arange(n_bands + 1))
+
+        for band in range(n_bands):
+            points = candidates[limits[band]:limits[band + 1]]
+            if len(points) == 0:
+                continue
+            edges = np.nonzero((y_min <= bands[band + 1]) & (y_max >= bands[band]))[0]
+            ex1, ey1, ex2, ey2 = x1[edges], y1[edges], x2[edges], y2[edges]
+            chunk_size = max(1, 2 ** 22 // max(len(edges), 1))
+            for start in range(0, len(points), chunk_size):
+                chunk = points[start:start + chunk_size]
+                px = lons[chunk][:, None]
+                py = lats[chunk][:, None]
+                crossing = (ey1 > py) != (ey2 > py)
+                x_cross = ex1 + (py - ey1) * (ex2 - ex1) / np.where(crossing, ey2 - ey1, 1)
+                inside[chunk] = np.count_nonzero(crossing & (px < x_cross), axis=1) % 2 == 1
+        return inside
+
+    def get_polyfill_keys(self, polygon, refinement):
+        """
+        :param polygon: GeoJSON-like Polygon or MultiPolygon geometry, with geodetic coordinates
+        :param refinement: maximum refinement of the cells
+        :return: sorted array with the keys of the compact set of cells whose descendants at that refinement
+        are the cells with the nucleus inside the polygon
+        """
+        # Cells along the edges of the polygon: the edges are densified to a quarter of the cell width
+        # and the cells of the points are grown by one ring, so no cell crossed by an edge is missed
+        step = math.degrees(pi / 2 * self.N_side ** -refinement) / 4
+        lons = []
+        lats = []
+        for ring in self.get_polygon_rings(polygon):
+            start = ring
+            end = np.roll(ring, -1, axis=0)
+            counts = np.maximum(np.ceil(np.hypot(*(end - start).T) / step).astype(np.int64), 1)
+            fractions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            fractions = fractions / np.repeat(counts, counts)
+            points = np.repeat(start, counts, axis=0) + fractions[:, None] * np.repeat(end - start, counts, axis=0)
+            lons.append(points[:, 0])
+            lats.append(points[:, 1])
+        lons = np.clip(np.concatenate(lons), -180, 180)
+        lats = np.clip(np.concatenate(lats), -90, 90)
+        edges = self.get_k_ring_keys(np.unique(self.get_cell_keys_from_points(refinement, lons, lats)), 1)
+
+        # Coarse to fine: a cell without edge cells is entirely inside or outside the polygon,
+        # so its nucleus decides it; the other cells are refined
+        keys = self.get_cell_keys(self.cells_R0)
+        result = []
+        for level in range(refinement + 1):
+            if level < refinement:
+                ends = self.get_key_range_end(keys)
+                crossed = np.searchsorted(edges, ends, side='right') > np.searchsorted(edges, keys, side='left')
+            else:
+                crossed = np.zeros(len(keys), dtype=bool)
+            whole = keys[~crossed]
+            if len(whole) > 0:
+                result.append(whole[self.get_points_in_polygon(polygon, *self.get_nucleus_from_keys(whole))])
+            keys = self.get_children_keys(keys[crossed]).ravel()
+        result = np.sort(np.concatenate(result))
+
+        # Complete groups of refined sibling cells are replaced by their parent
+        for level in range(refinement, 0, -1):
+            at_level = self.get_key_refinements(result) == level
+            parents, counts = np.unique(self.get_parent_keys(result[at_level]), return_counts=True)
+            complete = parents[counts == self.N_side ** 2]
+            if len(complete) == 0:
+                continue
+            merged = np.isin(self.get_parent_keys(result[at_level]), complete)
+            result = np.sort(np.concatenate([result[~at_level], result[at_level][~merged], complete]))
+        return result
+
+    def polyfill(self, polygon, refinement):
+        """
+        :param polygon: GeoJSON-like Polygon or MultiPolygon geometry, with geodetic coordinates
+        :param refinement: maximum refinement of the cells
+        :return: sorted list with the compact set of cells (CellId) covering the polygon: the cells of that
+        refinement with the nucleus inside the polygon, with complete groups of sibling cells
+        replaced by their parent
+        """
+        keys = self.get_polyfill_keys(polygon, refinement)
+        return [CellID(value) for value in self.get_cells_from_keys(keys)]
+
+
+# rHEALPix instances shared by the whole process, by (N_side, north_square, south_square, engine)
+rHEALPix_instances = {}
+
+
+def get_rHEALPix(N_side=3, north_square=0, south_square=0, engine='pyproj'):
+    """
+    :param N_side: integer, minimum 2, so that each cell has N_side x N_side child cells.
+    :param north_square: integer between 0 and 3 that indicate the position of the north polar square
+    :param south_square: integer between 0 and 3 that indicate the position of the south polar square
+    :param engine: implementation of the projection, 'pyproj' (pyproj.Proj) or 'numpy' (rHEALPixProjection)
+    :return: rHEALPix instance shared by the whole process for those parameters, built the first time it is requested
+    """
+    key = (N_side, north_square, south_square, engine)
+    if key not in rHEALPix_instances:
+        rHEALPix_instances[key] = rHEALPix(N_side=N_side, north_square=north_square, south_square=south_square,
+                                           engine=engine)
+    return rHEALPix_instances[key]
@@ -0,0 +1,226 @@
+import math
+
+import numpy as np
+from numpy import pi
+
+
+class rHEALPixProjection():
+    """
+    Vectorized implementation of the rHEALPix projection of an ellipsoid of revolution, with the same
+    interface as the pyproj Proj object used by rHEALPix:
+
+        x, y = projection(lon, lat)
+        lon, lat = projection(x, y, inverse=True)
+
+    Longitudes and latitudes are in degrees and accept scalars or NumPy arrays. The ellipsoid is first
+    mapped onto its authalic sphere (authalic latitude), which is projected with the HEALPix projection
+    and then the polar triangles are rearranged into the north and south squares.
+    """
+
+    # WGS84 flattening
+    WGS84_f = 1 / 298.257223563
+
+    def __init__(self, north_square=0, south_square=0, a=1, f=WGS84_f, lon_0=0):
+        """
+        :param north_square: integer between 0 and 3 that indicate the position of the north polar square
+        :param south_square: integer between 0 and 3 that indicate the position of the south polar square
+        :param a: semi-major axis of the ellipsoid
+        :param f: flattening of the ellipsoid, WGS84 by default
+        :param lon_0: central meridian, in degrees
+        """
+        assert north_square < 4
+        assert south_square < 4
+        self.north_square = north_square
+        self.south_square = south_square
+        self.lon_0 = math.radians(lon_0)
+
+        self.a = a
+        self.es = 2 * f - f ** 2
+        self.e = math.sqrt(self.es)
+        self.qp = self.q(1.0)
+        # Radius of the authalic sphere
+        self.R_A = a * math.sqrt(self.qp / 2)
+
+    def q(self, sin_phi):
+        """
+        :param sin_phi: sine of the geodetic latitude
+        :return: q function of the authalic latitude (Snyder, eq. 3-12)
+        """
+        e = self.e
+        if e == 0:
+            return 2 * sin_phi
+        con = e * sin_phi
+        return (1 - self.es) * (sin_phi / (1 - con * con) - (0.5 / e) * np.log((1 - con) / (1 + con)))
+
+    def authalic_latitude(self, phi):
+        """
+        :param phi: geodetic latitude, in radians
+        :return: authalic latitude, in radians
+        """
+        return np.arcsin(np.clip(self.q(np.sin(phi)) / self.qp, -1, 1))
+
+    def geodetic_latitude(self, beta):
+        """
+        :param beta: authalic latitude, in radians
+        :return: geodetic latitude, in radians
+        """
+        es = self.es
+        if es == 0:
+            return beta
+
+        # Series approximation (Snyder, eq. 3-18) refined with Newton iterations (Snyder, eq. 3-16)
+        phi = beta + (es / 3 + 31 * es ** 2 / 180 + 517 * es ** 3 / 5040) * np.sin(2 * beta) \
+            + (23 * es ** 2 / 360 + 251 * es ** 3 / 3780) * np.sin(4 * beta) \
+            + (761 * es ** 3 / 45360) * np.sin(6 * beta)
+        q = self.qp * np.sin(beta)
+        for _ in range(2):
+            sin_phi = np.sin(phi)
+            cos_phi = np.cos(phi)
+            one_minus = 1 - es * sin_phi ** 2
+            regular = np.abs(cos_phi) > 1e-12
+            delta = one_minus ** 2 / (2 * np.where(regular, cos_phi, 1)) * \
+                (q / (1 - es) - sin_phi / one_minus +
+                 (0.5 / self.e) * np.log((1 - self.e * sin_phi) / (1 + self.e * sin_phi)))
+            phi = np.where(regular, phi + delta, phi)
+        return phi
+
+    def healpix_sphere(self, lam, phi):
+        """
+        :param lam: longitude, in radians, between -pi and pi
+        :param phi: latitude on the sphere, in radians
+        :return: HEALPix projected coordinates (x, y) of the unit sphere
+        """
+        phi0 = math.asin(2 / 3)
+        equatorial = np.abs(phi) <= phi0
+
+        sigma = np.sqrt(3 * (1 - np.abs(np.sin(phi))))
+        cn = np.minimum(np.floor(2 * lam / pi + 2), 3)
+        lamc = -3 * pi / 4 + (pi / 2) * cn
+
+        x = np.where(equatorial, lam, lamc + (lam - lamc) * sigma)
+        y = np.where(equatorial, 3 * pi / 8 * np.sin(phi), np.sign(phi) * pi / 4 * (2 - sigma))
+        return x, y
+
+    def healpix_sphere_inverse(self, x, y):
+        """
+        :param x: HEALPix projected x coordinate of the unit sphere
+        :param y: HEALPix projected y coordinate of the unit sphere
+        :return: longitude and latitude on the sphere, in radians
+        """
+        equatorial = np.abs(y) <= pi / 4
+
+        cn = np.minimum(np.floor(2 * x / pi + 2), 3)
+        xc = -3 * pi / 4 + (pi / 2) * cn
+        tau = 2 - 4 * np.abs(y) / pi
+        pole = tau <= 0
+        safe_tau = np.where(pole | equatorial, 1, tau)
+
+        lam = np.where(equatorial, x, np.where(pole, xc, xc + (x - xc) / safe_tau))
+        phi = np.where(equatorial, np.arcsin(np.clip(8 * y / (3 * pi), -1, 1)),
+                       np.sign(y) * np.arcsin(np.clip(1 - safe_tau ** 2 / 3, -1, 1)))
+        phi = np.where(pole & ~equatorial, np.sign(y) * pi / 2, phi)
+        return lam, phi
+
+    @staticmethod
+    def rotate(dx, dy, quarter_turns):
+        """
+        :param dx: x coordinates of vectors
+        :param dy: y coordinates of vectors
+        :param quarter_turns: integer array, number of counterclockwise quarter turns (0 to 3)
+        :return: the rotated vectors
+        """
+        cos = np.choose(quarter_turns, [1, 0, -1, 0])
+        sin = np.choose(quarter_turns, [0, 1, 0, -1])
+        return cos * dx - sin * dy, sin * dx + cos * dy
+
+    def combine_caps(self, x, y):
+        """
+        :param x: HEALPix projected x coordinate of the unit sphere
+        :param y: HEALPix projected y coordinate of the unit sphere
+        :return: rHEALPix projected coordinates of the unit sphere, where the polar triangles of
+        column cn are rotated about their tips into the north and south squares.
+        """
+        cn = np.minimum(np.floor(2 * x / pi + 2), 3).astype(np.int64)
+        xc = -3 * pi / 4 + (pi / 2) * cn
+
+        north = y > pi / 4
+        south = y < -pi / 4
+
+        # North triangles rotate counterclockwise, south triangles clockwise
+        turns = np.where(north, (cn - self.north_square) % 4, (self.south_square - cn) % 4)
+        tip_y = np.where(north, pi / 2, -pi / 2)
+        rx, ry = self.rotate(x - xc, y - tip_y, turns)
+        square_x = np.where(north, -3 * pi / 4 + (pi / 2) * self.north_square,
+                            -3 * pi / 4 + (pi / 2) * self.south_square)
+
+        polar = north | south
+        return np.where(polar, rx + square_x, x), np.where(polar, ry + tip_y, y)
+
+    def split_caps(self, x, y):
+        """
+        :param x: rHEALPix projected x coordinate of the unit sphere
+        :param y: rHEALPix projected y coordinate of the unit sphere
+        :return: HEALPix projected coordinates of the unit sphere (inverse of combine_caps)
+        """
+        north = y > pi / 4
+        south = y < -pi / 4
+
+        square = np.where(north, self.north_square, self.south_square)
+        square_x = -3 * pi / 4 + (pi / 2) * square
+        tip_y = np.where(north, pi / 2, -pi / 2)
+        dx = x - square_x
+        dy = y - tip_y
+
+        # Triangle of the square containing the point, as number of quarter turns from the
+        # triangle that is not rotated (the one next to the equatorial region)
+        inward = np.where(north, -dy, dy)
+        triangle = np.where(np.abs(dy) >= np.abs(dx), np.where(inward > 0, 0, 2), np.where(dx > 0, 1, 3))
+        turns = np.where(north, (4 - triangle) % 4, triangle)
+        cn = (square + triangle) % 4
+
+        rx, ry = self.rotate(dx, dy, turns)
+        xc = -3 * pi / 4 + (pi / 2) * cn
+
+        polar = north | south
+        return np.where(polar, rx + xc, x), np.where(polar, ry + tip_y, y)
+
+    def forward(self, lons, lats):
+        """
+        :param lons: longitudes, in degrees
+        :param lats: latitudes, in degrees
+        :return: rHEALPix projected coordinates (x, y)
+        """
+        lam = np.radians(lons) - self.lon_0
+        # Like pyproj, only longitudes outside of [-pi, pi] are wrapped, so that +180 stays on the east side
+        lam = np.where(np.abs(lam) > pi, (lam + pi) % (2 * pi) - pi, lam)
+        beta = self.authalic_latitude(np.radians(lats))
+        x, y = self.combine_caps(*self.healpix_sphere(lam, beta))
+        return x * self.R_A, y * self.R_A
+
+    def inverse(self, xs, ys):
+        """
+        :param xs: rHEALPix projected x coordinates
+        :param ys: rHEALPix projected y coordinates
+        :return: longitudes and latitudes, in degrees
+        """
+        x, y = self.split_caps(np.asarray(xs) / self.R_A, np.asarray(ys) / self.R_A)
+        lam, beta = self.healpix_sphere_inverse(x, y)
+        lam = lam + self.lon_0
+        lam = np.where((lam < -pi) | (lam > pi), (lam + pi) % (2 * pi) - pi, lam)
+        return np.degrees(lam), np.degrees(self.geodetic_latitude(beta))
+
+    def __call__(self, x, y, inverse=False):
+        """
+        :param x: longitudes (or x coordinates if inverse)
+        :param y: latitudes (or y coordinates if inverse)
+        :param inverse: if True, computes the inverse projection
+        :return: the projected coordinates (or geodetic coordinates if inverse), as floats
+        if the input are scalars, or as arrays otherwise.
+        """
+        scalar = np.isscalar(x) and np.isscalar(y)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        result_x, result_y = self.inverse(x, y) if inverse else self.forward(x, y)
+        if scalar:
+            return float(result_x), float(result_y)
+        return result_x, result_y
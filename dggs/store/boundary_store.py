@@ -1,29 +1,40 @@
+import numpy as np
 import pymongo
 from pymongo import MongoClient
 
-from dggs.cellset.boundary import OptimalBoundary
+from dggs.cellset.boundary import Boundary, OptimalBoundary
 from dggs.boundary_ID import AUID
+from dggs.cell_ID_array import CellIDArray
 from dggs.dataset.boundary_dataset import BoundaryDataSet
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 import mongodb_config
 from bson import ObjectId
 
 class BoundaryStore:
 
-    def __init__(self, dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, dggs=None):
         """
         :param dggs: Discrete Global Grid System, rHEALPix by default
         """
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
         self.db = MongoClient(mongodb_config.MONGODB_CONFIG['host']).bds
 
-    def get_Boundary_Data(self, boundary):
+    def get_Boundary_Data(self, boundary, cell_array=False):
         """
         :param boundary: document stored that contains the boundary_id and data associated
+        :param cell_array: if True, the cells of the OptimalBoundary are stored as a CellIDArray, decoded from the
+        AUID without creating the cells
         :return: OptimalBoundary and Data tuple
         """
-        return OptimalBoundary(boundary_ID=AUID(boundary["auid"])), Data(boundary["data"])
+        optimal_boundary = OptimalBoundary(boundary_ID=AUID(boundary["auid"]), dggs=self.dggs)
+        if cell_array:
+            keys, _ = optimal_boundary.get_cell_ranges()
+            optimal_boundary = OptimalBoundary(boundary_ID=optimal_boundary.boundary_ID, dggs=self.dggs,
+                                               cells=CellIDArray(keys=keys, dggs=self.dggs, is_sorted=True))
+        return optimal_boundary, Data(boundary["data"])
 
     def insert(self, b_dataset):
         """
@@ -32,7 +43,8 @@ class BoundaryStore:
         Insert, in the collection of boundaries, one _boundary for each pair in the set, derived from its auid,
         bounding box, associated data and the identifier of the _boundaryDataSet.
 
-        :param b_dataset: BoundaryDataSet containing the OptimalBoundary and Data pairs.
+        :param b_dataset: BoundaryDataSet containing the OptimalBoundary and Data pairs. The boundaries can be
+        built from a CellIDArray.
         """
 
         # Store boundaryDataSet
@@ -50,6 +62,8 @@ class BoundaryStore:
                     "type": "Polygon",
                     "coordinates": boundary.get_bbox(),
                 },
+                "area": boundary.area(),
+                "cell_count": boundary.cell_count(),
                 "data": data.content,
                 "boundary_dataset_id": b_dataset.id
             }
@@ -87,6 +101,26 @@ class BoundaryStore:
             boundaries.append((boundary, data))
         return boundaries
 
+    def query_by_cell_array(self, cell_array):
+        """
+        :param cell_array: CellIDArray with the cells of a boundary. It is optimized before making the query.
+        :return: List of tuples with stored boundaries that have the area of the cells of the param and data
+        associated. The cells of the boundaries are CellIDArray.
+        """
+        optimal_boundary = Boundary(cells=cell_array, dggs=self.dggs).optimize()
+        boundaries_founded = self.db.boundaries.find({"auid": optimal_boundary.boundary_ID.value})
+        return [self.get_Boundary_Data(boundary, cell_array=True) for boundary in boundaries_founded]
+
+    def get_cell_array(self, boundary_dataset_id=None):
+        """
+        :param boundary_dataset_id: identifier of a BoundaryDataSet, all the stored boundaries by default
+        :return: CellIDArray with the cells of the stored boundaries (of the BoundaryDataSet)
+        """
+        query = {} if boundary_dataset_id is None else {"boundary_dataset_id": boundary_dataset_id}
+        keys = [OptimalBoundary(boundary_ID=AUID(auid), dggs=self.dggs).get_cell_ranges()[0]
+                for auid in self.db.boundaries.distinct("auid", query)]
+        return CellIDArray(keys=np.concatenate(keys) if len(keys) > 0 else None, dggs=self.dggs)
+
     def query_by_polygon(self, polygon):
         """
         :param polygon: Polygon with which you want to make the intersection
@@ -220,6 +254,8 @@ class BoundaryStore:
                         "type": "Polygon",
                         "coordinates": boundary.get_bbox(),
                     },
+                    "area": boundary.area(),
+                    "cell_count": boundary.cell_count(),
                     "data": data.content,
                     "boundary_dataset_id": boundary_dataset["_id"]
                 }
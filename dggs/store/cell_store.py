@@ -3,17 +3,20 @@ from pymongo import MongoClient
 
 import mongodb_config
 from dggs.cell_ID import CellID
+from dggs.cell_ID_array import CellIDArray
 from dggs.dataset.cell_dataset import CellDataSet
 from dggs.dataset.data import Data
-from dggs.rHealPix import rHEALPix
+from dggs.rHealPix import get_rHEALPix
 
 
 class CellStore:
 
-    def __init__(self, dggs=rHEALPix(N_side=3, north_square=0, south_square=0)):
+    def __init__(self, dggs=None):
         """
         :param dggs: Discrete Global Grid System, rHEALPix by default
         """
+        if dggs is None:
+            dggs = get_rHEALPix()
         self.dggs = dggs
         self.db = MongoClient(mongodb_config.MONGODB_CONFIG['host']).bds
 
@@ -22,7 +25,7 @@ class CellStore:
         :param cell: document stored that contains the cell_id and data associated
         :return: CellID and Data tuple
         """
-        return CellID(cell["cellID"]), Data(cell["data"])
+        return CellID.intern(cell["cellID"]), Data(cell["data"])
 
     def insert(self, c_dataset):
         """
@@ -77,6 +80,26 @@ class CellStore:
             cells.append((cell, data))
         return cells
 
+    def query_by_cell_array(self, cell_array):
+        """
+        :param cell_array: CellIDArray
+        :return: List of tuples with stored cells that have any of the identifiers of the param and data associated
+        """
+        cells_founded = self.db.cells.find({"cellID": {"$in": cell_array.get_values().tolist()}})
+        cells = []
+        for cell in cells_founded:
+            cell, data = self.get_Cell_Data(cell)
+            cells.append((cell, data))
+        return cells
+
+    def get_cell_array(self, cell_dataset_id=None):
+        """
+        :param cell_dataset_id: identifier of a CellDataSet, all the stored cells by default
+        :return: CellIDArray with the identifiers of the stored cells (of the CellDataSet)
+        """
+        query = {} if cell_dataset_id is None else {"cell_dataset_id": cell_dataset_id}
+        return CellIDArray(cells=self.db.cells.distinct("cellID", query), dggs=self.dggs)
+
     def query_by_polygon(self, polygon):
         return []
 
@@ -102,8 +125,8 @@ class CellStore:
         for cell_dataset in cell_datasets_founded:
             cds = CellDataSet(id=cell_dataset["_id"])
             cells_in_cds_founded = self.db.cells.find({"cell_dataset_id": cell_dataset["_id"]})
-            for cell in cells_in_cds_founded:
-                cds.add(CellID(cell['cellID']), Data(cell["data"]))
+            cds.add_list([(CellID.intern(cell['cellID']), Data(cell["data"])) for cell in cells_in_cds_founded],
+                         skip_duplicates=True)
             cell_data_sets.append(cds)
         return cell_data_sets
 
@@ -119,9 +142,7 @@ class CellStore:
             cds = CellDataSet()
             cells_in_bds_founded = self.db.cells.find(
                 {"cell_dataset_id": cell["cell_dataset_id"]})
-            for cell_2 in cells_in_bds_founded:
-                cell, data = self.get_Cell_Data(cell_2)
-                cds.add(cell, data)
+            cds.add_list([self.get_Cell_Data(cell_2) for cell_2 in cells_in_bds_founded], skip_duplicates=True)
             cell_data_sets.append(cds)
         return cell_data_sets
 
@@ -135,8 +156,8 @@ class CellStore:
         for cell_dataset in cell_datasets_founded:
             cds = CellDataSet(id=id)
             cells_in_cds_founded = self.db.cells.find({"cell_dataset_id": cell_dataset["_id"]})
-            for cell in cells_in_cds_founded:
-                cds.add(CellID(cell['cellID']), Data(cell["data"]))
+            cds.add_list([(CellID.intern(cell['cellID']), Data(cell["data"])) for cell in cells_in_cds_founded],
+                         skip_duplicates=True)
             cell_data_sets.append(cds)
         return cell_data_sets
 
@@ -152,8 +173,8 @@ class CellStore:
             cds = CellDataSet(id=id)
             cells_in_cds_founded = self.db.cells.find({"cell_dataset_id": cell_dataset["_id"],
                                                                 "cellID":cell_id.value})
-            for cell in cells_in_cds_founded:
-                cds.add(CellID(cell['cellID']), Data(cell["data"]))
+            cds.add_list([(CellID.intern(cell['cellID']), Data(cell["data"])) for cell in cells_in_cds_founded],
+                         skip_duplicates=True)
             cell_data_sets.append(cds)
         return cell_data_sets
 